@@ -1,4 +1,34 @@
+import hmac
+import os
 import reflex as rx
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from . import cache, database
+
+## bearer token a scraper sends to read /metrics; without one only clients on
+## the same host may. Caddy does not route /metrics, so it is never public
+METRICS_TOKEN = os.environ.get("MAIRE_METRICS_TOKEN")
+LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")
+
+
+def _may_scrape(request) -> bool:
+    if METRICS_TOKEN:
+        return hmac.compare_digest(
+            request.headers.get("authorization", ""), f"Bearer {METRICS_TOKEN}"
+        )
+    return request.client is not None and request.client.host in LOOPBACK_HOSTS
+
+
+async def metrics(request):
+    ## pool and search cache metrics of the worker that answers, for Prometheus
+    if not _may_scrape(request):
+        return PlainTextResponse("Forbidden", status_code=403)
+    return PlainTextResponse(
+        database.metrics_text() + cache.metrics_text(),
+        media_type="text/plain; version=0.0.4",
+    )
+
 
 app = rx.App(
     theme=rx.theme(
@@ -6,4 +36,5 @@ app = rx.App(
         has_background=True,
     ),
     stylesheets=["/style.css"],
+    api_transformer=Starlette(routes=[Route("/metrics", metrics)]),
 )
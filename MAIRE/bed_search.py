@@ -0,0 +1,177 @@
+import collections
+import glob
+import heapq
+import os
+import re
+import time
+from typing import Callable, Iterable, Iterator, List, Tuple
+from .queries import INTERVAL_BATCH
+
+## larger uploads are refused rather than tying up a worker for minutes
+MAX_INTERVALS = 100000
+## seconds uploads and result files of a BED search stay in the upload
+## directory before a later search removes them
+RESULT_TTL = 24 * 3600
+RESULT_PREFIX = "bed_"
+## what handle_bed_upload names an upload: the prefix and a uuid4 hex
+RESULT_NAME = re.compile(rf"{RESULT_PREFIX}[0-9a-f]{{32}}")
+
+## (chromosome, start, end, name) in BED coordinates: 0-based, end exclusive
+Interval = Tuple[str, int, int, str]
+
+
+def parse_bed(lines: Iterable[str]) -> List[Interval]:
+    """The intervals of a BED file; track, browser and comment lines are skipped.
+
+    Raises ValueError with the offending line number on a malformed line or
+    when there are more than MAX_INTERVALS intervals.
+    """
+    intervals = []
+    for number, line in enumerate(lines, start=1):
+        line = line.rstrip("\r\n")
+        if not line.strip() or line.startswith(("#", "track", "browser")):
+            continue
+        fields = line.split("\t") if "\t" in line else line.split()
+        try:
+            chromosome, start, end = fields[0], int(fields[1]), int(fields[2])
+        except (IndexError, ValueError):
+            raise ValueError(f"line {number} is not a BED interval: {line[:50]}")
+        if start < 0 or end < start:
+            raise ValueError(f"line {number} has an invalid interval: {line[:50]}")
+        name = fields[3] if len(fields) > 3 else f"{chromosome}:{start}-{end}"
+        intervals.append((chromosome, start, end, name))
+        if len(intervals) > MAX_INTERVALS:
+            raise ValueError(f"more than {MAX_INTERVALS} intervals, split the file")
+    return intervals
+
+
+def read_bed(path) -> List[Interval]:
+    """parse_bed() of the file at `path`, read line by line."""
+    with open(path, encoding="utf-8") as f:
+        return parse_bed(f)
+
+
+def batches(intervals: List[Interval]) -> Iterator[Tuple[list, List[Interval]]]:
+    """Sort and merge `intervals` into groups that are looked up together.
+
+    Yields ([chromosome, first, last] blocks, intervals): up to INTERVAL_BATCH
+    merged blocks in the 1-based closed coordinates of the sites, and the
+    sorted BED intervals they cover. Overlapping and adjacent intervals share
+    a block, so every site is fetched once however often it is covered.
+    """
+    blocks, members = [], []
+    for interval in sorted(intervals):
+        chromosome, start, end, _ = interval
+        if blocks and blocks[-1][0] == chromosome and start <= blocks[-1][2]:
+            blocks[-1][2] = max(blocks[-1][2], end)
+        else:
+            if len(blocks) == INTERVAL_BATCH:
+                yield blocks, members
+                blocks, members = [], []
+            blocks.append([chromosome, start + 1, end])
+        members.append(interval)
+    if blocks:
+        yield blocks, members
+
+
+class BedResults:
+    """The result files of a BED search, written while its sites stream in.
+
+    The sites of a batch arrive in chunks, in position order within every
+    chromosome. Each chromosome keeps the batch's intervals that have not
+    started yet, sorted by start, and a heap by end of the ones that have,
+    so a site is matched against exactly the intervals covering it. Site
+    rows go straight to the sites file; only the intervals and their counts
+    stay in memory. Not thread safe, calls must not overlap.
+    """
+
+    def __init__(self, counts_path: str, sites_path: str, header: List[str], site_fields: Callable):
+        self.counts_path = counts_path
+        self.sites_path = sites_path
+        self.site_fields = site_fields
+        self.intervals: List[Interval] = []
+        self.counts: List[int] = []
+        self.sites = 0
+        self._waiting = {}
+        self._open = {}
+        self._sites_file = open(sites_path, "w")
+        self._sites_file.write("\t".join(header) + "\n")
+
+    def start_batch(self, members: List[Interval]):
+        """Make the sorted `members` of the next batch the intervals sites are matched to."""
+        self._waiting = {}
+        self._open = {}
+        for interval in members:
+            self._waiting.setdefault(interval[0], collections.deque()).append(
+                len(self.intervals)
+            )
+            self.intervals.append(interval)
+            self.counts.append(0)
+
+    def add_sites(self, sites: list):
+        lines = []
+        for site in sites:
+            self.sites += 1
+            position = site.position
+            waiting = self._waiting.get(site.chromosome)
+            opened = self._open.setdefault(site.chromosome, [])
+            ## BED starts are 0-based: an interval covers start < position <= end
+            while waiting and self.intervals[waiting[0]][1] < position:
+                index = waiting.popleft()
+                heapq.heappush(opened, (self.intervals[index][2], index))
+            while opened and opened[0][0] < position:
+                heapq.heappop(opened)
+            if not opened:
+                continue
+            fields = "\t".join(self.site_fields(site))
+            for index in sorted(index for _, index in opened):
+                self.counts[index] += 1
+                interval = "\t".join(str(field) for field in self.intervals[index])
+                lines.append(f"{interval}\t{fields}\n")
+        self._sites_file.write("".join(lines))
+
+    def finish(self):
+        """Close the sites file and write the count of every interval."""
+        self._sites_file.close()
+        with open(self.counts_path, "w") as f:
+            f.write("chrom\tstart\tend\tname\tsites\n")
+            for interval, count in zip(self.intervals, self.counts):
+                f.write("\t".join(str(field) for field in interval) + f"\t{count}\n")
+
+    def discard(self):
+        """Close and remove the files of a search that failed."""
+        self._sites_file.close()
+        for path in (self.sites_path, self.counts_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    @property
+    def hit(self) -> int:
+        """Number of intervals with at least one site."""
+        return sum(1 for count in self.counts if count)
+
+    def top(self, n: int) -> List[Tuple[int, Interval]]:
+        """(sites, interval) of the `n` intervals with the most sites."""
+        return heapq.nlargest(
+            n, zip(self.counts, self.intervals), key=lambda item: item[0]
+        )
+
+
+def is_result_name(name: str) -> bool:
+    """True for a name of BED upload files, which never leave the upload directory."""
+    return RESULT_NAME.fullmatch(name) is not None
+
+
+def expire_results(directory, max_age: float = RESULT_TTL) -> int:
+    """Remove BED uploads and result files in `directory` older than `max_age` seconds."""
+    removed = 0
+    cutoff = time.time() - max_age
+    for path in glob.glob(os.path.join(directory, f"{RESULT_PREFIX}*")):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except FileNotFoundError:
+            ## another worker got to it first
+            pass
+    return removed
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import logging
+import os
+import redis.asyncio
+import redis.exceptions
+from typing import Dict, List, Optional
+from .statistics import dataset_version
+
+## redis instance of the search cache, kept apart from the one holding the
+## Reflex state so that its LRU eviction never drops a user's session;
+## without it searches go to the database every time
+CACHE_URL = os.environ.get("MAIRE_CACHE_URL")
+## seconds a cached result lives, on top of being dropped by a dataset reload
+CACHE_TTL = int(os.environ.get("MAIRE_CACHE_TTL", "3600"))
+KEY_PREFIX = "maire:search"
+
+_client: Optional[redis.asyncio.Redis] = None
+## kind -> {"hits": n, "misses": n, "errors": n} of this worker
+_counts: Dict[str, Dict[str, int]] = {}
+
+
+def _client_or_none() -> Optional[redis.asyncio.Redis]:
+    global _client
+    if _client is None and CACHE_URL:
+        _client = redis.asyncio.from_url(CACHE_URL)
+    return _client
+
+
+def _count(kind: str, outcome: str):
+    counts = _counts.setdefault(kind, {"hits": 0, "misses": 0, "errors": 0})
+    counts[outcome] += 1
+
+
+async def cache_key(kind: str, genome: str, search: list, filters: dict) -> str:
+    """Key of one result: the dataset version, the genome and the normalized query.
+
+    The dataset version changes with every load, so a reload moves all
+    lookups onto new keys and the old entries age out by TTL or LRU.
+    """
+    query = json.dumps([genome, search, filters], sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha1(query.encode()).hexdigest()
+    return f"{KEY_PREFIX}:{await dataset_version()}:{kind}:{digest}"
+
+
+def pack_rows(rows: List[dict]) -> dict:
+    """Rows of dicts as one column list and value lists, the form they are cached in."""
+    columns = list(rows[0]) if rows else []
+    return {"columns": columns, "rows": [[row[column] for column in columns] for row in rows]}
+
+
+def unpack_rows(packed: dict) -> List[dict]:
+    return [dict(zip(packed["columns"], values)) for values in packed["rows"]]
+
+
+async def get(kind: str, genome: str, search: list, filters: dict):
+    """The cached result of a search, None on a miss or without a cache."""
+    client = _client_or_none()
+    if client is None:
+        return None
+    try:
+        value = await client.get(await cache_key(kind, genome, search, filters))
+    except (redis.exceptions.RedisError, OSError):
+        logging.exception("search cache lookup failed")
+        _count(kind, "errors")
+        return None
+    _count(kind, "misses" if value is None else "hits")
+    return None if value is None else json.loads(value)
+
+
+async def put(kind: str, genome: str, search: list, filters: dict, value):
+    client = _client_or_none()
+    if client is None:
+        return
+    try:
+        await client.set(
+            await cache_key(kind, genome, search, filters),
+            json.dumps(value, separators=(",", ":")),
+            ex=CACHE_TTL,
+        )
+    except (redis.exceptions.RedisError, OSError):
+        logging.exception("search cache store failed")
+        _count(kind, "errors")
+
+
+def metrics_text() -> str:
+    """Hit, miss and error counts of this worker in the Prometheus text format."""
+    lines = []
+    for kind, counts in _counts.items():
+        for outcome, count in counts.items():
+            lines.append(
+                f'maire_cache_{outcome}_total{{kind="{kind}",pid="{os.getpid()}"}} {count}'
+            )
+    return "".join(line + "\n" for line in lines)
@@ -0,0 +1,263 @@
+import asyncio
+import contextlib
+import itertools
+import logging
+import os
+import time
+import sqlalchemy
+import sqlalchemy.ext.asyncio
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from reflex.config import get_config
+from reflex.environment import environment
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+## comma separated async urls of read-only replicas (or a single read-only
+## engine) the page queries use; empty means everything reads the primary
+READ_DB_URLS: List[str] = [
+    url.strip() for url in os.environ.get("MAIRE_READ_DB_URLS", "").split(",") if url.strip()
+]
+## seconds a replica's health is trusted before it is checked again
+HEALTH_CHECK_INTERVAL = float(os.environ.get("MAIRE_READ_DB_CHECK_INTERVAL", "30"))
+## seconds a health check may take before the replica counts as down
+HEALTH_CHECK_TIMEOUT = 2.0
+## pool settings of every async engine. rxconfig.py can set them as
+## rx.Config(db_pool_size=...) and MAIRE_DB_POOL_SIZE etc. override that
+POOL_DEFAULTS = {
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_timeout": 30.0,
+    "pool_recycle": 1800,
+    "pool_pre_ping": True,
+}
+
+## replica url -> (healthy, time.monotonic() of the last check)
+_health: Dict[str, Tuple[bool, float]] = {}
+_turn = itertools.count()
+## connection failures that take a replica out of rotation
+_CONNECTION_ERRORS = (
+    sqlalchemy.exc.OperationalError,
+    sqlalchemy.exc.InterfaceError,
+    OSError,
+    asyncio.TimeoutError,
+)
+_engines: Dict[str, sqlalchemy.ext.asyncio.AsyncEngine] = {}
+_sessionmakers: Dict[str, sqlalchemy.ext.asyncio.async_sessionmaker] = {}
+
+
+class PoolMetrics:
+    """Counters of one engine's connection pool, fed by pool events.
+
+    Waits are measured around the first connection a read session takes, so
+    they include opening a new connection when the pool has none idle.
+    """
+
+    def __init__(self, engine):
+        self.pool = engine.sync_engine.pool
+        self.checkouts = 0
+        self.connects = 0
+        self.overflow_connects = 0
+        self.timeouts = 0
+        self.disconnects = 0
+        self.invalidations = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.sessions = 0
+        self.max_sessions = 0
+        sqlalchemy.event.listen(self.pool, "checkout", self._checkout)
+        sqlalchemy.event.listen(self.pool, "connect", self._connect)
+        sqlalchemy.event.listen(self.pool, "invalidate", self._invalidate)
+        ## an invalidated connection is closed as well, and counted there
+        for name in ("close", "close_detached"):
+            sqlalchemy.event.listen(self.pool, name, self._disconnect)
+
+    def _checkout(self, *args):
+        self.checkouts += 1
+
+    def _connect(self, *args):
+        self.connects += 1
+        ## connections open beyond pool_size are the overflow ones
+        size = self._pool_value("size")
+        if size and self.connects - self.disconnects > size:
+            self.overflow_connects += 1
+
+    def _disconnect(self, *args):
+        self.disconnects += 1
+
+    def _invalidate(self, *args):
+        self.invalidations += 1
+
+    def _pool_value(self, name) -> int:
+        ## only queue pools have a size; the sqlite memory pools do not
+        method = getattr(self.pool, name, None)
+        return method() if method is not None else 0
+
+    def waited(self, seconds: float):
+        self.waits += 1
+        self.wait_seconds += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def values(self) -> Dict[str, float]:
+        return {
+            "pool_size": self._pool_value("size"),
+            "checked_out": self._pool_value("checkedout"),
+            "overflow": self._pool_value("overflow"),
+            "checkouts_total": self.checkouts,
+            "connects_total": self.connects,
+            "overflow_connects_total": self.overflow_connects,
+            "timeouts_total": self.timeouts,
+            "disconnects_total": self.disconnects,
+            "invalidations_total": self.invalidations,
+            "waits_total": self.waits,
+            "wait_seconds_total": self.wait_seconds,
+            "wait_seconds_max": self.max_wait_seconds,
+            "sessions": self.sessions,
+            "sessions_max": self.max_sessions,
+        }
+
+
+_metrics: Dict[str, PoolMetrics] = {}
+
+
+def _safe_url(url: str) -> str:
+    return sqlalchemy.engine.make_url(url).render_as_string(hide_password=True)
+
+
+def _setting(config, name, default):
+    value = os.environ.get(f"MAIRE_DB_{name.upper()}")
+    if value is None:
+        return getattr(config, f"db_{name}", default)
+    if isinstance(default, bool):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return type(default)(value)
+
+
+def pool_settings() -> dict:
+    """create_async_engine() pool arguments from rxconfig.py and the environment."""
+    config = get_config()
+    return {name: _setting(config, name, default) for name, default in POOL_DEFAULTS.items()}
+
+
+def _resolve(url: Optional[str]) -> str:
+    url = url or get_config().async_db_url
+    if url is None:
+        raise ValueError("No async database url configured")
+    return url
+
+
+def async_engine(url: Optional[str] = None) -> sqlalchemy.ext.asyncio.AsyncEngine:
+    """The pooled, instrumented async engine of `url` (default: the primary)."""
+    url = _resolve(url)
+    if url not in _engines:
+        _engines[url] = sqlalchemy.ext.asyncio.create_async_engine(
+            url, echo=environment.SQLALCHEMY_ECHO.get(), **pool_settings()
+        )
+        _metrics[url] = PoolMetrics(_engines[url])
+    return _engines[url]
+
+
+def _asession(url: Optional[str] = None) -> AsyncSession:
+    ## the same session options as rx.asession(), on our engines; the app
+    ## opens its sessions through read_asession(), never rx.asession()
+    url = _resolve(url)
+    if url not in _sessionmakers:
+        _sessionmakers[url] = sqlalchemy.ext.asyncio.async_sessionmaker(
+            bind=async_engine(url),
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autocommit=False,
+            autoflush=False,
+        )
+    return _sessionmakers[url]()
+
+
+async def _check(url: str) -> bool:
+    try:
+        async with _asession(url) as asession:
+            await asyncio.wait_for(
+                asession.execute(sqlalchemy.text("SELECT 1")), HEALTH_CHECK_TIMEOUT
+            )
+        return True
+    except _CONNECTION_ERRORS:
+        logging.warning("read replica %s failed its health check", _safe_url(url))
+        return False
+
+
+def _mark(url: str, healthy: bool):
+    _health[url] = (healthy, time.monotonic())
+
+
+async def _healthy(url: str) -> bool:
+    healthy, checked = _health.get(url, (False, float("-inf")))
+    if time.monotonic() - checked >= HEALTH_CHECK_INTERVAL:
+        healthy = await _check(url)
+        _mark(url, healthy)
+    return healthy
+
+
+async def read_url() -> Optional[str]:
+    """Url of a healthy replica, round robin; None (the primary) when there is none."""
+    first = next(_turn)
+    for offset in range(len(READ_DB_URLS)):
+        url = READ_DB_URLS[(first + offset) % len(READ_DB_URLS)]
+        if await _healthy(url):
+            return url
+    return None
+
+
+@contextlib.asynccontextmanager
+async def read_asession() -> AsyncIterator[AsyncSession]:
+    """An async session for read-only queries, on a replica when one is up.
+
+    Replicas are checked at most every HEALTH_CHECK_INTERVAL seconds and the
+    primary is used while none of them answers. A replica whose connection
+    fails during a query is taken out of rotation until its next check; the
+    error is raised as usual, the next event reads elsewhere.
+
+        async with read_asession() as asession:
+            ...
+    """
+    url = await read_url()
+    try:
+        async with _asession(url) as asession:
+            metrics = _metrics[_resolve(url)]
+            metrics.sessions += 1
+            metrics.max_sessions = max(metrics.max_sessions, metrics.sessions)
+            try:
+                started = time.monotonic()
+                try:
+                    await asession.connection()
+                except sqlalchemy.exc.TimeoutError:
+                    ## every connection stayed checked out for pool_timeout
+                    metrics.timeouts += 1
+                    raise
+                metrics.waited(time.monotonic() - started)
+                yield asession
+            finally:
+                metrics.sessions -= 1
+    except _CONNECTION_ERRORS:
+        if url is not None:
+            logging.warning("read replica %s failed, using the primary", _safe_url(url))
+            _mark(url, False)
+        raise
+
+
+def _role(url: str) -> str:
+    ## metric label of an engine; urls carry hosts and users, they stay out
+    if url in READ_DB_URLS:
+        return f"replica-{READ_DB_URLS.index(url) + 1}"
+    return "primary"
+
+
+def pool_metrics() -> Dict[str, Dict[str, float]]:
+    """{"primary" or "replica-N": pool metrics} of the engines this worker opened."""
+    return {_role(url): metrics.values() for url, metrics in _metrics.items()}
+
+
+def metrics_text() -> str:
+    """pool_metrics() in the Prometheus text format, one series per engine."""
+    lines = []
+    for role, values in pool_metrics().items():
+        for name, value in values.items():
+            lines.append(f'maire_db_{name}{{database="{role}",pid="{os.getpid()}"}} {value}')
+    return "\n".join(lines) + "\n"
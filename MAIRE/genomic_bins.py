@@ -0,0 +1,56 @@
+import sqlalchemy
+from typing import List, Tuple
+
+## UCSC "standard" binning scheme: five levels of bins of 128kb, 1Mb, 8Mb,
+## 64Mb and 512Mb. A feature gets the smallest bin it fits in completely, so
+## every feature overlapping a region sits in one of a few bin ranges.
+BIN_OFFSETS = (512 + 64 + 8 + 1, 64 + 8 + 1, 8 + 1, 1, 0)
+BIN_FIRST_SHIFT = 17
+BIN_NEXT_SHIFT = 3
+## coordinates the standard scheme can bin are below this
+BIN_MAX_END = 1 << (BIN_FIRST_SHIFT + BIN_NEXT_SHIFT * (len(BIN_OFFSETS) - 1))
+
+
+def bin_from_range(start: int, end: int) -> int:
+    """Bin of the closed interval `start`-`end`, as the tables store features."""
+    start_bin = start >> BIN_FIRST_SHIFT
+    end_bin = end >> BIN_FIRST_SHIFT
+    for offset in BIN_OFFSETS:
+        if start_bin == end_bin:
+            return offset + start_bin
+        start_bin >>= BIN_NEXT_SHIFT
+        end_bin >>= BIN_NEXT_SHIFT
+    raise ValueError(f"interval {start}-{end} is beyond the binning scheme")
+
+
+def overlapping_bin_ranges(start: int, end: int) -> List[Tuple[int, int]]:
+    """Inclusive (first, last) bin ranges that can hold features overlapping `start`-`end`."""
+    start_bin = start >> BIN_FIRST_SHIFT
+    end_bin = min(end, BIN_MAX_END - 1) >> BIN_FIRST_SHIFT
+    ranges = []
+    for offset in BIN_OFFSETS:
+        ranges.append((offset + start_bin, offset + end_bin))
+        start_bin >>= BIN_NEXT_SHIFT
+        end_bin >>= BIN_NEXT_SHIFT
+    return ranges
+
+
+def overlap_clause(model, chromosome: str, start: int, end: int):
+    """WHERE clause for the rows of `model` overlapping `chromosome:start-end`.
+
+    `model` needs chromosome, start, end and bin columns. The bin ranges let
+    the (chromosome, bin) index find the candidates; the coordinate test
+    then drops the ones that only share a bin with the region.
+    """
+    bins = []
+    for first, last in overlapping_bin_ranges(start, end):
+        if first == last:
+            bins.append(model.bin == first)
+        else:
+            bins.append(model.bin.between(first, last))
+    return sqlalchemy.and_(
+        model.chromosome == chromosome,
+        sqlalchemy.or_(*bins),
+        model.start <= end,
+        model.end >= start,
+    )
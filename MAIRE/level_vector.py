@@ -0,0 +1,87 @@
+import array
+import sys
+from typing import Dict, List, Optional
+
+## fixed tissue order of the per-site level vectors (RNAediting.levels); new
+## tissues may only be appended, or stored vectors would change meaning
+TISSUE_ORDER = [
+    "caudate nucleus",
+    "inferior frontal gyrus",
+    "middle frontal gyrus",
+    "posterior parahippocampal gyrus",
+    "straight gyrus",
+    "occipital gyrus",
+    "anterior cingulate gyrus",
+    "cerebellum",
+    "claustrum",
+    "dentate gyrus",
+    "globus pallidus",
+    "inferior occipital gyrus",
+    "inferior temporal gyrus",
+    "insular cortex",
+    "lateral occipitotemporal gyrus",
+    "middle temporal gyrus",
+    "pons",
+    "postcentral gyrus",
+    "posterior cingulate gyrus",
+    "precentral gyrus",
+    "septum",
+    "superior frontal gyrus",
+    "superior temporal gyrus",
+    "supramarginal gyrus",
+    "angular gyrus",
+    "preoptic area",
+    "thalamus",
+    "annectant gyrus",
+    "cuneus",
+    "putamen",
+    "superior parietal lobule",
+    "amygdala",
+    "anterior hypothalamus",
+    "entorhinal cortex",
+    "geniculate nucleus",
+    "orbital gyrus",
+    "posterior hippocampus",
+    "posterior hypothalamus",
+    "spinal cord dorsal",
+    "subiculum",
+    "substantia nigra",
+    "superior colliculus",
+    "spinal cord ventral",
+    "anterior hippocampus",
+    "medulla",
+    "midbrain",
+]
+LEVEL_SCALE = 1000
+## stored for tissues without a measured level
+MISSING_LEVEL = 0xFFFF
+
+
+def encode_levels(levels: Dict[int, float]) -> bytes:
+    """Pack {tissue index: level} into little-endian uint16 levels scaled by 1000."""
+    vector = array.array("H", [MISSING_LEVEL]) * len(TISSUE_ORDER)
+    for index, level in levels.items():
+        vector[index] = round(level * LEVEL_SCALE)
+    if sys.byteorder == "big":
+        vector.byteswap()
+    return vector.tobytes()
+
+
+def decode_levels(blob: bytes) -> List[Optional[float]]:
+    """Levels in TISSUE_ORDER, None where a tissue has no level."""
+    vector = array.array("H")
+    vector.frombytes(blob)
+    if sys.byteorder == "big":
+        vector.byteswap()
+    return [
+        None if value == MISSING_LEVEL else value / LEVEL_SCALE for value in vector
+    ]
+
+
+def level_vector_schema(blob: bytes, samples: List[str]) -> List[dict]:
+    """Plot rows of `samples` from a level vector, 0 for missing levels."""
+    levels = dict(zip(TISSUE_ORDER, decode_levels(blob)))
+    return [
+        {"tissue": sample, "level": round(levels.get(sample) or 0, 3)}
+        for sample in samples
+    ]
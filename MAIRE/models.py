@@ -9,9 +9,14 @@ class Species(rx.Model, table=True):
 
 
 class Gene(rx.Model, table=True):
+    ## (chromosome, bin) finds overlapping features, see genomic_bins.py
+    __table_args__ = (
+        sqlmodel.Index("ix_gene_chromosome_bin", "chromosome", "bin"),
+    )
     chromosome: str
     start: int
     end: int
+    bin: int | None = None
     strand: str
     symbol: str = sqlmodel.Field(index=True)
     ensembly_id: str
@@ -24,10 +29,14 @@ class Gene(rx.Model, table=True):
 
 
 class Transcript(rx.Model, table=True):
+    __table_args__ = (
+        sqlmodel.Index("ix_transcript_chromosome_bin", "chromosome", "bin"),
+    )
     transcript_id: str
     chromosome: str
     start: int
     end: int
+    bin: int | None = None
     transcript_type: str
     gene: Optional["Gene"] = sqlmodel.Relationship(back_populates="transcripts")
     cdses: List["Cds"] = sqlmodel.Relationship(back_populates="transcript")
@@ -35,23 +44,35 @@ class Transcript(rx.Model, table=True):
     aminochanges: Optional[List["Aminochange"]] = sqlmodel.Relationship(
         back_populates="transcript"
     )
-    gene_id: int | None = sqlmodel.Field(foreign_key="gene.id")
+    gene_id: int | None = sqlmodel.Field(foreign_key="gene.id", index=True)
 
 
 class Cds(rx.Model, table=True):
+    __table_args__ = (
+        sqlmodel.Index("ix_cds_chromosome_bin", "chromosome", "bin"),
+    )
     chromosome: str
     start: int
     end: int
+    bin: int | None = None
     transcript: Optional["Transcript"] = sqlmodel.Relationship(back_populates="cdses")
-    transcript_id: int | None = sqlmodel.Field(foreign_key="transcript.id")
+    transcript_id: int | None = sqlmodel.Field(
+        foreign_key="transcript.id", index=True
+    )
 
 
 class Utr(rx.Model, table=True):
+    __table_args__ = (
+        sqlmodel.Index("ix_utr_chromosome_bin", "chromosome", "bin"),
+    )
     chromosome: str
     start: int
     end: int
+    bin: int | None = None
     transcript: Optional["Transcript"] = sqlmodel.Relationship(back_populates="utres")
-    transcript_id: int | None = sqlmodel.Field(foreign_key="transcript.id")
+    transcript_id: int | None = sqlmodel.Field(
+        foreign_key="transcript.id", index=True
+    )
 
 
 class Aminochange(rx.Model, table=True):
@@ -60,21 +81,34 @@ class Aminochange(rx.Model, table=True):
     transcript: Optional["Transcript"] = sqlmodel.Relationship(
         back_populates="aminochanges"
     )
-    rnaediting_id: int | None = sqlmodel.Field(foreign_key="rnaediting.id")
+    rnaediting_id: int | None = sqlmodel.Field(
+        foreign_key="rnaediting.id", index=True
+    )
     rnaediting: Optional["RNAediting"] = sqlmodel.Relationship(
         back_populates="aminochanges"
     )
 
 
 class RNAediting(rx.Model, table=True):
-    chromosome: str = sqlmodel.Field(index=True)
+    __table_args__ = (
+        ## the loaders map (chromosome, position) to site ids from the index alone;
+        ## page queries read sitesummary, so nothing else is included
+        sqlmodel.Index(
+            "uq_rnaediting_chromosome_position",
+            "chromosome",
+            "position",
+            unique=True,
+            postgresql_include=["id"],
+        ),
+    )
+    chromosome: str
     position: int
     ref: str
     alt: str
     location: str
     repeat_id: int | None = sqlmodel.Field(foreign_key="repeat.id")
     repeat: Optional["Repeat"] = sqlmodel.Relationship(back_populates="rnaediting")
-    gene_id: int | None = sqlmodel.Field(foreign_key="gene.id")
+    gene_id: int | None = sqlmodel.Field(foreign_key="gene.id", index=True)
     gene: Optional["Gene"] = sqlmodel.Relationship(back_populates="rnaediting")
     region: str
     exfun: str
@@ -83,6 +117,8 @@ class RNAediting(rx.Model, table=True):
     )
     samplenumbers: int
     tissuenumbers: int
+    ## editing levels in level_vector.TISSUE_ORDER, see level_vector.py
+    levels: bytes | None = None
     tissues: Optional[List["RNAeditingtissuelink"]] = sqlmodel.Relationship(
         back_populates="rnaediting"
     )
@@ -97,7 +133,9 @@ class Repeat(rx.Model, table=True):
 
 
 class RNAeditingtissuelink(rx.Model, table=True):
-    rnaediting_id: int | None = sqlmodel.Field(foreign_key="rnaediting.id")
+    rnaediting_id: int | None = sqlmodel.Field(
+        foreign_key="rnaediting.id", index=True
+    )
     rnaediting: Optional["RNAediting"] = sqlmodel.Relationship(back_populates="tissues")
     tissue_id: int | None = sqlmodel.Field(foreign_key="tissue.id")
     tissue: Optional["Tissue"] = sqlmodel.Relationship(back_populates="rnaediting")
@@ -121,6 +159,11 @@ class Organ(rx.Model, table=True):
 
 
 class EditingLevel(rx.Model, table=True):
+    __table_args__ = (
+        sqlmodel.Index(
+            "uq_editinglevel_rnaediting_tissue", "rnaediting_id", "tissue_id", unique=True
+        ),
+    )
     rnaediting_id: int | None = sqlmodel.Field(foreign_key="rnaediting.id")
     tissue_id: int | None = sqlmodel.Field(foreign_key="tissue.id")
     rnaediting: Optional["RNAediting"] = sqlmodel.Relationship(
@@ -128,3 +171,63 @@ class EditingLevel(rx.Model, table=True):
     )
     tissue: Optional["Tissue"] = sqlmodel.Relationship(back_populates="editinglevel")
     level: float
+
+
+## the columns of a search grid row besides (chromosome, position); on Postgres
+## the region index carries them, so a region page is an index-only scan
+SITE_SUMMARY_PAYLOAD = [
+    "id",
+    "ref",
+    "alt",
+    "location",
+    "repeatclass",
+    "symbol",
+    "region",
+    "exfun",
+    "samplenumbers",
+    "tissuenumbers",
+]
+
+
+class SiteSummary(rx.Model, table=True):
+    ## read-only copy of rnaediting joined with its repeat class and gene
+    ## symbol, rebuilt by the loaders; one row per site under the site's id
+    __table_args__ = (
+        sqlmodel.Index(
+            "uq_sitesummary_chromosome_position",
+            "chromosome",
+            "position",
+            unique=True,
+            postgresql_include=SITE_SUMMARY_PAYLOAD,
+        ),
+        ## gene searches page through a symbol in (chromosome, position, id) order
+        sqlmodel.Index(
+            "ix_sitesummary_symbol_chromosome_position",
+            "symbol",
+            "chromosome",
+            "position",
+            "id",
+        ),
+    )
+    chromosome: str
+    position: int
+    ref: str
+    alt: str
+    location: str
+    repeatclass: str | None = None
+    symbol: str | None = None
+    region: str
+    exfun: str
+    samplenumbers: int
+    tissuenumbers: int
+
+
+class Statistic(rx.Model, table=True):
+    ## site counts per tissue, chromosome, repeat class and region, rebuilt at
+    ## the end of every load for the index page
+    __table_args__ = (
+        sqlmodel.Index("uq_statistic_kind_name", "kind", "name", unique=True),
+    )
+    kind: str
+    name: str
+    count: int
@@ -7,6 +7,7 @@ from ..styles import info, tooltip
 # from sqlalchemy import func
 from typing import List, Dict
 from ..components.top_banner import top_banner_basic
+from ..statistics import site_counts, tissue_counts
 
 
 def site_numbers_schema(result: tuple) -> List[dict]:
@@ -16,58 +17,20 @@ def site_numbers_schema(result: tuple) -> List[dict]:
     return fin_data
 
 
-list_site_numbers = [
-    {"tissue": "caudate nucleus", "count": 721799},
-    {"tissue": "inferior frontal gyrus", "count": 681026},
-    {"tissue": "middle frontal gyrus", "count": 742615},
-    {"tissue": "posterior parahippocampal gyrus", "count": 818539},
-    {"tissue": "straight gyrus", "count": 790760},
-    {"tissue": "occipital gyrus", "count": 751928},
-    {"tissue": "anterior cingulate gyrus", "count": 627408},
-    {"tissue": "cerebellum", "count": 940534},
-    {"tissue": "claustrum", "count": 678233},
-    {"tissue": "dentate gyrus", "count": 496510},
-    {"tissue": "globus pallidus", "count": 664163},
-    {"tissue": "inferior occipital gyrus", "count": 713956},
-    {"tissue": "inferior temporal gyrus", "count": 677926},
-    {"tissue": "insular cortex", "count": 748838},
-    {"tissue": "lateral occipitotemporal gyrus", "count": 874697},
-    {"tissue": "middle temporal gyrus", "count": 818346},
-    {"tissue": "pons", "count": 575130},
-    {"tissue": "postcentral gyrus", "count": 751016},
-    {"tissue": "posterior cingulate gyrus", "count": 634583},
-    {"tissue": "precentral gyrus", "count": 995939},
-    {"tissue": "septum", "count": 930400},
-    {"tissue": "superior frontal gyrus", "count": 691665},
-    {"tissue": "superior temporal gyrus", "count": 822372},
-    {"tissue": "supramarginal gyrus", "count": 735064},
-    {"tissue": "angular gyrus", "count": 460603},
-    {"tissue": "preoptic area", "count": 324474},
-    {"tissue": "thalamus", "count": 636520},
-    {"tissue": "annectant gyrus", "count": 555067},
-    {"tissue": "cuneus", "count": 631313},
-    {"tissue": "putamen", "count": 668606},
-    {"tissue": "superior parietal lobule", "count": 875521},
-    {"tissue": "amygdala", "count": 920616},
-    {"tissue": "anterior hypothalamus", "count": 435470},
-    {"tissue": "entorhinal cortex", "count": 673943},
-    {"tissue": "geniculate nucleus", "count": 788372},
-    {"tissue": "orbital gyrus", "count": 763955},
-    {"tissue": "posterior hippocampus", "count": 549647},
-    {"tissue": "posterior hypothalamus", "count": 706760},
-    {"tissue": "spinal cord dorsal", "count": 785565},
-    {"tissue": "subiculum", "count": 820726},
-    {"tissue": "substantia nigra", "count": 566318},
-    {"tissue": "superior colliculus", "count": 321982},
-    {"tissue": "spinal cord ventral", "count": 339521},
-    {"tissue": "anterior hippocampus", "count": 348499},
-    {"tissue": "medulla", "count": 391710},
-    {"tissue": "midbrain", "count": 349261},
-]
+class IndexState(rx.State):
+    ## counted at the end of every data load, empty until the first one
+    numbers: List[dict] = []
+    chromosome_numbers: List[dict] = []
+    repeat_numbers: List[dict] = []
+    region_numbers: List[dict] = []
 
+    @rx.event
+    async def load_numbers(self):
+        self.numbers = await tissue_counts() or []
+        self.chromosome_numbers = await site_counts("chromosome")
+        self.repeat_numbers = await site_counts("repeatclass")
+        self.region_numbers = await site_counts("region")
 
-class IndexState(rx.State):
-    numbers: List[dict] = list_site_numbers
     # @rx.var
     # async def get_numbers_in_tissues(self) -> List[Dict[str, int]]:
     #    inspector = inspect(rx.model.get_engine())
@@ -170,7 +133,60 @@ def create_featured_section(features: List[Dict[str, str]]) -> rx.Component:
     )
 
 
-@rx.page(route="/", title="MAIRE")
+def create_statistic_chart(
+    title: str, description: str, numbers: List[dict], key: str
+) -> rx.Component:
+    return rx.flex(
+        rx.center(
+            rx.divider(width="100%", class_name="justify-self-center mb-4"),
+        ),
+        rx.center(
+            rx.hstack(
+                info(title, "3", description, "start"),
+                align="center",
+                width="100%",
+                wrap="wrap",
+            ),
+        ),
+        rx.center(
+            rx.recharts.bar_chart(
+                rx.recharts.graphing_tooltip(**tooltip),
+                rx.recharts.cartesian_grid(
+                    horizontal=True, vertical=False, class_name="opacity-25"
+                ),
+                rx.recharts.bar(
+                    data_key="count",
+                    fill=rx.color("accent"),
+                    radius=[2, 2, 0, 0],
+                ),
+                rx.recharts.y_axis(
+                    type_="number",
+                    hide=False,
+                    width=80,
+                ),
+                rx.recharts.x_axis(
+                    data_key=key,
+                    type_="category",
+                    axis_line=False,
+                    tick_line=True,
+                    custom_attrs={"fontSize": "12px", "dx": -5},
+                    text_anchor="end",
+                    angle=-90,
+                    height=200,
+                    interval=0,
+                ),
+                data=numbers,
+                width="100%",
+                height=380,
+            ),
+            class_name="pt-2",
+        ),
+        class_name="w-[100%] [&_.recharts-tooltip-item-separator]:w-full mt-5",
+        direction="column",
+    )
+
+
+@rx.page(route="/", title="MAIRE", on_load=IndexState.load_numbers)
 @template
 def index() -> rx.Component:
     return rx.container(
@@ -233,58 +249,38 @@ def index() -> rx.Component:
                 direction="column",
                 spacing="1",
             ),
-            rx.flex(
-                rx.center(
-                    rx.divider(width="100%", class_name="justify-self-center mb-4"),
-                ),
-                rx.center(
-                    rx.hstack(
-                        info(
-                            "RNA editing sites load in All tissues",
-                            "3",
-                            "Statistic of all RNA editing sites in each tissues",
-                            "start",
-                        ),
-                        align="center",
-                        width="100%",
-                        wrap="wrap",
+            rx.cond(
+                IndexState.numbers,
+                rx.fragment(
+                    create_statistic_chart(
+                        "RNA editing sites load in All tissues",
+                        "Statistic of all RNA editing sites in each tissues",
+                        IndexState.numbers,
+                        "tissue",
                     ),
-                ),
-                rx.center(
-                    rx.recharts.bar_chart(
-                        rx.recharts.graphing_tooltip(**tooltip),
-                        rx.recharts.cartesian_grid(
-                            horizontal=True, vertical=False, class_name="opacity-25"
-                        ),
-                        rx.recharts.bar(
-                            data_key="count",
-                            fill=rx.color("accent"),
-                            radius=[2, 2, 0, 0],
-                        ),
-                        rx.recharts.y_axis(
-                            type_="number",
-                            hide=False,
-                            width=80,
-                        ),
-                        rx.recharts.x_axis(
-                            data_key="tissue",
-                            type_="category",
-                            axis_line=False,
-                            tick_line=True,
-                            custom_attrs={"fontSize": "12px", "dx": -5},
-                            text_anchor="end",
-                            angle=-90,
-                            height=200,
-                            interval=0,
-                        ),
-                        data=IndexState.numbers,
-                        width="100%",
-                        height=380,
+                    create_statistic_chart(
+                        "RNA editing sites per chromosome",
+                        "Statistic of all RNA editing sites on each chromosome",
+                        IndexState.chromosome_numbers,
+                        "name",
+                    ),
+                    create_statistic_chart(
+                        "RNA editing sites per repeat class",
+                        "Statistic of all RNA editing sites in each repeat class, - for none",
+                        IndexState.repeat_numbers,
+                        "name",
+                    ),
+                    create_statistic_chart(
+                        "RNA editing sites per gene region",
+                        "Statistic of all RNA editing sites in each gene region",
+                        IndexState.region_numbers,
+                        "name",
                     ),
-                    class_name="pt-2",
                 ),
-                class_name="w-[100%] [&_.recharts-tooltip-item-separator]:w-full mt-5",
-                direction="column",
+                rx.text(
+                    "The site statistics are shown here once the data is loaded.",
+                    color_scheme="gray",
+                ),
             ),
             rx.divider(),
             create_featured_section(data),
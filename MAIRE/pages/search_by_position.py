@@ -1,14 +1,29 @@
 import reflex as rx
+import asyncio
+import shutil
+import uuid
 from ..template import template
-from ..models import RNAediting, Aminochange, Gene, EditingLevel
+from ..models import Aminochange, SiteSummary
+from .. import queries
+from ..database import read_asession
+from .. import cache
+from ..site_store import store_for
+from ..bed_search import (
+    RESULT_PREFIX,
+    BedResults,
+    batches,
+    expire_results,
+    is_result_name,
+    read_bed,
+)
 from typing import List, Dict
 from ..styles import info, tooltip
-import sqlalchemy
+from ..level_vector import TISSUE_ORDER, level_vector_schema
 
 
 ##################################################################################################
 ################data structure for database parse:
-def data_schema(record: RNAediting) -> dict:
+def data_schema(record: SiteSummary) -> dict:
     return {
         "id": record.id,
         "Chr": record.chromosome,
@@ -17,8 +32,8 @@ def data_schema(record: RNAediting) -> dict:
         "Ed": record.alt,
         # "Strand": record.gene.strand, ## conghui said we shouldn't show strand
         "Location": record.location,
-        "Repeats": "-/-" if record.repeat is None else record.repeat.repeatclass,
-        "Gene": "-/-" if record.gene.symbol == " " else record.gene.symbol,
+        "Repeats": "-/-" if record.repeatclass is None else record.repeatclass,
+        "Gene": "-/-" if record.symbol in (None, " ") else record.symbol,
         "Region": record.region,
         "Samples": record.samplenumbers,
         "Tissues": record.tissuenumbers,
@@ -34,17 +49,6 @@ def amino_change_schema(record: Aminochange) -> dict:
     }
 
 
-def editing_level_schema(records: EditingLevel, samples: List[str]) -> List[dict]:
-    final_data = []
-    for sample in samples:
-        newdata = 0
-        for record in records:
-            if record.tissue.name == sample:
-                newdata = record.level
-        final_data.append({"tissue": sample, "level": round(newdata, 3)})
-    return final_data
-
-
 def create_table_header(title: Dict[str, str]):
     return rx.tooltip(
         rx.table.column_header_cell(title["title"], justify="center"),
@@ -70,54 +74,94 @@ def render_exfun_table_row(row_data: Dict[str, str]):
     )
 
 
-total_tissues = [
-    "caudate nucleus",
-    "inferior frontal gyrus",
-    "middle frontal gyrus",
-    "posterior parahippocampal gyrus",
-    "straight gyrus",
-    "occipital gyrus",
-    "anterior cingulate gyrus",
-    "cerebellum",
-    "claustrum",
-    "dentate gyrus",
-    "globus pallidus",
-    "inferior occipital gyrus",
-    "inferior temporal gyrus",
-    "insular cortex",
-    "lateral occipitotemporal gyrus",
-    "middle temporal gyrus",
-    "pons",
-    "postcentral gyrus",
-    "posterior cingulate gyrus",
-    "precentral gyrus",
-    "septum",
-    "superior frontal gyrus",
-    "superior temporal gyrus",
-    "supramarginal gyrus",
-    "angular gyrus",
-    "preoptic area",
-    "thalamus",
-    "annectant gyrus",
-    "cuneus",
-    "putamen",
-    "superior parietal lobule",
-    "amygdala",
-    "anterior hypothalamus",
-    "entorhinal cortex",
-    "geniculate nucleus",
-    "orbital gyrus",
-    "posterior hippocampus",
-    "posterior hypothalamus",
-    "spinal cord dorsal",
-    "subiculum",
-    "substantia nigra",
-    "superior colliculus",
-    "spinal cord ventral",
-    "anterior hippocampus",
-    "medulla",
-    "midbrain",
-]
+async def search_page(genome: str, search: list, limit: int, after=None, before=None):
+    """One page of `search` as data_schema rows: site store, cache or database."""
+    store = await store_for(search)
+    if store is not None:
+        records = store.page(search, limit, after=after, before=before)
+        return [data_schema(record) for record in records]
+    filters = {"limit": limit, "after": after, "before": before}
+    packed = await cache.get("page", genome, search, filters)
+    if packed is not None:
+        return cache.unpack_rows(packed)
+    async with read_asession() as asession:
+        results = await asession.execute(
+            queries.site_page(search, limit, after=after, before=before)
+        )
+        records = results.scalars().all()
+    if before is not None:
+        records = records[::-1]
+    rows = [data_schema(record) for record in records]
+    await cache.put("page", genome, search, filters, cache.pack_rows(rows))
+    return rows
+
+
+async def bed_batch_sites(blocks: list):
+    """Sites inside the merged `blocks` of a BED batch, in chunks of up to BED_CHUNK.
+
+    They come from the site store, or from one join streamed off a
+    server-side cursor, in (chromosome, position) order either way.
+    """
+    store = await store_for(["region", *blocks[0]])
+    if store is None:
+        async with read_asession() as asession:
+            stream = await asession.stream_scalars(
+                queries.interval_sites(blocks).execution_options(yield_per=BED_CHUNK)
+            )
+            try:
+                async for partition in stream.partitions():
+                    yield partition
+            finally:
+                await stream.close()
+        return
+    chunk = []
+    for block in blocks:
+        search = ["region", *block]
+        after = None
+        while sites := store.page(search, BED_CHUNK - len(chunk), after=after):
+            chunk.extend(sites)
+            after = [sites[-1].chromosome, sites[-1].position, sites[-1].id]
+            if len(chunk) == BED_CHUNK:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def bed_site_fields(site: SiteSummary) -> List[str]:
+    row = data_schema(site)
+    return [str(row[column]) for column in BED_SITE_COLUMNS]
+
+
+def save_upload(file: rx.UploadFile, path):
+    with open(path, "wb") as f:
+        shutil.copyfileobj(file.file, f)
+
+
+## columns of the BED result files: the interval, then the data_schema
+## fields of every site in it
+BED_COLUMNS = ("chrom", "start", "end", "name")
+BED_SITE_COLUMNS = (
+    "Chr",
+    "Position",
+    "Ref",
+    "Ed",
+    "Location",
+    "Repeats",
+    "Gene",
+    "Region",
+    "Samples",
+    "Tissues",
+    "ExFun",
+)
+## intervals with the most sites shown on the page, the rest is in the download
+BED_PREVIEW = 20
+## sites fetched and written at a time, what a BED search holds in memory
+BED_CHUNK = 5000
+## rows counted between two updates of the page total
+COUNT_STEP = 100000
+
+
 table_colums = [
     {"title": "Editing Level", "tip": "Click to show editing level plots in bottom"},
     {"title": "Chr", "tip": "Chromosome"},
@@ -141,26 +185,50 @@ class SearchByPositionState(rx.State):
     genome_version: str
     region: str = ""
     gene_symbol: str
-    main_data: List[Dict[str, str]] = []
+    ## only the visible page is kept, pages are fetched with a keyset cursor
     paginated_data: List[Dict[str, str]] = []
     column_names: List[Dict[str, str]] = []
     limits: List[str] = ["10", "15", "20", "30", "50"]
     current_limit: int = 10
-    offset: int = 0
     current_page: int = 1
     number_of_rows: int = 0
     total_pages: int = 0
     exfun_data: List[Dict[str, str]] = []
     editing_level: List[Dict[str, int]] = []
     table_find: bool = False
-    _all_tissues: List[str] = total_tissues
+    _all_tissues: List[str] = TISSUE_ORDER
     current_rnaedit_id: int = 0
     current_plotting_id: int = 0
     main_search_running: bool = False
+    ## the rows behind the first page are still being counted
+    counting: bool = False
+    ## genes overlapping the searched region
+    region_genes: List[Dict[str, str]] = []
+    ## BED upload mode: totals and the intervals with the most sites. The
+    ## upload and result names stay on the backend, a client only gets the
+    ## result file names computed from them
+    bed_running: bool = False
+    bed_summary: Dict[str, int] = {}
+    bed_preview: List[Dict[str, str]] = []
+    _bed_upload: str = ""
+    _bed_results: str = ""
+    ## the running search as queries.site_page takes it, and the
+    ## (chromosome, position, id) keys of the first and last visible row
+    _search: list = []
+    _first_key: list = []
+    _last_key: list = []
+
+    @rx.var
+    def bed_counts_file(self) -> str:
+        return f"{self._bed_results}_counts.tsv" if self._bed_results else ""
+
+    @rx.var
+    def bed_sites_file(self) -> str:
+        return f"{self._bed_results}_sites.tsv" if self._bed_results else ""
 
     @rx.var
     def show_table(self) -> bool:
-        if self.main_data == []:
+        if self.paginated_data == []:
             return True
         else:
             return False
@@ -172,37 +240,58 @@ class SearchByPositionState(rx.State):
         else:
             return False
 
-    @rx.event
-    def paginate(self):
-        start = self.offset
-        end = start + self.current_limit
-        self.paginated_data = self.main_data[start:end]
-        self.current_page = (self.offset // self.current_limit) + 1
+    def _set_row_count(self, number_of_rows: int):
+        self.number_of_rows = number_of_rows
+        self.total_pages = (
+            self.number_of_rows + self.current_limit - 1
+        ) // self.current_limit
+
+    def _show_page(self, rows: List[dict], page: int):
+        self.paginated_data = rows
+        self._first_key = [rows[0]["Chr"], rows[0]["Position"], rows[0]["id"]]
+        self._last_key = [rows[-1]["Chr"], rows[-1]["Position"], rows[-1]["id"]]
+        self.current_page = page
+
+    @rx.event(background=True)
+    async def fetch_page(self, direction: str):
+        async with self:
+            search = self._search
+            genome = self.genome_version
+            limit = self.current_limit
+            after = before = None
+            if direction == "next":
+                after = self._last_key
+                page = self.current_page + 1
+            elif direction == "previous":
+                before = self._first_key
+                page = self.current_page - 1
+            else:
+                page = 1
+        ## nothing to page through before the first page of a search is shown
+        if not search or after == [] or before == []:
+            return
+        rows = await search_page(genome, search, limit, after=after, before=before)
+        async with self:
+            ## drop pages of a search that has been replaced meanwhile
+            if rows and self._search == search:
+                self._show_page(rows, page)
 
     @rx.event
     def delta_limit(self, limit: str):
         self.current_limit = int(limit)
-        self.offset = 0
-        self.total_pages = (
-            self.number_of_rows + self.current_limit - 1
-        ) // self.current_limit
-        self.paginate()
+        self._set_row_count(self.number_of_rows)
+        return SearchByPositionState.fetch_page("first")
 
     @rx.event
     def previous(self):
-        if self.offset >= self.current_limit:
-            self.offset -= self.current_limit
-        else:
-            self.offset = 0
-
-        self.paginate()
+        if self.current_page > 1:
+            return SearchByPositionState.fetch_page("previous")
 
     @rx.event
     def next(self):
-        if self.offset + self.current_limit < self.number_of_rows:
-            self.offset += self.current_limit
-
-        self.paginate()
+        ## while counting the last known page may not be the last one
+        if self.current_page < self.total_pages or self.counting:
+            return SearchByPositionState.fetch_page("next")
 
     @rx.event
     def clear_data(self):
@@ -255,82 +344,194 @@ class SearchByPositionState(rx.State):
     async def get_data_from_database(self):
         async with self:
             self.table_find = True
-        async with rx.asession() as asession:
-            async with self:
-                if not self.main_search_running:
-                    self.table_find = False
-                    self.main_data = []
-                    self.paginated_data = []
-                    self.column_names = []
-                    self.editing_level = []
-                    return
+            if not self.main_search_running:
+                self.table_find = False
+                self._clear_results()
+                return
+            if self.region != "":
+                ## use region to get records
+                chrom, pos = self.region.split(":")
+                start, end = pos.split("-")
+                search = ["region", chrom, int(start), int(end)]
+            else:
+                ## use gene symbol to get records
+                search = ["gene", self.gene_symbol.strip()]
+            genome = self.genome_version
+            limit = self.current_limit
+            self._search = search
+            self.region_genes = []
+            self._first_key = []
+            self._last_key = []
+        ## the first page comes straight off an index, whatever the size
+        rows = await search_page(genome, search, limit)
+        async with self:
+            if self._search != search:
+                return
+            self.table_find = False
+            if not rows:
+                self._clear_results()
+                yield rx.toast("No data found!")
+                return
+            self._show_page(rows, 1)
+            self.column_names = table_colums
+            self._set_row_count(len(rows))
+            self.counting = len(rows) == limit
+        if search[0] == "region":
+            yield SearchByPositionState.fetch_region_genes()
+        if len(rows) < limit:
+            return
+        store = await store_for(search)
+        if store is not None:
+            number_of_rows = store.count(search)
+        else:
+            number_of_rows = await cache.get("count", genome, search, {})
+        if number_of_rows is not None:
             async with self:
-                if self.region != "":
-                    ## use region to get records
-                    chrom, pos = self.region.split(":")
-                    start, end = pos.split("-")
-                    start = int(start)
-                    end = int(end)
-                    results = await asession.execute(
-                        RNAediting.select()
-                        .where(
-                            RNAediting.chromosome == chrom,
-                            RNAediting.position >= start,
-                            RNAediting.position <= end,
-                        )
-                        .options(
-                            sqlalchemy.orm.selectinload(RNAediting.gene),
-                            sqlalchemy.orm.selectinload(RNAediting.repeat),
-                        )
+                if self._search == search:
+                    self._set_row_count(number_of_rows)
+                    self.counting = False
+            return
+        ## the page is up already; the count runs in the database off the
+        ## index, COUNT_STEP rows at a time so the total grows as it goes
+        number_of_rows = 0
+        after = None
+        async with read_asession() as asession:
+            while True:
+                key = (
+                    await asession.execute(
+                        queries.site_key(search, COUNT_STEP - 1, after=after)
                     )
-                    records = results.scalars().all()
-                    if records is not None:
-                        self.main_data = [data_schema(record) for record in records]
-                        self.paginated_data = self.main_data[:10]
-                        self.column_names = table_colums
-                        self.number_of_rows = len(self.main_data)
-                        self.total_pages = (
-                            self.number_of_rows + self.current_limit - 1
-                        ) // self.current_limit
-                        self.table_find = False
-                    else:
-                        self.table_find = False
-                        self.main_data = []
-                        self.paginated_data = []
-                        self.column_names = []
-                        self.editing_level = []
-                        yield rx.toast("No data found!")
-                else:
-                    ## use gene symbol to get records
-                    results = await asession.execute(
-                        Gene.select()
-                        .where(Gene.symbol == self.gene_symbol)
-                        .options(
-                            sqlalchemy.orm.selectinload(Gene.rnaediting).options(
-                                sqlalchemy.orm.selectinload(RNAediting.gene),
-                                sqlalchemy.orm.selectinload(RNAediting.repeat),
-                            )
-                        )
-                    )
-                    records = results.scalar_one_or_none()
-                    if records is not None:
-                        self.main_data = [
-                            data_schema(record) for record in records.rnaediting
-                        ]
-                        self.paginated_data = self.main_data[:10]
-                        self.column_names = table_colums
-                        self.number_of_rows = len(self.main_data)
-                        self.total_pages = (
-                            self.number_of_rows + self.current_limit - 1
-                        ) // self.current_limit
-                        self.table_find = False
-                    else:
-                        self.table_find = False
-                        self.main_data = []
-                        self.paginated_data = []
-                        self.column_names = []
-                        self.editing_level = []
-                        yield rx.toast("No data found!")
+                ).first()
+                if key is None:
+                    number_of_rows += (
+                        await asession.execute(queries.site_count(search, after=after))
+                    ).scalar_one()
+                    break
+                number_of_rows += COUNT_STEP
+                after = list(key)
+                async with self:
+                    if self._search != search:
+                        return
+                    self._set_row_count(number_of_rows)
+        await cache.put("count", genome, search, {}, number_of_rows)
+        async with self:
+            if self._search == search:
+                self._set_row_count(number_of_rows)
+                self.counting = False
+
+    @rx.event(background=True)
+    async def fetch_region_genes(self):
+        async with self:
+            search = self._search
+        if not search or search[0] != "region":
+            return
+        async with read_asession() as asession:
+            genes = (
+                await asession.execute(queries.region_genes(*search[1:]))
+            ).scalars().all()
+        async with self:
+            if self._search == search:
+                self.region_genes = [
+                    {
+                        "name": gene.symbol.strip() or gene.ensembly_id,
+                        "location": f"{gene.chromosome}:{gene.start}-{gene.end} ({gene.strand})",
+                    }
+                    for gene in genes
+                ]
+
+    def _clear_results(self):
+        self.paginated_data = []
+        self.region_genes = []
+        self.column_names = []
+        self.editing_level = []
+        self.number_of_rows = 0
+        self.total_pages = 0
+        self.counting = False
+        self._first_key = []
+        self._last_key = []
+
+    @rx.event
+    async def handle_bed_upload(self, files: List[rx.UploadFile]):
+        if not files:
+            yield rx.toast.error("Select a BED file first!")
+            return
+        if self.bed_running:
+            yield rx.toast.error("A BED search is already running!")
+            return
+        upload_dir = rx.get_upload_dir()
+        upload_dir.mkdir(parents=True, exist_ok=True)
+        name = f"{RESULT_PREFIX}{uuid.uuid4().hex}"
+        await asyncio.to_thread(save_upload, files[0], upload_dir / f"{name}.bed")
+        self._bed_upload = name
+        self.bed_running = True
+        yield SearchByPositionState.bg_bed_search()
+
+    @rx.event(background=True)
+    async def bg_bed_search(self):
+        upload_dir = rx.get_upload_dir()
+        async with self:
+            name, previous = self._bed_upload, self._bed_results
+            ## only ever the upload handle_bed_upload just stored
+            if not is_result_name(name):
+                return
+            self._bed_upload = ""
+            self._bed_results = ""
+        ## this session's last results and anything older than a day
+        if is_result_name(previous):
+            for suffix in ("_counts.tsv", "_sites.tsv"):
+                path = upload_dir / f"{previous}{suffix}"
+                await asyncio.to_thread(path.unlink, missing_ok=True)
+        await asyncio.to_thread(expire_results, upload_dir)
+        bed_path = upload_dir / f"{name}.bed"
+        try:
+            intervals = await asyncio.to_thread(read_bed, bed_path)
+        except (UnicodeDecodeError, ValueError) as error:
+            async with self:
+                self.bed_running = False
+            yield rx.toast.error(f"Invalid BED file: {error}")
+            return
+        finally:
+            await asyncio.to_thread(bed_path.unlink, missing_ok=True)
+        results = await asyncio.to_thread(
+            BedResults,
+            upload_dir / f"{name}_counts.tsv",
+            upload_dir / f"{name}_sites.tsv",
+            list(BED_COLUMNS + BED_SITE_COLUMNS),
+            bed_site_fields,
+        )
+        blocks_total = 0
+        try:
+            ## one lookup per batch of merged intervals, never one per interval
+            for blocks, members in batches(intervals):
+                blocks_total += len(blocks)
+                results.start_batch(members)
+                async for sites in bed_batch_sites(blocks):
+                    await asyncio.to_thread(results.add_sites, sites)
+            await asyncio.to_thread(results.finish)
+        except BaseException:
+            await asyncio.to_thread(results.discard)
+            async with self:
+                self.bed_running = False
+            raise
+        summary = {
+            "intervals": len(intervals),
+            "blocks": blocks_total,
+            "sites": results.sites,
+            "hit": results.hit,
+        }
+        preview = [
+            {
+                "interval": f"{chromosome}:{start}-{end}",
+                "name": interval_name,
+                "sites": str(count),
+            }
+            for count, (chromosome, start, end, interval_name) in results.top(BED_PREVIEW)
+        ]
+        async with self:
+            self.bed_summary = summary
+            self.bed_preview = preview
+            self._bed_results = name
+            self.bed_running = False
 
     @rx.event
     def get_exfun_data(self, value: bool, rnaedit_id: int):
@@ -341,16 +542,10 @@ class SearchByPositionState(rx.State):
     async def bg_exfun_data(self):
         async with self:
             self.exfun_data = []
-        async with rx.asession() as asession:
+        async with read_asession() as asession:
             async with self:
                 results = await asession.execute(
-                    RNAediting.select()
-                    .where(RNAediting.id == self.current_rnaedit_id)
-                    .options(
-                        sqlalchemy.orm.selectinload(RNAediting.aminochanges).options(
-                            sqlalchemy.orm.selectinload(Aminochange.transcript)
-                        )
-                    )
+                    queries.site_aminochanges(self.current_rnaedit_id)
                 )
                 records = results.scalar_one_or_none()
                 if records is not None:
@@ -367,24 +562,18 @@ class SearchByPositionState(rx.State):
 
     @rx.event(background=True)
     async def bg_editing_level_plot(self):
-        async with rx.asession() as asession:
+        async with read_asession() as asession:
             async with self:
-                results = await asession.execute(
-                    RNAediting.select()
-                    .where(RNAediting.id == self.current_plotting_id)
-                    .options(
-                        sqlalchemy.orm.selectinload(RNAediting.editinglevel).options(
-                            sqlalchemy.orm.selectinload(EditingLevel.tissue)
-                        )
+                ## one row read: the levels of every tissue are in the vector
+                levels = (
+                    await asession.execute(
+                        queries.site_level_vector(self.current_plotting_id)
                     )
+                ).scalar_one_or_none()
+                ## a site without levels plots as 0 in every tissue
+                self.editing_level = level_vector_schema(
+                    levels or b"", self._all_tissues
                 )
-                records = results.scalar_one_or_none()
-                if records is not None:
-                    self.editing_level = editing_level_schema(
-                        records.editinglevel, self._all_tissues
-                    )
-                else:
-                    self.editing_level = []
 
     @rx.event
     def show_example(self):
@@ -593,12 +782,112 @@ def create_pagination():
             align_items="center",
             spacing="1",
         ),
+        rx.hstack(
+            rx.text(
+                f"{SearchByPositionState.number_of_rows} sites",
+                weight="bold",
+                font_size="12px",
+            ),
+            rx.cond(
+                SearchByPositionState.counting,
+                rx.hstack(
+                    rx.spinner(size="1"),
+                    rx.text("counting", color_scheme="gray", font_size="12px"),
+                    align_items="center",
+                    spacing="1",
+                ),
+            ),
+            align_items="center",
+            spacing="2",
+        ),
         align_items="center",
         spacing="4",
         flex_wrap="wrap",
     )
 
 
+def create_region_genes():
+    return rx.hstack(
+        rx.text("Genes in this region:", weight="bold", font_size="12px"),
+        rx.foreach(
+            SearchByPositionState.region_genes,
+            lambda gene: rx.tooltip(
+                rx.badge(gene["name"], variant="surface"),
+                content=gene["location"],
+            ),
+        ),
+        width="90%",
+        align="center",
+        wrap="wrap",
+    )
+
+
+def create_bed_results():
+    return rx.flex(
+        rx.divider(width="90%"),
+        rx.hstack(
+            rx.text(
+                f"{SearchByPositionState.bed_summary['sites']} sites in "
+                f"{SearchByPositionState.bed_summary['hit']} of "
+                f"{SearchByPositionState.bed_summary['intervals']} intervals "
+                f"({SearchByPositionState.bed_summary['blocks']} after merging)",
+                weight="bold",
+                font_size="12px",
+            ),
+            rx.button(
+                "Counts per interval",
+                rx.icon("download", size=14),
+                size="1",
+                variant="surface",
+                cursor="pointer",
+                on_click=rx.download(
+                    url=rx.get_upload_url(SearchByPositionState.bed_counts_file)
+                ),
+            ),
+            rx.button(
+                "Sites per interval",
+                rx.icon("download", size=14),
+                size="1",
+                variant="surface",
+                cursor="pointer",
+                on_click=rx.download(
+                    url=rx.get_upload_url(SearchByPositionState.bed_sites_file)
+                ),
+            ),
+            align_items="center",
+            spacing="4",
+            flex_wrap="wrap",
+        ),
+        rx.table.root(
+            rx.table.header(
+                rx.table.row(
+                    rx.table.column_header_cell("Interval"),
+                    rx.table.column_header_cell("Name"),
+                    rx.table.column_header_cell("Sites"),
+                ),
+            ),
+            rx.table.body(
+                rx.foreach(
+                    SearchByPositionState.bed_preview,
+                    lambda row: rx.table.row(
+                        rx.table.cell(row["interval"]),
+                        rx.table.cell(row["name"]),
+                        rx.table.cell(row["sites"]),
+                    ),
+                )
+            ),
+            width="90%",
+            variant="surface",
+            size="1",
+        ),
+        direction="column",
+        width="100%",
+        align="center",
+        spacing="3",
+        margin_top="25px",
+    )
+
+
 #################################################################################
 #################################################################################
 #################################################################################
@@ -705,6 +994,38 @@ def search_by_position():
                         spacing="5",
                         align="center",
                     ),
+                    rx.flex(
+                        rx.text("BED File:"),
+                        rx.upload(
+                            rx.text(
+                                rx.cond(
+                                    rx.selected_files("bed_upload").length() > 0,
+                                    rx.selected_files("bed_upload")[0],
+                                    "Drop a BED file of regions here or click to select",
+                                ),
+                                font_size="12px",
+                            ),
+                            id="bed_upload",
+                            max_files=1,
+                            accept={"text/plain": [".bed", ".txt", ".tsv"]},
+                            border="1px dashed var(--gray-7)",
+                            padding="8px",
+                            width="50%",
+                            cursor="pointer",
+                        ),
+                        rx.button(
+                            "Search BED",
+                            color_scheme="iris",
+                            variant="surface",
+                            cursor="pointer",
+                            on_click=SearchByPositionState.handle_bed_upload(
+                                rx.upload_files(upload_id="bed_upload")
+                            ),
+                            loading=SearchByPositionState.bed_running,
+                        ),
+                        spacing="5",
+                        align="center",
+                    ),
                     rx.hstack(
                         rx.button(
                             "Search",
@@ -739,6 +1060,11 @@ def search_by_position():
             rx.flex(),
             rx.flex(
                 rx.divider(width="90%"),
+                rx.cond(
+                    SearchByPositionState.region_genes,
+                    create_region_genes(),
+                    rx.flex(),
+                ),
                 create_pagination(),
                 rx.table.root(
                     rx.table.header(
@@ -763,6 +1089,11 @@ def search_by_position():
                 margin_top="25px",
             ),
         ),
+        rx.cond(
+            SearchByPositionState.bed_counts_file == "",
+            rx.flex(),
+            create_bed_results(),
+        ),
         rx.cond(
             SearchByPositionState.show_plots,
             rx.flex(),
@@ -1,10 +1,12 @@
 import reflex as rx
 from ..template import template
 from typing import List
-from ..models import Gene, Transcript, RNAediting, EditingLevel
+from ..models import Gene
+from .. import queries
+from ..database import read_asession
 from ..utils import create_visualization_2
+from ..level_vector import TISSUE_ORDER, decode_levels
 import plotly.graph_objects as go
-import sqlalchemy
 
 
 def generate_geneview_schema(records: Gene):
@@ -29,14 +31,14 @@ def generate_geneview_schema(records: Gene):
             transcript_list.append(transcript_dict)
     ## WE need get all editing levels
     for rna_editing in rna_editing_data:
+        if rna_editing.levels is None:
+            continue
         x_coord = rna_editing.position
-        for level in rna_editing.editinglevel:
-            level_dict = {
-                "x": x_coord,
-                "tissue_name": level.tissue.name,
-                "y": round(level.level, 3),
-            }
-            level_dot_data.append(level_dict)
+        for tissue, level in zip(TISSUE_ORDER, decode_levels(rna_editing.levels)):
+            if level is not None:
+                level_dot_data.append(
+                    {"x": x_coord, "tissue_name": tissue, "y": round(level, 3)}
+                )
     return transcript_list, level_dot_data
 
 
@@ -56,7 +58,7 @@ class ViewByGeneState(rx.State):
     async def async_get_data(self):
         async with self:
             self.spinner = True
-        async with rx.asession() as asession:
+        async with read_asession() as asession:
             async with self:
                 if not self.running:
                     self._transcript_data = []
@@ -65,21 +67,7 @@ class ViewByGeneState(rx.State):
                     self.spinner = False
                     return
 
-                mydata = await asession.execute(
-                    Gene.select()
-                    .where(Gene.symbol == self.gene_symbol)
-                    .options(
-                        sqlalchemy.orm.selectinload(Gene.transcripts).options(
-                            sqlalchemy.orm.selectinload(Transcript.cdses),
-                            sqlalchemy.orm.selectinload(Transcript.utres),
-                        ),
-                        sqlalchemy.orm.selectinload(Gene.rnaediting).options(
-                            sqlalchemy.orm.selectinload(
-                                RNAediting.editinglevel
-                            ).options(sqlalchemy.orm.selectinload(EditingLevel.tissue))
-                        ),
-                    )
-                )
+                mydata = await asession.execute(queries.gene_view(self.gene_symbol))
                 records = mydata.scalar_one_or_none()
                 if records is not None:
                     self._transcript_data, self._level_dot_data = (
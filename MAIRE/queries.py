@@ -0,0 +1,166 @@
+import sqlalchemy
+from .models import (
+    RNAediting,
+    Aminochange,
+    Gene,
+    Transcript,
+    SiteSummary,
+)
+from .genomic_bins import overlap_clause
+
+## the statements behind the pages, kept in one place so that
+## usefull_scripts/check_query_plans.py can EXPLAIN exactly what the app runs
+
+
+## keyset of the search results; (chromosome, position) is unique already,
+## id keeps the order total should that ever change
+SITE_ORDER = (SiteSummary.chromosome, SiteSummary.position, SiteSummary.id)
+
+
+def _search_clause(search: list):
+    ## a search is ["region", chromosome, start, end] or ["gene", symbol],
+    ## the form the search page keeps between page requests
+    if search[0] == "region":
+        _, chromosome, start, end = search
+        return sqlalchemy.and_(
+            SiteSummary.chromosome == chromosome,
+            SiteSummary.position >= start,
+            SiteSummary.position <= end,
+        )
+    return SiteSummary.symbol == search[1]
+
+
+def site_page(search: list, limit: int, after=None, before=None):
+    """Up to `limit` results of `search` after or before a (chromosome, position, id) key.
+
+    Without a key this is the first page. The page before `before` comes in
+    descending order, callers reverse it.
+    """
+    statement = SiteSummary.select().where(_search_clause(search))
+    key = sqlalchemy.tuple_(*SITE_ORDER)
+    if before is not None:
+        return (
+            statement.where(key < sqlalchemy.tuple_(*before))
+            .order_by(*[column.desc() for column in SITE_ORDER])
+            .limit(limit)
+        )
+    if after is not None:
+        statement = statement.where(key > sqlalchemy.tuple_(*after))
+    return statement.order_by(*SITE_ORDER).limit(limit)
+
+
+def site_count(search: list, after=None):
+    """Number of results of `search`, only those past the key `after` if given.
+
+    position is in both search indexes, so neither count reads the table.
+    """
+    statement = (
+        sqlalchemy.select(sqlalchemy.func.count())
+        .select_from(SiteSummary)
+        .where(_search_clause(search))
+    )
+    if after is not None:
+        statement = statement.where(
+            sqlalchemy.tuple_(*SITE_ORDER) > sqlalchemy.tuple_(*after)
+        )
+    return statement
+
+
+def site_key(search: list, offset: int, after=None):
+    """(chromosome, position, id) of the result `offset` rows past `after`.
+
+    The search page counts large results in steps of these keys, so the
+    total grows while the count runs; the keys come off the index alone.
+    """
+    statement = sqlalchemy.select(*SITE_ORDER).where(_search_clause(search))
+    if after is not None:
+        statement = statement.where(
+            sqlalchemy.tuple_(*SITE_ORDER) > sqlalchemy.tuple_(*after)
+        )
+    return statement.order_by(*SITE_ORDER).offset(offset).limit(1)
+
+
+## genes listed next to a region search, the region may span a whole chromosome
+REGION_GENE_LIMIT = 50
+
+
+def region_genes(chromosome: str, start: int, end: int):
+    """Genes overlapping the closed region `chromosome:start-end`, by start.
+
+    overlap_clause narrows them down through the (chromosome, bin) index.
+    """
+    return (
+        Gene.select()
+        .where(overlap_clause(Gene, chromosome, start, end))
+        .order_by(Gene.start, Gene.id)
+        .limit(REGION_GENE_LIMIT)
+    )
+
+
+## name of the intervals list interval_sites() joins; each statement takes up
+## to INTERVAL_BATCH intervals, 3 bound values apiece, well under the bound
+## parameter limits of SQLite (32766) and Postgres (65535)
+INTERVAL_CTE = "bed"
+INTERVAL_BATCH = 5000
+
+
+def interval_sites(intervals: list):
+    """Sites inside any of the closed (chromosome, start, end) `intervals`, in one join.
+
+    The intervals travel as a VALUES list, which read replicas accept where
+    they refuse temporary tables, and every one of them is a range on the
+    (chromosome, position) index. The first row is cast so Postgres types
+    the columns. Sites come in (chromosome, position) order.
+    """
+    rows = []
+    parameters = {}
+    for i, (chromosome, start, end) in enumerate(intervals):
+        if i == 0:
+            rows.append(
+                f"(CAST(:c{i} AS VARCHAR), CAST(:s{i} AS INTEGER), CAST(:e{i} AS INTEGER))"
+            )
+        else:
+            rows.append(f"(:c{i}, :s{i}, :e{i})")
+        parameters.update({f"c{i}": chromosome, f"s{i}": start, f"e{i}": end})
+    table = SiteSummary.__table__.name
+    statement = sqlalchemy.text(
+        f'WITH {INTERVAL_CTE} (chromosome, start, "end") AS (VALUES {", ".join(rows)}) '
+        f"SELECT s.* FROM {table} s JOIN {INTERVAL_CTE} ON "
+        f"s.chromosome = {INTERVAL_CTE}.chromosome AND "
+        f's.position BETWEEN {INTERVAL_CTE}.start AND {INTERVAL_CTE}."end" '
+        f"ORDER BY s.chromosome, s.position"
+    ).bindparams(**parameters)
+    return sqlalchemy.select(SiteSummary).from_statement(statement)
+
+
+def site_aminochanges(rnaediting_id: int):
+    return (
+        RNAediting.select()
+        .where(RNAediting.id == rnaediting_id)
+        .options(
+            sqlalchemy.orm.selectinload(RNAediting.aminochanges).options(
+                sqlalchemy.orm.selectinload(Aminochange.transcript)
+            )
+        )
+    )
+
+
+def site_level_vector(rnaediting_id: int):
+    return sqlalchemy.select(RNAediting.levels).where(RNAediting.id == rnaediting_id)
+
+
+def gene_view(symbol: str):
+    return (
+        Gene.select()
+        .where(Gene.symbol == symbol)
+        .options(
+            sqlalchemy.orm.selectinload(Gene.transcripts).options(
+                sqlalchemy.orm.selectinload(Transcript.cdses),
+                sqlalchemy.orm.selectinload(Transcript.utres),
+            ),
+            ## one level vector per site instead of a row per site and tissue
+            sqlalchemy.orm.selectinload(Gene.rnaediting).load_only(
+                RNAediting.position, RNAediting.levels
+            ),
+        )
+    )
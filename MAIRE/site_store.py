@@ -0,0 +1,153 @@
+import bisect
+import json
+import mmap
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from .models import SiteSummary
+from .statistics import dataset_version
+
+## directory (usually a symlink swapped by usefull_scripts/export_site_store.py)
+## with the exported sites; unset means region searches go to the database
+STORE_PATH = os.environ.get("MAIRE_SITE_STORE")
+## seconds between checks whether the export was replaced
+STORE_CHECK_INTERVAL = 30
+META_FILE = "meta.json"
+
+## column -> array typecode of the per-chromosome column files. Text columns
+## hold codes into the string tables in meta.json
+COLUMNS = {
+    "id": "q",
+    "position": "I",
+    "ref": "I",
+    "alt": "I",
+    "location": "I",
+    "repeatclass": "I",
+    "symbol": "I",
+    "region": "I",
+    "exfun": "I",
+    "samplenumbers": "I",
+    "tissuenumbers": "I",
+}
+STRING_COLUMNS = ("ref", "alt", "location", "repeatclass", "symbol", "region", "exfun")
+
+
+def column_path(path: str, chromosome: str, column: str) -> str:
+    return os.path.join(path, chromosome, f"{column}.bin")
+
+
+class SiteStore:
+    """Read-only sites of an export, one position-sorted file per chromosome and column.
+
+    Column files are mapped read-only and read through typed memoryviews, so
+    nothing is copied and every worker process shares the same pages of the
+    OS page cache. A region lookup is two binary searches over the position
+    column; only the rows of the requested page are turned into objects.
+    """
+
+    def __init__(self, path: str):
+        ## pin the export the symlink points at now, later lazily opened
+        ## columns must come from the same one as the string tables
+        self.path = os.path.realpath(path)
+        with open(os.path.join(self.path, META_FILE)) as f:
+            meta = json.load(f)
+        if meta["byteorder"] != sys.byteorder:
+            raise ValueError(
+                f"site store {path} was exported on a {meta['byteorder']} endian machine"
+            )
+        self.version = meta["version"]
+        self.rows: Dict[str, int] = meta["chromosomes"]
+        self.strings: Dict[str, list] = meta["strings"]
+        self._columns: Dict[str, Dict[str, memoryview]] = {}
+
+    def columns(self, chromosome: str) -> Optional[Dict[str, memoryview]]:
+        if chromosome not in self.rows:
+            return None
+        if chromosome not in self._columns:
+            views = {}
+            for column, typecode in COLUMNS.items():
+                with open(column_path(self.path, chromosome, column), "rb") as f:
+                    ## the mapping stays valid after the file is closed
+                    views[column] = memoryview(
+                        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    ).cast(typecode)
+            self._columns[chromosome] = views
+        return self._columns[chromosome]
+
+    def answers(self, search: list) -> bool:
+        """Whether the store can run `search`; gene searches stay in SQL."""
+        return search[0] == "region"
+
+    def _range(self, search: list) -> Tuple[Optional[Dict[str, memoryview]], int, int]:
+        _, chromosome, start, end = search
+        columns = self.columns(chromosome)
+        if columns is None:
+            return None, 0, 0
+        positions = columns["position"]
+        return (
+            columns,
+            bisect.bisect_left(positions, start),
+            bisect.bisect_right(positions, end),
+        )
+
+    def count(self, search: list) -> int:
+        _, first, last = self._range(search)
+        return last - first
+
+    def page(self, search: list, limit: int, after=None, before=None) -> List[SiteSummary]:
+        """Like queries.site_page, in ascending order for `before` as well.
+
+        (chromosome, position) is unique, so the position of a key is enough
+        to find its row.
+        """
+        columns, first, last = self._range(search)
+        if columns is None:
+            return []
+        positions = columns["position"]
+        if before is not None:
+            last = bisect.bisect_left(positions, before[1], first, last)
+            first = max(first, last - limit)
+        else:
+            if after is not None:
+                first = bisect.bisect_right(positions, after[1], first, last)
+            last = min(last, first + limit)
+        return [self._record(search[1], columns, row) for row in range(first, last)]
+
+    def _record(self, chromosome: str, columns: Dict[str, memoryview], row: int) -> SiteSummary:
+        values = {column: view[row] for column, view in columns.items()}
+        for column in STRING_COLUMNS:
+            values[column] = self.strings[column][values[column]]
+        return SiteSummary(chromosome=chromosome, **values)
+
+
+_store: Dict[str, object] = {"store": None, "stat": None, "checked": float("-inf")}
+
+
+def site_store() -> Optional[SiteStore]:
+    """The export at MAIRE_SITE_STORE, re-opened when a new export replaces it."""
+    if not STORE_PATH:
+        return None
+    if time.monotonic() - _store["checked"] >= STORE_CHECK_INTERVAL:
+        _store["checked"] = time.monotonic()
+        try:
+            stat = os.stat(os.path.join(STORE_PATH, META_FILE))
+        except FileNotFoundError:
+            _store["store"] = _store["stat"] = None
+            return None
+        stat = (stat.st_ino, stat.st_mtime_ns)
+        if stat != _store["stat"]:
+            _store["store"] = SiteStore(STORE_PATH)
+            _store["stat"] = stat
+    return _store["store"]
+
+
+async def store_for(search: list) -> Optional[SiteStore]:
+    """The site store when it can answer `search` for the dataset in the database."""
+    store = site_store()
+    if store is None or not store.answers(search):
+        return None
+    ## an export of an earlier load would show sites that are gone
+    if store.version != await dataset_version():
+        return None
+    return store
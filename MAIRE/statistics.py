@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import time
+import sqlalchemy
+from typing import Dict, List, Optional
+from .database import read_asession
+from .models import Statistic
+from .level_vector import TISSUE_ORDER
+
+## seconds a worker process serves the statistics before reading them again
+STATISTICS_TTL = 300
+## seconds the dataset version is trusted; cache keys and the site store
+## follow it, so a reload must show up within moments rather than minutes
+VERSION_TTL = 2
+
+_cache: Dict[str, object] = {"expires": 0.0, "statistics": None}
+_lock = asyncio.Lock()
+_version: Dict[str, object] = {"expires": 0.0, "version": 0}
+
+
+async def _read_statistics() -> Optional[Dict[str, Dict[str, int]]]:
+    try:
+        async with read_asession() as asession:
+            rows = (await asession.execute(sqlalchemy.select(Statistic))).scalars()
+            statistics = {}
+            for row in rows:
+                statistics.setdefault(row.kind, {})[row.name] = row.count
+            return statistics or None
+    except sqlalchemy.exc.SQLAlchemyError:
+        ## e.g. the migration has not run yet, callers show their defaults
+        logging.exception("could not read the statistics table")
+        return None
+
+
+async def statistics() -> Optional[Dict[str, Dict[str, int]]]:
+    """{kind: {name: count}} from the statistics table, cached per process.
+
+    All requests of a worker share one copy that is re-read at most every
+    STATISTICS_TTL seconds, so a reload shows up without a restart. None when
+    there are no statistics.
+    """
+    if time.monotonic() < _cache["expires"]:
+        return _cache["statistics"]
+    async with _lock:
+        if time.monotonic() >= _cache["expires"]:
+            _cache["statistics"] = await _read_statistics()
+            _cache["expires"] = time.monotonic() + STATISTICS_TTL
+    return _cache["statistics"]
+
+
+async def tissue_counts() -> Optional[List[dict]]:
+    """Sites per tissue for the index page chart, in TISSUE_ORDER."""
+    counts = ((await statistics()) or {}).get("tissue")
+    if not counts:
+        return None
+    order = {name: index for index, name in enumerate(TISSUE_ORDER)}
+    return [
+        {"tissue": tissue, "count": counts[tissue]}
+        for tissue in sorted(counts, key=lambda name: order.get(name, len(order)))
+    ]
+
+
+def _chromosome_key(name: str):
+    ## chr1 ... chr22, then chrX, chrY, chrM and anything else by name
+    name = name.removeprefix("chr")
+    if name.isdigit():
+        return (0, int(name), "")
+    if name in ("X", "Y", "M"):
+        return (1, "XYM".index(name), "")
+    return (2, 0, name)
+
+
+async def site_counts(kind: str) -> List[dict]:
+    """{"name", "count"} rows of one kind of statistics for the index page charts.
+
+    Chromosomes come in karyotype order, repeat classes and regions with the
+    most sites first. Empty when there are no statistics.
+    """
+    counts = ((await statistics()) or {}).get(kind) or {}
+    if kind == "chromosome":
+        names = sorted(counts, key=_chromosome_key)
+    else:
+        names = sorted(counts, key=lambda name: (-counts[name], name))
+    return [{"name": name, "count": counts[name]} for name in names]
+
+
+async def _read_version() -> int:
+    try:
+        async with read_asession() as asession:
+            version = await asession.execute(
+                sqlalchemy.select(Statistic.count).where(
+                    Statistic.kind == "dataset", Statistic.name == "version"
+                )
+            )
+            return version.scalar() or 0
+    except sqlalchemy.exc.SQLAlchemyError:
+        logging.exception("could not read the dataset version")
+        return 0
+
+
+async def dataset_version() -> int:
+    """Version the loaders stamp on the dataset, 0 for a database loaded before them.
+
+    Read on its own through the (kind, name) index, apart from the statistics
+    cache, and trusted for VERSION_TTL seconds.
+    """
+    if time.monotonic() >= _version["expires"]:
+        _version["version"] = await _read_version()
+        _version["expires"] = time.monotonic() + VERSION_TTL
+    return _version["version"]
@@ -0,0 +1,56 @@
+"""precomputed site statistics for the index page
+
+Revision ID: 0a6e5f3c7d12
+Revises: f25c8d4b19e6
+Create Date: 2026-10-18 20:48:31.225904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a6e5f3c7d12'
+down_revision: Union[str, None] = 'f25c8d4b19e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+## same queries as usefull_scripts/site_statistics.py
+STATISTICS = {
+    'tissue': 'SELECT t.name, count(*) FROM rnaeditingtissuelink l '
+              'JOIN tissue t ON t.id = l.tissue_id GROUP BY t.name',
+    'chromosome': 'SELECT chromosome, count(*) FROM sitesummary GROUP BY chromosome',
+    'repeatclass': "SELECT COALESCE(repeatclass, '-'), count(*) FROM sitesummary "
+                   "GROUP BY COALESCE(repeatclass, '-')",
+    'region': 'SELECT region, count(*) FROM sitesummary GROUP BY region',
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('statistic',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('statistic', schema=None) as batch_op:
+        batch_op.create_index('uq_statistic_kind_name', ['kind', 'name'], unique=True)
+
+    for kind, query in STATISTICS.items():
+        op.execute(
+            f"INSERT INTO statistic (kind, name, count) "
+            f"SELECT '{kind}', counts.* FROM ({query}) AS counts"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('statistic', schema=None) as batch_op:
+        batch_op.drop_index('uq_statistic_kind_name')
+
+    op.drop_table('statistic')
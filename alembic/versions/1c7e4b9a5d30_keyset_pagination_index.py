@@ -0,0 +1,33 @@
+"""index gene searches in keyset pagination order
+
+Revision ID: 1c7e4b9a5d30
+Revises: 0a6e5f3c7d12
+Create Date: 2026-10-18 21:36:04.518127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c7e4b9a5d30'
+down_revision: Union[str, None] = '0a6e5f3c7d12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    ## the new index leads with symbol, so it serves the plain lookups too
+    with op.batch_alter_table('sitesummary', schema=None) as batch_op:
+        batch_op.create_index('ix_sitesummary_symbol_chromosome_position', ['symbol', 'chromosome', 'position', 'id'], unique=False)
+        batch_op.drop_index(batch_op.f('ix_sitesummary_symbol'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('sitesummary', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_sitesummary_symbol'), ['symbol'], unique=False)
+        batch_op.drop_index('ix_sitesummary_symbol_chromosome_position')
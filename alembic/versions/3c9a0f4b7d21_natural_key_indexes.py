@@ -0,0 +1,36 @@
+"""unique natural key indexes for delta loading
+
+Revision ID: 3c9a0f4b7d21
+Revises: 68915b50577d
+Create Date: 2026-10-18 10:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9a0f4b7d21'
+down_revision: Union[str, None] = '68915b50577d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('rnaediting', schema=None) as batch_op:
+        batch_op.create_index('uq_rnaediting_chromosome_position', ['chromosome', 'position'], unique=True)
+
+    with op.batch_alter_table('editinglevel', schema=None) as batch_op:
+        batch_op.create_index('uq_editinglevel_rnaediting_tissue', ['rnaediting_id', 'tissue_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('editinglevel', schema=None) as batch_op:
+        batch_op.drop_index('uq_editinglevel_rnaediting_tissue')
+
+    with op.batch_alter_table('rnaediting', schema=None) as batch_op:
+        batch_op.drop_index('uq_rnaediting_chromosome_position')
@@ -0,0 +1,44 @@
+"""covering (chromosome, position) index for the site id lookups
+
+Revision ID: 8e2d5a1c4b90
+Revises: 3c9a0f4b7d21
+Create Date: 2026-10-18 14:03:27.561920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e2d5a1c4b90'
+down_revision: Union[str, None] = '3c9a0f4b7d21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+## the site id, which the loaders' (chromosome, position) -> id lookups read;
+## the page queries read sitesummary and need no payload here
+SITE_COLUMNS = ['id']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('rnaediting', schema=None) as batch_op:
+        batch_op.drop_index('uq_rnaediting_chromosome_position')
+        batch_op.create_index(
+            'uq_rnaediting_chromosome_position',
+            ['chromosome', 'position'],
+            unique=True,
+            postgresql_include=SITE_COLUMNS,
+        )
+        ## the composite index serves chromosome-only lookups as well
+        batch_op.drop_index('ix_rnaediting_chromosome')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('rnaediting', schema=None) as batch_op:
+        batch_op.create_index('ix_rnaediting_chromosome', ['chromosome'], unique=False)
+        batch_op.drop_index('uq_rnaediting_chromosome_position')
+        batch_op.create_index('uq_rnaediting_chromosome_position', ['chromosome', 'position'], unique=True)
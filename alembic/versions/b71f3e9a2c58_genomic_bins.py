@@ -0,0 +1,53 @@
+"""UCSC genomic bin column on interval tables
+
+Revision ID: b71f3e9a2c58
+Revises: 8e2d5a1c4b90
+Create Date: 2026-10-18 15:20:44.902317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71f3e9a2c58'
+down_revision: Union[str, None] = '8e2d5a1c4b90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INTERVAL_TABLES = ['gene', 'transcript', 'cds', 'utr']
+## same scheme as MAIRE/genomic_bins.py, spelled out so the migration does
+## not change if the app code does
+BIN_OFFSETS = [512 + 64 + 8 + 1, 64 + 8 + 1, 8 + 1, 1, 0]
+
+
+def bin_expression() -> str:
+    """SQL computing the bin of the closed interval start-end."""
+    cases = []
+    for level, offset in enumerate(BIN_OFFSETS):
+        shift = 17 + 3 * level
+        cases.append(
+            f'WHEN ("start" >> {shift}) = ("end" >> {shift}) '
+            f'THEN {offset} + ("start" >> {shift})'
+        )
+    return 'CASE ' + ' '.join(cases) + ' END'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in INTERVAL_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('bin', sa.Integer(), nullable=True))
+        op.execute(f'UPDATE "{table}" SET bin = {bin_expression()}')
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.create_index(f'ix_{table}_chromosome_bin', ['chromosome', 'bin'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(INTERVAL_TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{table}_chromosome_bin')
+            batch_op.drop_column('bin')
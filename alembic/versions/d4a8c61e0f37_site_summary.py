@@ -0,0 +1,61 @@
+"""denormalized site summary for the search grid
+
+Revision ID: d4a8c61e0f37
+Revises: b71f3e9a2c58
+Create Date: 2026-10-18 16:41:09.377215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a8c61e0f37'
+down_revision: Union[str, None] = 'b71f3e9a2c58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sitesummary',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('chromosome', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('ref', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('alt', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('location', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('repeatclass', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('symbol', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('region', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('exfun', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('samplenumbers', sa.Integer(), nullable=False),
+    sa.Column('tissuenumbers', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    ## fill it from the sites already loaded
+    op.execute(
+        'INSERT INTO sitesummary (id, chromosome, position, ref, alt, location, '
+        'repeatclass, symbol, region, exfun, samplenumbers, tissuenumbers) '
+        'SELECT r.id, r.chromosome, r.position, r.ref, r.alt, r.location, '
+        'p.repeatclass, g.symbol, r.region, r.exfun, r.samplenumbers, r.tissuenumbers '
+        'FROM rnaediting r '
+        'LEFT JOIN repeat p ON p.id = r.repeat_id '
+        'LEFT JOIN gene g ON g.id = r.gene_id '
+        'ORDER BY r.chromosome, r.position'
+    )
+    with op.batch_alter_table('sitesummary', schema=None) as batch_op:
+        batch_op.create_index('uq_sitesummary_chromosome_position', ['chromosome', 'position'], unique=True)
+        batch_op.create_index(batch_op.f('ix_sitesummary_symbol'), ['symbol'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('sitesummary', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_sitesummary_symbol'))
+        batch_op.drop_index('uq_sitesummary_chromosome_position')
+
+    op.drop_table('sitesummary')
@@ -0,0 +1,79 @@
+"""per-site editing level vector on rnaediting
+
+Revision ID: e93b07d2a6f4
+Revises: d4a8c61e0f37
+Create Date: 2026-10-18 18:05:52.140663
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from MAIRE.level_vector import TISSUE_ORDER, encode_levels
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e93b07d2a6f4'
+down_revision: Union[str, None] = 'd4a8c61e0f37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+## sites whose vectors are written per UPDATE batch of the backfill
+BACKFILL_BATCH = 10000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    ## later loads refill it through usefull_scripts/upload_level_vectors.py
+    with op.batch_alter_table('rnaediting', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('levels', sa.LargeBinary(), nullable=True))
+    backfill_levels(op.get_bind())
+
+
+def backfill_levels(bind) -> None:
+    """Build the vectors of the levels already in editinglevel, like --from-table."""
+    slots = {name: index for index, name in enumerate(TISSUE_ORDER)}
+    indexes = {
+        tissue_id: slots[name]
+        for tissue_id, name in bind.execute(sa.text('SELECT id, name FROM tissue'))
+        if name in slots
+    }
+    rnaediting = sa.table('rnaediting', sa.column('id'), sa.column('levels', sa.LargeBinary))
+    statement = (
+        rnaediting.update()
+        .where(rnaediting.c.id == sa.bindparam('site_id'))
+        .values(levels=sa.bindparam('vector'))
+    )
+
+    def write(vectors):
+        if vectors:
+            bind.execute(
+                statement,
+                [
+                    {'site_id': site_id, 'vector': encode_levels(levels)}
+                    for site_id, levels in vectors.items()
+                ],
+            )
+
+    rows = bind.execution_options(stream_results=True, yield_per=BACKFILL_BATCH).execute(
+        sa.text('SELECT rnaediting_id, tissue_id, level FROM editinglevel '
+                'ORDER BY rnaediting_id, id')
+    )
+    vectors, current = {}, None
+    for rnaediting_id, tissue_id, level in rows:
+        if rnaediting_id != current and len(vectors) >= BACKFILL_BATCH:
+            write(vectors)
+            vectors = {}
+        current = rnaediting_id
+        index = indexes.get(tissue_id)
+        if index is not None:
+            vectors.setdefault(rnaediting_id, {})[index] = level
+    write(vectors)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('rnaediting', schema=None) as batch_op:
+        batch_op.drop_column('levels')
@@ -0,0 +1,42 @@
+"""index the foreign keys the pages join on
+
+Revision ID: f25c8d4b19e6
+Revises: e93b07d2a6f4
+Create Date: 2026-10-18 19:32:17.806455
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f25c8d4b19e6'
+down_revision: Union[str, None] = 'e93b07d2a6f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+## editinglevel.rnaediting_id leads uq_editinglevel_rnaediting_tissue already
+FOREIGN_KEYS = [
+    ('transcript', 'gene_id'),
+    ('cds', 'transcript_id'),
+    ('utr', 'transcript_id'),
+    ('aminochange', 'rnaediting_id'),
+    ('rnaediting', 'gene_id'),
+    ('rnaeditingtissuelink', 'rnaediting_id'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in FOREIGN_KEYS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.create_index(batch_op.f(f'ix_{table}_{column}'), [column], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column in reversed(FOREIGN_KEYS):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(batch_op.f(f'ix_{table}_{column}'))
@@ -0,0 +1,42 @@
+import os
+import shutil
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+## the app package and rxconfig.py live at the root, the loaders import each
+## other as top-level modules from usefull_scripts
+for path in (ROOT, os.path.join(ROOT, "usefull_scripts")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import pytest
+import sqlalchemy
+from check_query_plans import seed
+from generate_synthetic_data import DATA_FILES
+
+SEEDED_SITES = 2000
+
+
+@pytest.fixture(scope="session")
+def seeded_url(tmp_path_factory):
+    """A SQLite database loaded by DataLoader from synthetic inputs, read-only."""
+    tmp_path = tmp_path_factory.mktemp("seeded")
+    url = f"sqlite:///{tmp_path / 'seeded.db'}"
+    seed(url, SEEDED_SITES, str(tmp_path / "data"))
+    return url
+
+
+@pytest.fixture(scope="session")
+def seeded_inputs(seeded_url) -> list:
+    """Paths of the synthetic inputs of seeded_url in DataLoader argument order."""
+    database = sqlalchemy.engine.make_url(seeded_url).database
+    data = os.path.join(os.path.dirname(database), "data")
+    return [os.path.join(data, name) for name in DATA_FILES]
+
+
+@pytest.fixture
+def seeded_copy(seeded_url, tmp_path) -> str:
+    """URL of a copy of the seeded database that the test may change."""
+    target = tmp_path / "seeded.db"
+    shutil.copyfile(sqlalchemy.engine.make_url(seeded_url).database, target)
+    return f"sqlite:///{target}"
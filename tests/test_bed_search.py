@@ -0,0 +1,121 @@
+import random
+import pytest
+from MAIRE import bed_search, queries
+from MAIRE.bed_search import BedResults, batches
+from MAIRE.models import SiteSummary
+import sqlalchemy
+import sqlmodel
+
+
+@pytest.fixture(scope="module")
+def session(seeded_url):
+    engine = sqlalchemy.create_engine(seeded_url)
+    with sqlmodel.Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def test_batches_merge_overlapping_and_adjacent_intervals():
+    intervals = [
+        ("chr1", 300, 400, "gap"),
+        ("chr1", 100, 200, "first"),
+        ("chr1", 150, 250, "overlapping"),
+        ("chr1", 250, 260, "adjacent"),
+        ("chr1", 120, 130, "inside"),
+        ("chr2", 100, 200, "other chromosome"),
+    ]
+    assert list(batches(intervals)) == [
+        (
+            [["chr1", 101, 260], ["chr1", 301, 400], ["chr2", 101, 200]],
+            sorted(intervals),
+        )
+    ]
+
+
+def test_batches_split_at_the_batch_size(monkeypatch):
+    monkeypatch.setattr(bed_search, "INTERVAL_BATCH", 2)
+    intervals = [("chr1", start, start + 10, "") for start in (0, 5, 100, 200, 300)]
+    assert list(batches(intervals)) == [
+        ([["chr1", 1, 15], ["chr1", 101, 110]], intervals[:3]),
+        ([["chr1", 201, 210], ["chr1", 301, 310]], intervals[3:]),
+    ]
+
+
+def bed_intervals(sites):
+    """Intervals around seeded sites: exact, adjacent, nested, repeated and empty ones."""
+    rng = random.Random(0)
+    intervals = [("chrUn", 0, 1000, "no sites")]
+    for site in rng.sample(sites, 60):
+        chromosome, position = site.chromosome, site.position
+        intervals += [
+            (chromosome, position - 1, position, "exact"),
+            (chromosome, position, position + 5000, "adjacent after"),
+            (chromosome, position - 5000, position - 1, "adjacent before"),
+            (chromosome, position - 1, position, "same range"),
+            (chromosome, position - 1, position, "exact"),
+        ]
+        start = position - rng.randint(0, 3000000)
+        intervals += [
+            (chromosome, start, start + rng.randint(1, 6000000), f"random {i}")
+            for i in range(3)
+        ]
+    return [
+        (chromosome, max(0, start), end, name)
+        for chromosome, start, end, name in intervals
+    ]
+
+
+def test_sweep_matches_every_interval_against_its_sites(
+    session, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(bed_search, "INTERVAL_BATCH", 25)
+    sites = session.exec(SiteSummary.select()).all()
+    intervals = bed_intervals(sites)
+    results = BedResults(
+        str(tmp_path / "counts.tsv"),
+        str(tmp_path / "sites.tsv"),
+        ["chrom", "start", "end", "name", "id"],
+        lambda site: [str(site.id)],
+    )
+    for blocks, members in batches(intervals):
+        results.start_batch(members)
+        fetched = session.scalars(queries.interval_sites(blocks)).all()
+        assert len({site.id for site in fetched}) == len(fetched)
+        ## in chunks, like the search page streams them
+        for start in range(0, len(fetched), 7):
+            results.add_sites(fetched[start : start + 7])
+    results.finish()
+
+    expected = {}
+    for interval in intervals:
+        chromosome, start, end, _ = interval
+        expected.setdefault(interval, set()).update(
+            site.id
+            for site in sites
+            if site.chromosome == chromosome and start < site.position <= end
+        )
+    counts = {}
+    for interval, count in zip(results.intervals, results.counts):
+        counts[interval] = counts.get(interval, 0) + count
+    repeats = {interval: intervals.count(interval) for interval in intervals}
+    assert sorted(results.intervals) == sorted(intervals)
+    assert counts == {
+        interval: len(ids) * repeats[interval] for interval, ids in expected.items()
+    }
+    assert results.hit == sum(
+        repeats[interval] for interval, ids in expected.items() if ids
+    )
+
+    matched = {}
+    with open(tmp_path / "sites.tsv") as f:
+        assert next(f) == "chrom\tstart\tend\tname\tid\n"
+        for line in f:
+            chromosome, start, end, name, site_id = line.rstrip("\n").split("\t")
+            interval = (chromosome, int(start), int(end), name)
+            matched.setdefault(interval, []).append(int(site_id))
+    for interval, ids in expected.items():
+        assert sorted(matched.get(interval, [])) == sorted(
+            list(ids) * repeats[interval]
+        )
+    with open(tmp_path / "counts.tsv") as f:
+        assert len(f.readlines()) == len(intervals) + 1
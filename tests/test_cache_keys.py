@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+from MAIRE import cache, database, statistics
+from reflex.config import get_config
+import sqlalchemy
+import sqlmodel
+from site_statistics import stamp_dataset_version
+
+SEARCH = ["region", "chr1", 1, 5000000]
+
+
+@pytest.fixture
+def primary(seeded_copy, monkeypatch):
+    """URL of a seeded database the app's async sessions read as their primary."""
+    database_path = sqlalchemy.engine.make_url(seeded_copy).database
+    monkeypatch.setattr(
+        get_config(), "async_db_url", f"sqlite+aiosqlite:///{database_path}"
+    )
+    monkeypatch.setattr(database, "_engines", {})
+    monkeypatch.setattr(database, "_sessionmakers", {})
+    monkeypatch.setattr(statistics, "_version", {"expires": 0.0, "version": 0})
+    return seeded_copy
+
+
+def stamp(url) -> int:
+    engine = sqlalchemy.create_engine(url)
+    with sqlmodel.Session(engine) as session:
+        version = stamp_dataset_version(session)
+        session.commit()
+    engine.dispose()
+    return version
+
+
+async def keys():
+    return [
+        await cache.cache_key("page", "macaque", SEARCH, {"limit": 50}),
+        await cache.cache_key("page", "macaque", SEARCH, {"limit": 100}),
+        await cache.cache_key("count", "macaque", SEARCH, {}),
+    ]
+
+
+def test_keys_follow_the_dataset_version(primary):
+    async def run():
+        try:
+            before = await keys()
+            assert before == await keys()
+            assert len(set(before)) == len(before)
+            version = stamp(primary)
+            ## the version is trusted for VERSION_TTL seconds
+            assert await keys() == before
+            statistics._version["expires"] = 0.0
+            after = await keys()
+            for old, new in zip(before, after):
+                assert old != new
+                assert new.split(":")[2] == str(version)
+                assert old.split(":")[3:] == new.split(":")[3:]
+        finally:
+            for engine in database._engines.values():
+                await engine.dispose()
+
+    asyncio.run(run())
@@ -0,0 +1,57 @@
+import pytest
+from MAIRE import queries
+from MAIRE.genomic_bins import BIN_MAX_END, bin_from_range, overlapping_bin_ranges
+from MAIRE.models import Gene
+import sqlalchemy
+import sqlmodel
+
+
+@pytest.mark.parametrize(
+    "start, end, expected",
+    [
+        (0, 0, 585),
+        ((1 << 17) - 1, 1 << 17, 73),
+        (1 << 17, (1 << 18) - 1, 586),
+        (0, (1 << 20) - 1, 73),
+        (0, BIN_MAX_END - 1, 0),
+    ],
+)
+def test_bin_from_range(start, end, expected):
+    assert bin_from_range(start, end) == expected
+
+
+def test_bin_is_in_an_overlapping_range():
+    ## every feature overlapping a region has its bin in one of the ranges
+    for start, end in [(5, 10), (100000, 300000), (1 << 20, (1 << 26) + 7)]:
+        for first, last in [(0, 4), (8, 8), (250000, 260000), ((1 << 26), 1 << 27)]:
+            if first <= end and last >= start:
+                feature_bin = bin_from_range(start, end)
+                assert any(
+                    low <= feature_bin <= high
+                    for low, high in overlapping_bin_ranges(first, last)
+                )
+
+
+def test_region_genes_match_a_plain_overlap(seeded_url):
+    engine = sqlalchemy.create_engine(seeded_url)
+    with sqlmodel.Session(engine) as session:
+        genes = session.exec(sqlmodel.select(Gene)).all()
+        assert genes
+        for gene in genes[:20]:
+            for start, end in [
+                (gene.start, gene.start),
+                (gene.end, gene.end + 500000),
+                (max(0, gene.start - 3000000), gene.start + 10),
+            ]:
+                expected = sorted(
+                    (other.start, other.id)
+                    for other in genes
+                    if other.chromosome == gene.chromosome
+                    and other.start <= end
+                    and other.end >= start
+                )[: queries.REGION_GENE_LIMIT]
+                found = session.exec(
+                    queries.region_genes(gene.chromosome, start, end)
+                ).all()
+                assert [(other.start, other.id) for other in found] == expected
+    engine.dispose()
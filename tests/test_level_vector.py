@@ -0,0 +1,60 @@
+from MAIRE.level_vector import (
+    LEVEL_SCALE,
+    MISSING_LEVEL,
+    TISSUE_ORDER,
+    decode_levels,
+    encode_levels,
+    level_vector_schema,
+)
+from MAIRE.models import EditingLevel, RNAediting, Tissue
+import sqlalchemy
+import sqlmodel
+
+
+def test_round_trip_keeps_levels_and_missing_tissues():
+    levels = {0: 0.0, 1: 1.0, 7: 0.1234, 20: 0.0005, len(TISSUE_ORDER) - 1: 0.5}
+    blob = encode_levels(levels)
+    assert len(blob) == 2 * len(TISSUE_ORDER)
+    decoded = decode_levels(blob)
+    assert len(decoded) == len(TISSUE_ORDER)
+    for index, level in enumerate(decoded):
+        if index in levels:
+            assert level == round(levels[index] * LEVEL_SCALE) / LEVEL_SCALE
+        else:
+            assert level is None
+
+
+def test_missing_levels_are_stored_as_0xffff_little_endian():
+    blob = encode_levels({1: 0.258})
+    assert blob[:2] == MISSING_LEVEL.to_bytes(2, "little") == b"\xff\xff"
+    assert blob[2:4] == (258).to_bytes(2, "little")
+    assert decode_levels(encode_levels({})) == [None] * len(TISSUE_ORDER)
+
+
+def test_schema_shows_missing_levels_as_zero():
+    blob = encode_levels({TISSUE_ORDER.index("cerebellum"): 0.25})
+    assert level_vector_schema(blob, ["cerebellum", "pons"]) == [
+        {"tissue": "cerebellum", "level": 0.25},
+        {"tissue": "pons", "level": 0},
+    ]
+
+
+def test_loaded_vectors_match_the_level_rows(seeded_url):
+    engine = sqlalchemy.create_engine(seeded_url)
+    with sqlmodel.Session(engine) as session:
+        expected = {}
+        for rnaediting_id, tissue, level in session.execute(
+            sqlalchemy.select(
+                EditingLevel.rnaediting_id, Tissue.name, EditingLevel.level
+            ).join(Tissue, Tissue.id == EditingLevel.tissue_id)
+        ):
+            expected.setdefault(rnaediting_id, {})[tissue] = level
+        sites = session.exec(sqlmodel.select(RNAediting.id, RNAediting.levels)).all()
+    engine.dispose()
+    assert len(sites) == len(expected)
+    for rnaediting_id, blob in sites:
+        decoded = dict(zip(TISSUE_ORDER, decode_levels(blob)))
+        measured = {tissue for tissue, level in decoded.items() if level is not None}
+        assert measured == set(expected[rnaediting_id])
+        for tissue, level in expected[rnaediting_id].items():
+            assert decoded[tissue] == round(level * LEVEL_SCALE) / LEVEL_SCALE
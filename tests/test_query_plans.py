@@ -0,0 +1,32 @@
+import pytest
+import sqlalchemy
+from check_query_plans import check, sqlite_scanned_table
+
+
+@pytest.mark.parametrize(
+    "detail, table",
+    [
+        ("SCAN sitesummary", "sitesummary"),
+        ("SCAN TABLE sitesummary", "sitesummary"),
+        ("SCAN TABLE sitesummary AS s", "sitesummary"),
+        ("SCAN rnaediting USING COVERING INDEX ix_rnaediting_gene_id", "rnaediting"),
+        ("SCAN 3 CONSTANT ROWS", None),
+        ("SCAN CONSTANT ROW", None),
+        ("SEARCH sitesummary USING INDEX uq_sitesummary_chromosome_position (chromosome=?)", None),
+        ("USE TEMP B-TREE FOR ORDER BY", None),
+    ],
+)
+def test_sqlite_scanned_table(detail, table):
+    assert sqlite_scanned_table(detail) == table
+
+
+def test_page_queries_use_indexes(seeded_url):
+    assert check(seeded_url)
+
+
+def test_missing_index_fails(seeded_copy):
+    engine = sqlalchemy.create_engine(seeded_copy)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP INDEX uq_sitesummary_chromosome_position")
+    engine.dispose()
+    assert not check(seeded_copy)
@@ -0,0 +1,114 @@
+import pytest
+from MAIRE import queries
+from MAIRE.models import SiteSummary
+import sqlalchemy
+import sqlmodel
+
+SEARCHES = [
+    ["region", "chr1", 0, 300000000],
+    ["region", "chr2", 20000000, 120000000],
+    ["gene", "GENE7"],
+]
+
+
+def site_key(site):
+    return [site.chromosome, site.position, site.id]
+
+
+def all_sites(session, search):
+    return [
+        site_key(site)
+        for site in session.exec(
+            SiteSummary.select()
+            .where(queries._search_clause(search))
+            .order_by(*queries.SITE_ORDER)
+        )
+    ]
+
+
+def forward_pages(session, search, limit):
+    pages, after = [], None
+    while True:
+        page = [
+            site_key(site)
+            for site in session.exec(queries.site_page(search, limit, after=after))
+        ]
+        if not page:
+            return pages
+        pages.append(page)
+        after = page[-1]
+
+
+def backward_pages(session, search, limit, before):
+    pages = []
+    while True:
+        page = [
+            site_key(site)
+            for site in session.exec(queries.site_page(search, limit, before=before))
+        ][::-1]
+        if not page:
+            return pages[::-1]
+        pages.append(page)
+        before = page[0]
+
+
+@pytest.fixture(scope="module")
+def session(seeded_url):
+    engine = sqlalchemy.create_engine(seeded_url)
+    with sqlmodel.Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+@pytest.mark.parametrize("search", SEARCHES)
+def test_keyset_pages_walk_the_whole_result(session, search):
+    expected = all_sites(session, search)
+    assert len(expected) > 20
+    ## an exact divisor ends on a full page, the others on a partial one
+    for limit in (1, 7, len(expected) // 2, len(expected), len(expected) + 1):
+        pages = forward_pages(session, search, limit)
+        assert [key for page in pages for key in page] == expected
+        assert all(len(page) == limit for page in pages[:-1])
+        back = backward_pages(session, search, limit, before=expected[-1])
+        assert [key for page in back for key in page] == expected[:-1]
+
+
+@pytest.mark.parametrize("search", SEARCHES)
+def test_keyset_pages_at_the_ends(session, search):
+    expected = all_sites(session, search)
+    first, last = expected[0], expected[-1]
+    assert list(session.exec(queries.site_page(search, 5, before=first))) == []
+    assert list(session.exec(queries.site_page(search, 5, after=last))) == []
+    ## a page back from the key after a page returns exactly that page
+    page = [site_key(site) for site in session.exec(queries.site_page(search, 5))]
+    after = [
+        site_key(site)
+        for site in session.exec(queries.site_page(search, 1, after=page[-1]))
+    ]
+    back = [
+        site_key(site)
+        for site in session.exec(queries.site_page(search, 5, before=after[0]))
+    ][::-1]
+    assert back == page == expected[:5]
+
+
+@pytest.mark.parametrize("search", SEARCHES)
+def test_counting_in_key_steps_matches_count(session, search):
+    total = len(all_sites(session, search))
+    assert session.execute(queries.site_count(search)).scalar_one() == total
+    ## the steps of the search page's progressive count, one ending exactly
+    ## on the last row
+    for step in (1, 10, total, total + 1):
+        counted, after = 0, None
+        while True:
+            key = session.execute(
+                queries.site_key(search, step - 1, after=after)
+            ).first()
+            if key is None:
+                counted += session.execute(
+                    queries.site_count(search, after=after)
+                ).scalar_one()
+                break
+            counted += step
+            after = list(key)
+        assert counted == total
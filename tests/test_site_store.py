@@ -0,0 +1,70 @@
+import pytest
+from MAIRE import queries
+from MAIRE.models import SiteSummary
+from MAIRE.site_store import SiteStore
+import sqlalchemy
+import sqlmodel
+from export_site_store import write_store
+
+
+@pytest.fixture(scope="module")
+def session(seeded_url):
+    engine = sqlalchemy.create_engine(seeded_url)
+    with sqlmodel.Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def store(seeded_url, tmp_path_factory):
+    target = tmp_path_factory.mktemp("store") / "export"
+    write_store(seeded_url, str(target))
+    return SiteStore(str(target))
+
+
+def searches(session):
+    """Whole chromosomes, regions starting and ending on a site, and empty ones."""
+    sites = session.exec(
+        SiteSummary.select()
+        .where(SiteSummary.chromosome == "chr2")
+        .order_by(SiteSummary.position)
+    ).all()
+    first, middle, last = sites[3].position, sites[40].position, sites[90].position
+    return [
+        ["region", "chr1", 0, 300000000],
+        ["region", "chr2", first, last],
+        ["region", "chr2", first + 1, last - 1],
+        ["region", "chr2", middle, middle],
+        ["region", "chr2", middle + 1, middle + 1],
+        ["region", "chrUn", 0, 300000000],
+    ]
+
+
+def dumps(sites):
+    return [site.model_dump() for site in sites]
+
+
+def test_counts_match_sql(session, store):
+    for search in searches(session):
+        assert store.count(search) == session.execute(
+            queries.site_count(search)
+        ).scalar_one()
+
+
+def test_pages_match_sql(session, store):
+    for search in searches(session):
+        for limit in (1, 7, 50):
+            after = None
+            while True:
+                expected = dumps(
+                    session.exec(queries.site_page(search, limit, after=after))
+                )
+                page = dumps(store.page(search, limit, after=after))
+                assert page == expected
+                if not page:
+                    break
+                before = [search[1], page[0]["position"], page[0]["id"]]
+                assert dumps(store.page(search, limit, before=before)) == dumps(
+                    session.exec(queries.site_page(search, limit, before=before))
+                )[::-1]
+                after = [search[1], page[-1]["position"], page[-1]["id"]]
@@ -0,0 +1,129 @@
+from MAIRE.level_vector import LEVEL_SCALE, TISSUE_ORDER, decode_levels
+from MAIRE.models import EditingLevel, RNAediting, SiteSummary
+import sqlalchemy
+import sqlmodel
+from upload_delta import delta_upload_levels, delta_upload_RNAediting
+
+## column of N_Samples in RNA_editing_data.txt
+SAMPLES_FIELD = 11
+
+
+def read_lines(path):
+    with open(path) as f:
+        return f.readline(), [line.rstrip("\n").split("\t") for line in f]
+
+
+def write_lines(path, header, rows):
+    with open(path, "w") as f:
+        f.write(header)
+        f.writelines("\t".join(row) + "\n" for row in rows)
+
+
+def table_count(url, model) -> int:
+    engine = sqlalchemy.create_engine(url)
+    with sqlmodel.Session(engine) as session:
+        count = session.execute(
+            sqlalchemy.select(sqlalchemy.func.count()).select_from(model)
+        ).scalar_one()
+    engine.dispose()
+    return count
+
+
+def test_editing_delta_counts(seeded_inputs, seeded_copy, tmp_path):
+    header, rows = read_lines(seeded_inputs[4])
+    positions = {(row[0], int(row[1])) for row in rows}
+    release = []
+    expected = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+    for i, row in enumerate(rows):
+        if i % 50 == 0:
+            expected["deleted"] += 1
+        elif i % 30 == 0:
+            row = row[:]
+            row[SAMPLES_FIELD] = str(int(row[SAMPLES_FIELD]) + 1000)
+            release.append(row)
+            expected["updated"] += 1
+        else:
+            release.append(row)
+            expected["unchanged"] += 1
+        ## a new site right behind this one, keeping the file in position order
+        added = (row[0], int(row[1]) + 1)
+        following = rows[i + 1] if i + 1 < len(rows) else None
+        if i % 40 == 0 and added not in positions and (
+            following is None
+            or following[0] != row[0]
+            or int(following[1]) > added[1]
+        ):
+            release.append([row[0], str(added[1]), *row[2:]])
+            expected["inserted"] += 1
+    assert all(expected.values())
+    path = str(tmp_path / "RNA_editing_data.txt")
+    write_lines(path, header, release)
+
+    assert delta_upload_RNAediting(path, url=seeded_copy) == expected
+    sites = len(rows) - expected["deleted"] + expected["inserted"]
+    assert table_count(seeded_copy, RNAediting) == sites
+    assert table_count(seeded_copy, SiteSummary) == sites
+    ## the same release again changes nothing
+    assert delta_upload_RNAediting(path, url=seeded_copy) == {
+        "inserted": 0,
+        "updated": 0,
+        "deleted": 0,
+        "unchanged": len(release),
+    }
+
+
+def test_level_delta_counts(seeded_inputs, seeded_copy, tmp_path):
+    header, rows = read_lines(seeded_inputs[5])
+    site_tissues = {}
+    for chromosome, position, tissue, _ in rows:
+        site_tissues.setdefault((chromosome, position), set()).add(tissue)
+    release = []
+    changed = {}
+    expected = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+    for i, (chromosome, position, tissue, level) in enumerate(rows):
+        if i % 25 == 0:
+            expected["deleted"] += 1
+        elif i % 10 == 0:
+            level = f"{(float(level) + 0.25) % 1:.4f}"
+            release.append([chromosome, position, tissue, level])
+            changed[(chromosome, int(position), tissue)] = float(level)
+            expected["updated"] += 1
+        else:
+            release.append([chromosome, position, tissue, level])
+            expected["unchanged"] += 1
+        following = rows[i + 1] if i + 1 < len(rows) else None
+        last_of_site = following is None or following[:2] != [chromosome, position]
+        if i % 20 == 0 and last_of_site:
+            ## a tissue this site had no level in before
+            tissues = site_tissues[(chromosome, position)]
+            new = next(name for name in TISSUE_ORDER if name not in tissues)
+            release.append([chromosome, position, new, "0.5000"])
+            changed[(chromosome, int(position), new)] = 0.5
+            expected["inserted"] += 1
+    assert all(expected.values())
+    path = str(tmp_path / "RE_levels.tsv")
+    write_lines(path, header, release)
+
+    assert delta_upload_levels(path, url=seeded_copy) == expected
+    assert table_count(seeded_copy, EditingLevel) == (
+        len(rows) - expected["deleted"] + expected["inserted"]
+    )
+    ## the vectors of the touched sites were rebuilt
+    engine = sqlalchemy.create_engine(seeded_copy)
+    with sqlmodel.Session(engine) as session:
+        for (chromosome, position, tissue), level in changed.items():
+            blob = session.exec(
+                sqlmodel.select(RNAediting.levels).where(
+                    RNAediting.chromosome == chromosome,
+                    RNAediting.position == position,
+                )
+            ).one()
+            stored = decode_levels(blob)[TISSUE_ORDER.index(tissue)]
+            assert stored == round(level * LEVEL_SCALE) / LEVEL_SCALE
+    engine.dispose()
+    assert delta_upload_levels(path, url=seeded_copy) == {
+        "inserted": 0,
+        "updated": 0,
+        "deleted": 0,
+        "unchanged": len(release),
+    }
@@ -0,0 +1,183 @@
+import asyncio
+import asyncpg
+import sqlalchemy
+from rxconfig import config
+from loader_utils import CHUNK_SIZE, Progress, read_chunks
+from upload_level_vectors import vectors_from_editinglevel
+
+## parsed chunks and write batches in flight; bounds memory and lets a slow
+## stage hold the ones before it back
+QUEUE_SIZE = 8
+WRITERS = 4
+LEVEL_COLUMNS = ("id", "rnaediting_id", "tissue_id", "level")
+
+
+def asyncpg_dsn(url) -> str:
+    """A SQLAlchemy Postgres URL (any driver) as a plain DSN for asyncpg."""
+    url = sqlalchemy.engine.make_url(url)
+    if url.get_backend_name() != "postgresql":
+        raise ValueError("the async loader needs a Postgres database")
+    return url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+async def lookup_map(connection, sql) -> dict:
+    """Map the key columns of every row (after the id) to the first id."""
+    mapping = {}
+    for row in await connection.fetch(sql):
+        key = row[1] if len(row) == 2 else tuple(row[1:])
+        mapping.setdefault(key, row[0])
+    return mapping
+
+
+async def read_stage(path, parse, out_queue, chunk_size):
+    """Read and parse `path` in a worker thread, one chunk at a time.
+
+    The event loop stays free while a chunk is parsed, so the writers keep
+    copying the previous ones.
+    """
+    chunks = read_chunks(path, chunk_size=chunk_size)
+    while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+        records = await asyncio.to_thread(parse, chunk[0])
+        await out_queue.put(records)
+    await out_queue.put(None)
+
+
+async def batch_stage(in_queue, out_queue, batch_size, writers):
+    """Regroup parsed records into batches of `batch_size` rows."""
+    batch = []
+    while (records := await in_queue.get()) is not None:
+        batch.extend(records)
+        while len(batch) >= batch_size:
+            await out_queue.put(batch[:batch_size])
+            batch = batch[batch_size:]
+    if batch:
+        await out_queue.put(batch)
+    for _ in range(writers):
+        await out_queue.put(None)
+
+
+async def write_stage(pool, in_queue, table_name, columns, progress):
+    """COPY batches into `table_name` until the batcher says it is done."""
+    async with pool.acquire() as connection:
+        while (batch := await in_queue.get()) is not None:
+            await connection.copy_records_to_table(
+                table_name, records=batch, columns=list(columns)
+            )
+            progress.update(len(batch))
+
+
+async def run_pipeline(
+    pool, path, parse, table_name, columns, chunk_size, batch_size, writers
+):
+    progress = Progress(f"{table_name} (async)")
+    parsed = asyncio.Queue(maxsize=QUEUE_SIZE)
+    batches = asyncio.Queue(maxsize=QUEUE_SIZE)
+    ## a failing stage cancels the others
+    async with asyncio.TaskGroup() as group:
+        group.create_task(read_stage(path, parse, parsed, chunk_size))
+        group.create_task(batch_stage(parsed, batches, batch_size, writers))
+        for _ in range(writers):
+            group.create_task(
+                write_stage(pool, batches, table_name, columns, progress)
+            )
+    progress.done()
+    return progress.rows
+
+
+async def async_upload_RNAediting_levels(
+    editinglevelfile,
+    url=config.db_url,
+    chunk_size=CHUNK_SIZE,
+    batch_size=CHUNK_SIZE,
+    writers=WRITERS,
+):
+    """Load RE_levels.tsv with overlapped parsing and concurrent COPY writers.
+
+    A reader stage parses the file chunk by chunk and resolves site and
+    tissue ids from maps read up front, a batching stage cuts the records
+    into COPY sized batches and `writers` connections copy them with
+    copy_records_to_table, each batch in its own transaction. Ids are
+    assigned in file order like in the bulk loader. If any stage fails the
+    rows written by this load are deleted again.
+    Returns the number of rows written.
+    """
+    pool = await asyncpg.create_pool(
+        asyncpg_dsn(url), min_size=writers, max_size=writers
+    )
+    try:
+        async with pool.acquire() as connection:
+            site_ids = await lookup_map(
+                connection,
+                "SELECT id, chromosome, position FROM rnaediting ORDER BY id",
+            )
+            tissue_ids = await lookup_map(
+                connection, "SELECT id, name FROM tissue ORDER BY id"
+            )
+            first_id = await connection.fetchval(
+                "SELECT COALESCE(MAX(id), 0) + 1 FROM editinglevel"
+            )
+        level_id = first_id
+        skipped = 0
+
+        def parse(chunk):
+            nonlocal level_id, skipped
+            records = []
+            for chrom, pos, tissue_name, level in chunk:
+                rnaediting_id = site_ids.get((chrom, int(pos)))
+                tissue_id = tissue_ids.get(tissue_name)
+                if rnaediting_id is not None and tissue_id is not None:
+                    records.append((level_id, rnaediting_id, tissue_id, float(level)))
+                else:
+                    skipped += 1
+                level_id += 1
+            return records
+
+        try:
+            loaded = await run_pipeline(
+                pool,
+                editinglevelfile,
+                parse,
+                "editinglevel",
+                LEVEL_COLUMNS,
+                chunk_size,
+                batch_size,
+                writers,
+            )
+        except BaseException:
+            await pool.execute("DELETE FROM editinglevel WHERE id >= $1", first_id)
+            print("load failed, removed the rows it had written")
+            raise
+        if skipped:
+            print(f"skipped {skipped} lines without a matching site or tissue")
+        await pool.execute(
+            "SELECT setval(pg_get_serial_sequence('editinglevel', 'id'), "
+            "COALESCE((SELECT MAX(id) FROM editinglevel), 0) + 1, false)"
+        )
+        return loaded
+    finally:
+        await pool.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Load editing levels with an asyncpg COPY pipeline (Postgres only)"
+    )
+    parser.add_argument("-i", "--editinglevelfile", type=str, required=True)
+    parser.add_argument("--url", type=str, default=config.db_url)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--batch-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--writers", type=int, default=WRITERS)
+    args = parser.parse_args()
+    asyncio.run(
+        async_upload_RNAediting_levels(
+            args.editinglevelfile,
+            url=args.url,
+            chunk_size=args.chunk_size,
+            batch_size=args.batch_size,
+            writers=args.writers,
+        )
+    )
+    ## the gene view and the level plot read the per-site vectors
+    vectors_from_editinglevel(url=args.url)
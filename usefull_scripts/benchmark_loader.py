@@ -0,0 +1,169 @@
+import reflex as rx
+import json
+import os
+import tempfile
+import threading
+import time
+import psutil
+import sqlalchemy
+import sqlmodel
+from tabulate import tabulate
+from MAIRE.models import (
+    RNAediting,
+    Repeat,
+    Gene,
+    Aminochange,
+    Tissue,
+    RNAeditingtissuelink,
+    Transcript,
+    Species,
+    Cds,
+    Utr,
+    EditingLevel,
+    SiteSummary,
+)
+from generate_synthetic_data import DATA_FILES, generate
+from upload_data_to_database import DataLoader
+
+## loader stage -> tables whose new rows it is credited with
+STAGES = {
+    "_upload_gene": (Species, Gene, Transcript, Cds, Utr),
+    "_upload_repeat": (Repeat,),
+    "_upload_tissue": (Tissue,),
+    "_upload_AA_change": (Aminochange,),
+    "_upload_edit": (RNAediting, RNAeditingtissuelink, SiteSummary),
+    "_upload_levels_bulk": (EditingLevel,),
+}
+
+
+class CommitCounter:
+    """Count COMMITs issued by every engine in this process."""
+
+    def __init__(self):
+        self.commits = 0
+        sqlalchemy.event.listen(sqlalchemy.engine.Engine, "commit", self._on_commit)
+
+    def _on_commit(self, connection):
+        self.commits += 1
+
+
+class PeakRSS:
+    """Sample the resident set size of this process tree in a background thread.
+
+    The sharded loaders do their work in spawned worker processes, so the
+    RSS of every live descendant is added to the parent's at each sample.
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def tree_rss(self) -> int:
+        rss = self.process.memory_info().rss
+        for child in self.process.children(recursive=True):
+            ## a worker may exit between listing and reading it
+            try:
+                rss += child.memory_info().rss
+            except psutil.NoSuchProcess:
+                pass
+        return rss
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.tree_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = self.tree_rss()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+def count_tables(url, models) -> int:
+    with rx.session(url=url) as session:
+        return sum(
+            session.execute(
+                sqlalchemy.select(sqlalchemy.func.count()).select_from(model)
+            ).scalar()
+            for model in models
+        )
+
+
+def benchmark(url, paths, stages=STAGES, workers=1) -> list:
+    """Load `paths` into a fresh schema at `url`, timing every loader stage."""
+    engine = sqlmodel.create_engine(url)
+    sqlmodel.SQLModel.metadata.drop_all(engine)
+    sqlmodel.SQLModel.metadata.create_all(engine)
+    loader = DataLoader(url, *paths)
+    commits = CommitCounter()
+    results = []
+    for stage, models in stages.items():
+        rows_before = count_tables(url, models)
+        commits_before = commits.commits
+        kwargs = {}
+        if stage in ("_upload_edit", "_upload_levels_bulk"):
+            kwargs["workers"] = workers
+        with PeakRSS() as rss:
+            started = time.perf_counter()
+            getattr(loader, stage)(**kwargs)
+            elapsed = time.perf_counter() - started
+        rows = count_tables(url, models) - rows_before
+        results.append(
+            {
+                "stage": stage,
+                "rows": rows,
+                "seconds": round(elapsed, 3),
+                "rows_per_second": round(rows / elapsed) if elapsed else 0,
+                "peak_rss_mb": round(rss.peak / 2**20, 1),
+                "commits": commits.commits - commits_before,
+            }
+        )
+    engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Time every DataLoader stage on synthetic data"
+    )
+    parser.add_argument("-n", "--sites", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--data",
+        type=str,
+        help="directory with already generated inputs (default: generate into a temp dir)",
+    )
+    parser.add_argument(
+        "--postgres",
+        type=str,
+        help="URL of a scratch Postgres database to benchmark as well; its tables are dropped",
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--json", type=str, help="write the results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.data:
+            paths = [os.path.join(args.data, name) for name in DATA_FILES]
+        else:
+            paths = generate(os.path.join(tmp, "data"), args.sites, args.seed)
+        targets = {"sqlite": f"sqlite:///{os.path.join(tmp, 'benchmark.db')}"}
+        if args.postgres:
+            targets["postgres"] = args.postgres
+        report = {}
+        for backend, url in targets.items():
+            report[backend] = benchmark(url, paths, workers=args.workers)
+            print(f"\n{backend}")
+            print(tabulate(report[backend], headers="keys"))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,172 @@
+import json
+import os
+import re
+import sys
+import tempfile
+from typing import Optional
+## the app models go first: sqlmodel imported ahead of reflex breaks rx.Model
+from MAIRE import queries
+from MAIRE.models import Aminochange, SiteSummary
+import sqlalchemy
+import sqlmodel
+from generate_synthetic_data import generate
+from upload_data_to_database import DataLoader
+
+## lookup tables with a few dozen rows, scanning them is fine, and the
+## interval list a BED search brings along
+SMALL_TABLES = {"species", "tissue", "organ", "repeat", queries.INTERVAL_CTE}
+
+
+def page_queries(session) -> dict:
+    """Every query the pages issue, with arguments picked from the data."""
+    site = session.execute(
+        sqlalchemy.select(SiteSummary)
+        .where(SiteSummary.symbol.is_not(None), SiteSummary.symbol != " ")
+        .limit(1)
+    ).scalar_one()
+    exfun_site = session.execute(
+        sqlalchemy.select(Aminochange.rnaediting_id)
+        .where(Aminochange.rnaediting_id.is_not(None))
+        .limit(1)
+    ).scalar() or site.id
+    region = ["region", site.chromosome, site.position - 1000, site.position + 1000]
+    gene = ["gene", site.symbol]
+    key = [site.chromosome, site.position, site.id]
+    return {
+        "region count": queries.site_count(region),
+        "region count step": queries.site_key(region, 99, after=key),
+        "region count rest": queries.site_count(region, after=key),
+        "region first page": queries.site_page(region, 10),
+        "region next page": queries.site_page(region, 10, after=key),
+        "region previous page": queries.site_page(region, 10, before=key),
+        "gene count": queries.site_count(gene),
+        "gene count step": queries.site_key(gene, 99, after=key),
+        "gene count rest": queries.site_count(gene, after=key),
+        "gene first page": queries.site_page(gene, 10),
+        "gene next page": queries.site_page(gene, 10, after=key),
+        "gene previous page": queries.site_page(gene, 10, before=key),
+        "bed search": queries.interval_sites(
+            [(site.chromosome, site.position - 1000, site.position + 1000)] * 3
+        ),
+        "exfun lookup": queries.site_aminochanges(exfun_site),
+        "level vector lookup": queries.site_level_vector(site.id),
+        "gene view": queries.gene_view(site.symbol),
+        "region genes": queries.region_genes(*region[1:]),
+    }
+
+
+## "SCAN t", "SCAN TABLE t" (SQLite before 3.36) and either with "AS alias" or
+## "USING COVERING INDEX i"; "SCAN [n] CONSTANT ROW[S]" is an inline VALUES list
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(?!(?:\d+ )?CONSTANT ROWS?$)(\S+)")
+
+
+def sqlite_scanned_table(detail: str) -> Optional[str]:
+    """Table a SQLite EXPLAIN QUERY PLAN line reads in full, None for other steps."""
+    match = _SQLITE_SCAN.match(detail)
+    return match.group(1) if match else None
+
+
+def _pg_scans(plan):
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", []):
+        yield from _pg_scans(child)
+
+
+def full_scans(connection, statement, parameters) -> list:
+    """Tables `statement` reads in full, other than SMALL_TABLES."""
+    if connection.dialect.name == "postgresql":
+        plan = connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {statement}", parameters
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        tables = list(_pg_scans(plan[0]["Plan"]))
+    else:
+        tables = [
+            sqlite_scanned_table(detail)
+            for *_, detail in connection.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}", parameters
+            )
+        ]
+        tables = [table for table in tables if table is not None]
+    return [table for table in tables if table not in SMALL_TABLES]
+
+
+def check(url) -> bool:
+    """EXPLAIN every statement the page queries emit; False on a full scan.
+
+    The ORM statements are run for real and every SQL statement they send
+    (selectinload adds one per relationship) is recorded and explained. On
+    Postgres sequential scans are disabled for the session, so a seeded
+    database of any size shows a Seq Scan only where no index can be used.
+    """
+    engine = sqlalchemy.create_engine(url)
+    recorded = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith("EXPLAIN"):
+            recorded.append((statement, parameters))
+
+    valid = True
+    with engine.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.exec_driver_sql("SET enable_seqscan = off")
+        with sqlmodel.Session(bind=connection) as session:
+            statements = page_queries(session)
+            sqlalchemy.event.listen(engine, "before_cursor_execute", record)
+            try:
+                for name, statement in statements.items():
+                    recorded.clear()
+                    session.execute(statement).scalars().all()
+                    session.expunge_all()
+                    for sql, parameters in list(recorded):
+                        scans = full_scans(connection, sql, parameters)
+                        status = "FULL SCAN of " + ", ".join(scans) if scans else "ok"
+                        print(f"{name}: {status}\n    {' '.join(sql.split())}")
+                        valid = valid and not scans
+            finally:
+                sqlalchemy.event.remove(engine, "before_cursor_execute", record)
+    engine.dispose()
+    return valid
+
+
+def seed(url, n_sites, data_path):
+    """Recreate the tables at `url` and load synthetic data into them."""
+    engine = sqlmodel.create_engine(url)
+    sqlmodel.SQLModel.metadata.drop_all(engine)
+    sqlmodel.SQLModel.metadata.create_all(engine)
+    engine.dispose()
+    loader = DataLoader(url, *generate(data_path, n_sites))
+    loader._upload_gene()
+    loader._upload_repeat()
+    loader._upload_tissue()
+    loader._upload_AA_change()
+    loader._upload_edit()
+    loader._upload_levels_bulk()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Fail when a page query reads a large table without an index"
+    )
+    parser.add_argument(
+        "--url",
+        type=str,
+        help="database to check (default: a seeded temporary SQLite database)",
+    )
+    parser.add_argument(
+        "--seed",
+        action="store_true",
+        help="drop the tables at --url and load synthetic data first",
+    )
+    parser.add_argument("-n", "--sites", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.url or f"sqlite:///{os.path.join(tmp, 'plans.db')}"
+        if args.seed or not args.url:
+            seed(url, args.sites, os.path.join(tmp, "data"))
+        sys.exit(0 if check(url) else 1)
@@ -0,0 +1,161 @@
+import reflex as rx
+import io
+import pyarrow
+import pyarrow.csv
+import pyarrow.parquet
+from rxconfig import config
+from MAIRE.models import RNAediting, Tissue, EditingLevel
+from loader_utils import (
+    CHUNK_SIZE,
+    Progress,
+    copy_stream,
+    is_postgres,
+    lookup_map,
+    next_id,
+    sync_id_sequence,
+    validate_load,
+)
+from upload_level_vectors import vectors_from_editinglevel
+
+## column names and types of the TSV inputs that can be converted
+SCHEMAS = {
+    "levels": pyarrow.schema(
+        [
+            ("chromosome", pyarrow.string()),
+            ("position", pyarrow.int64()),
+            ("tissue", pyarrow.string()),
+            ("level", pyarrow.float64()),
+        ]
+    ),
+}
+LEVEL_COLUMNS = ("id", "rnaediting_id", "tissue_id", "level")
+## decompressed bytes the CSV reader parses at a time
+BLOCK_SIZE = 16 << 20
+
+
+def convert(path, output, kind="levels", compression="zstd") -> int:
+    """Convert the TSV input `path` into a typed, compressed Parquet file.
+
+    The text is parsed once, block by block, by Arrow's multithreaded CSV
+    reader; a leading "Chromosome" header line is skipped.
+    Returns the number of rows written.
+    """
+    schema = SCHEMAS[kind]
+    with open(path, "rb") as f:
+        skip_rows = 1 if f.readline().startswith(b"Chromosome") else 0
+    reader = pyarrow.csv.open_csv(
+        path,
+        read_options=pyarrow.csv.ReadOptions(
+            column_names=schema.names, skip_rows=skip_rows, block_size=BLOCK_SIZE
+        ),
+        parse_options=pyarrow.csv.ParseOptions(delimiter="\t"),
+        convert_options=pyarrow.csv.ConvertOptions(
+            column_types={field.name: field.type for field in schema}
+        ),
+    )
+    rows = 0
+    with pyarrow.parquet.ParquetWriter(
+        output, schema, compression=compression
+    ) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    print(f"converted {rows} rows of {path} to {output}")
+    return rows
+
+
+def read_batches(path, batch_size=CHUNK_SIZE, columns=None):
+    """Yield the rows of a converted Parquet file as Arrow record batches."""
+    yield from pyarrow.parquet.ParquetFile(path).iter_batches(
+        batch_size=batch_size, columns=columns
+    )
+
+
+def _key_table(mapping: dict, key_names, id_name) -> pyarrow.Table:
+    """A lookup_map dict as an Arrow table to join against."""
+    keys = list(mapping)
+    if len(key_names) == 1:
+        columns = {key_names[0]: keys}
+    else:
+        columns = {name: [key[i] for key in keys] for i, name in enumerate(key_names)}
+    columns[id_name] = list(mapping.values())
+    return pyarrow.table(columns)
+
+
+def columnar_upload_RNAediting_levels(
+    parquetfile, url=config.db_url, batch_size=CHUNK_SIZE
+) -> int:
+    """Load converted editing levels batch by batch without text parsing.
+
+    Every batch gets its ids (one per input line, as in the bulk loader) and
+    is hash joined against the site and tissue maps by Arrow. The result is
+    written as CSV into COPY on Postgres, or with executemany elsewhere, and
+    committed per batch.
+    Returns the number of rows written.
+    """
+    with rx.session(url=url) as session:
+        sites = _key_table(
+            lookup_map(session, RNAediting, "chromosome", "position"),
+            ("chromosome", "position"),
+            "rnaediting_id",
+        )
+        tissues = _key_table(lookup_map(session, Tissue, "name"), ("tissue",), "tissue_id")
+        first_id = level_id = next_id(session, EditingLevel)
+        postgres = is_postgres(session)
+        progress = Progress("editing levels (columnar)")
+        skipped = 0
+        for batch in read_batches(parquetfile, batch_size):
+            table = pyarrow.Table.from_batches([batch]).append_column(
+                "id", pyarrow.array(range(level_id, level_id + batch.num_rows))
+            )
+            level_id += batch.num_rows
+            table = table.join(sites, ["chromosome", "position"]).join(tissues, "tissue")
+            table = table.select(list(LEVEL_COLUMNS))
+            skipped += batch.num_rows - table.num_rows
+            if postgres:
+                buffer = io.BytesIO()
+                pyarrow.csv.write_csv(
+                    table,
+                    buffer,
+                    write_options=pyarrow.csv.WriteOptions(include_header=False),
+                )
+                buffer.seek(0)
+                copy_stream(
+                    session, EditingLevel.__table__.name, LEVEL_COLUMNS, buffer, "csv"
+                )
+            elif table.num_rows:
+                session.execute(EditingLevel.__table__.insert(), table.to_pylist())
+            session.commit()
+            progress.update(table.num_rows)
+        progress.done()
+        if skipped:
+            print(f"skipped {skipped} lines without a matching site or tissue")
+        sync_id_sequence(session, EditingLevel)
+        session.commit()
+        validate_load(session, [(EditingLevel, first_id, progress.rows)])
+    return progress.rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Convert loader inputs to Parquet once and load from there"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert_parser = commands.add_parser("convert", help="convert a TSV input to Parquet")
+    convert_parser.add_argument("-i", "--input", type=str, required=True)
+    convert_parser.add_argument("-o", "--output", type=str, required=True)
+    convert_parser.add_argument("--kind", choices=list(SCHEMAS), default="levels")
+    load_parser = commands.add_parser("load", help="load converted editing levels")
+    load_parser.add_argument("-i", "--editinglevelfile", type=str, required=True)
+    load_parser.add_argument("--batch-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    if args.command == "convert":
+        convert(args.input, args.output, args.kind)
+    else:
+        columnar_upload_RNAediting_levels(
+            args.editinglevelfile, batch_size=args.batch_size
+        )
+        ## the gene view and the level plot read the per-site vectors
+        vectors_from_editinglevel()
@@ -0,0 +1,179 @@
+import reflex as rx
+import contextlib
+import time
+import sqlalchemy
+import MAIRE.models  ## registers the app tables on the metadata
+from concurrent.futures import ThreadPoolExecutor
+
+## Postgres settings for the rebuild connections; every index is built with
+## one sort, which maintenance_work_mem keeps in memory as far as possible
+MAINTENANCE_WORK_MEM = "1GB"
+PARALLEL_MAINTENANCE_WORKERS = 4
+
+_PG_INDEXES = """
+SELECT c.relname, t.relname, pg_get_indexdef(i.indexrelid)
+FROM pg_index i
+JOIN pg_class c ON c.oid = i.indexrelid
+JOIN pg_class t ON t.oid = i.indrelid
+JOIN pg_namespace n ON n.oid = t.relnamespace
+WHERE n.nspname = current_schema()
+  AND t.relname = ANY(:tables)
+  AND NOT i.indisprimary
+  AND NOT EXISTS (SELECT 1 FROM pg_constraint k WHERE k.conindid = i.indexrelid)
+"""
+_PG_FOREIGN_KEYS = """
+SELECT k.conname, t.relname, pg_get_constraintdef(k.oid)
+FROM pg_constraint k
+JOIN pg_class t ON t.oid = k.conrelid
+JOIN pg_namespace n ON n.oid = t.relnamespace
+WHERE n.nspname = current_schema()
+  AND k.contype = 'f'
+  AND t.relname = ANY(:tables)
+"""
+_SQLITE_INDEXES = """
+SELECT name, tbl_name, sql FROM sqlite_master
+WHERE type = 'index' AND sql IS NOT NULL
+"""
+
+
+def load_tables() -> list:
+    """Every table of the app schema, which is what a full load writes."""
+    return list(rx.Model.metadata.tables)
+
+
+def index_definitions(connection, tables) -> dict:
+    """DDL of the secondary indexes and foreign keys on `tables`.
+
+    Definitions are read back from the database catalog so that they are
+    recreated exactly, including anything added by migrations. SQLite cannot
+    drop a foreign key without rebuilding the table and does not enforce
+    them by default, so only its indexes are deferred.
+    """
+    if connection.dialect.name == "postgresql":
+        indexes = connection.execute(
+            sqlalchemy.text(_PG_INDEXES), {"tables": list(tables)}
+        ).all()
+        foreign_keys = connection.execute(
+            sqlalchemy.text(_PG_FOREIGN_KEYS), {"tables": list(tables)}
+        ).all()
+    else:
+        indexes = [
+            row
+            for row in connection.execute(sqlalchemy.text(_SQLITE_INDEXES))
+            if row[1] in tables
+        ]
+        foreign_keys = []
+    return {
+        "indexes": [list(row) for row in indexes],
+        "foreign_keys": [list(row) for row in foreign_keys],
+    }
+
+
+def drop_definitions(connection, definitions):
+    for name, table, _ in definitions["foreign_keys"]:
+        connection.execute(
+            sqlalchemy.text(f'ALTER TABLE "{table}" DROP CONSTRAINT "{name}"')
+        )
+    for name, _, _ in definitions["indexes"]:
+        connection.execute(sqlalchemy.text(f'DROP INDEX "{name}"'))
+
+
+def _build_index(engine, ddl):
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(
+                sqlalchemy.text(f"SET maintenance_work_mem = '{MAINTENANCE_WORK_MEM}'")
+            )
+            connection.execute(
+                sqlalchemy.text(
+                    "SET max_parallel_maintenance_workers = "
+                    f"{PARALLEL_MAINTENANCE_WORKERS}"
+                )
+            )
+        connection.execute(sqlalchemy.text(ddl))
+    print(f"built in {time.perf_counter() - started:.1f}s: {ddl}")
+
+
+def _validate_foreign_keys(engine, table, names):
+    with engine.begin() as connection:
+        for name in names:
+            connection.execute(
+                sqlalchemy.text(f'ALTER TABLE "{table}" VALIDATE CONSTRAINT "{name}"')
+            )
+            print(f"validated {table}.{name}")
+
+
+def rebuild_definitions(engine, definitions, workers=4):
+    """Recreate dropped indexes and foreign keys, then ANALYZE.
+
+    Indexes are built concurrently on separate connections; Postgres lets
+    several CREATE INDEX run on one table at once. Foreign keys are added
+    NOT VALID (no scan) and then validated with one pass per table, tables
+    in parallel.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(
+            pool.map(
+                lambda ddl: _build_index(engine, ddl),
+                [ddl for _, _, ddl in definitions["indexes"]],
+            )
+        )
+    by_table = {}
+    with engine.begin() as connection:
+        for name, table, ddl in definitions["foreign_keys"]:
+            connection.execute(
+                sqlalchemy.text(
+                    f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {ddl} NOT VALID'
+                )
+            )
+            by_table.setdefault(table, []).append(name)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(
+            pool.map(
+                lambda item: _validate_foreign_keys(engine, *item), by_table.items()
+            )
+        )
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            for table in {table for _, table, _ in definitions["indexes"]} | set(
+                by_table
+            ):
+                connection.execute(sqlalchemy.text(f'ANALYZE "{table}"'))
+        else:
+            connection.execute(sqlalchemy.text("ANALYZE"))
+    print("statistics refreshed")
+
+
+@contextlib.contextmanager
+def deferred_indexes(url, journal, tables=None, workers=4):
+    """Run a bulk load without secondary indexes and foreign key checks.
+
+    The definitions are saved in `journal` before anything is dropped. If the
+    load fails they stay there, a later run does not drop again and rebuilds
+    them once it succeeds.
+    """
+    tables = tables or load_tables()
+    engine = sqlalchemy.create_engine(url, pool_size=max(workers, 5))
+    if engine.dialect.name != "postgresql":
+        ## SQLite allows a single writer
+        workers = 1
+    try:
+        definitions = journal.read("indexes")
+        if definitions is None:
+            with engine.begin() as connection:
+                definitions = index_definitions(connection, tables)
+            journal.write("indexes", definitions)
+            with engine.begin() as connection:
+                drop_definitions(connection, definitions)
+            print(
+                f"dropped {len(definitions['indexes'])} indexes and "
+                f"{len(definitions['foreign_keys'])} foreign keys for the load"
+            )
+        else:
+            print("indexes are still deferred from an earlier load")
+        yield
+        rebuild_definitions(engine, definitions, workers)
+        journal.remove("indexes")
+    finally:
+        engine.dispose()
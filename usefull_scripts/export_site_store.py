@@ -0,0 +1,130 @@
+import reflex as rx
+import array
+import glob
+import json
+import os
+import shutil
+import sys
+import time
+import uuid
+import sqlalchemy
+from rxconfig import config
+from MAIRE.models import SiteSummary
+from MAIRE.site_store import COLUMNS, META_FILE, STRING_COLUMNS, column_path
+from loader_utils import CHUNK_SIZE, Progress
+from site_statistics import dataset_version
+
+
+def _write_chromosome(target, chromosome, arrays: dict):
+    os.makedirs(os.path.join(target, chromosome))
+    for column, values in arrays.items():
+        with open(column_path(target, chromosome, column), "wb") as f:
+            values.tofile(f)
+
+
+def write_store(url, target) -> dict:
+    """Export the site summary at `url` into a new site store directory `target`.
+
+    Sites are read in (chromosome, position) order off a server-side cursor
+    and one chromosome at a time is kept in typed arrays before its column
+    files are written. Text columns are replaced by codes into per-column
+    string tables. Returns the metadata written to meta.json.
+    """
+    table = SiteSummary.__table__
+    strings = {column: [] for column in STRING_COLUMNS}
+    codes = {column: {} for column in STRING_COLUMNS}
+    chromosomes = {}
+    os.makedirs(target)
+    with rx.session(url=url) as session:
+        version = dataset_version(session)
+        result = session.execute(
+            sqlalchemy.select(table.c.chromosome, *[table.c[column] for column in COLUMNS])
+            .order_by(table.c.chromosome, table.c.position)
+            .execution_options(yield_per=CHUNK_SIZE)
+        )
+        progress = Progress("site store")
+        current, arrays = None, {}
+        for chunk in result.partitions():
+            for chromosome, *values in chunk:
+                if chromosome != current:
+                    if current is not None:
+                        _write_chromosome(target, current, arrays)
+                        chromosomes[current] = len(arrays["id"])
+                    current = chromosome
+                    arrays = {column: array.array(code) for column, code in COLUMNS.items()}
+                for column, value in zip(COLUMNS, values):
+                    if column in codes:
+                        if value not in codes[column]:
+                            codes[column][value] = len(strings[column])
+                            strings[column].append(value)
+                        value = codes[column][value]
+                    arrays[column].append(value)
+            progress.update(len(chunk))
+        if current is not None:
+            _write_chromosome(target, current, arrays)
+            chromosomes[current] = len(arrays["id"])
+        progress.done()
+    meta = {
+        "version": version,
+        "byteorder": sys.byteorder,
+        "columns": COLUMNS,
+        "strings": strings,
+        "chromosomes": chromosomes,
+    }
+    with open(os.path.join(target, META_FILE), "w") as f:
+        json.dump(meta, f)
+    return meta
+
+
+def publish(path, target):
+    """Point the symlink `path` at `target` in one rename.
+
+    Workers notice the new export within STORE_CHECK_INTERVAL; until then
+    they read the previous one, which is kept. Older exports are removed.
+    """
+    if os.path.exists(path) and not os.path.islink(path):
+        sys.exit(f"{path} exists and is not a symlink, not replacing it")
+    previous = os.path.realpath(path) if os.path.islink(path) else None
+    link = f"{path}.tmp"
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(os.path.abspath(target), link)
+    os.replace(link, path)
+    keep = {os.path.abspath(target), previous}
+    for export in glob.glob(f"{path}-*"):
+        if os.path.abspath(export) not in keep:
+            shutil.rmtree(export)
+
+
+def export(url, path) -> dict:
+    """Export the current dataset next to `path` and make it the store at `path`."""
+    ## the suffix keeps two exports of the same second apart
+    target = f"{path.rstrip('/')}-{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    meta = write_store(url, target)
+    publish(path, target)
+    print(
+        f"exported {sum(meta['chromosomes'].values())} sites of dataset version "
+        f"{meta['version']} to {target}, {path} points to it"
+    )
+    return meta
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description=(
+            "Export the sites into memory-mapped column files that region "
+            "searches read instead of the database (set MAIRE_SITE_STORE)"
+        )
+    )
+    parser.add_argument("--url", type=str, default=config.db_url)
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        required=True,
+        help="symlink to the current export, the path MAIRE_SITE_STORE names",
+    )
+    args = parser.parse_args()
+    export(args.url, args.output)
@@ -0,0 +1,275 @@
+import os
+import random
+from MAIRE.level_vector import TISSUE_ORDER
+
+## approximate macFas5 chromosome sizes in Mb, used to spread sites and genes
+CHROMOSOME_SIZES = {
+    "chr1": 227,
+    "chr2": 192,
+    "chr3": 196,
+    "chr4": 167,
+    "chr5": 187,
+    "chr6": 179,
+    "chr7": 169,
+    "chr8": 147,
+    "chr9": 133,
+    "chr10": 97,
+    "chr11": 134,
+    "chr12": 107,
+    "chr13": 138,
+    "chr14": 128,
+    "chr15": 111,
+    "chr16": 79,
+    "chr17": 95,
+    "chr18": 75,
+    "chr19": 59,
+    "chr20": 77,
+    "chrX": 153,
+    "chrY": 11,
+}
+## most primate A-to-I sites sit in Alu elements
+REPEAT_CLASSES = {
+    "SINE/Alu": 0.86,
+    "LINE/L1": 0.04,
+    "SINE/MIR": 0.02,
+    "LTR/ERVL-MaLR": 0.02,
+    "DNA/hAT-Charlie": 0.01,
+    "LINE/L2": 0.01,
+    "Simple_repeat": 0.01,
+    "-": 0.03,
+}
+REGIONS = {
+    "intronic": 0.55,
+    "UTR3": 0.2,
+    "intergenic": 0.12,
+    "ncRNA_intronic": 0.06,
+    "downstream": 0.04,
+    "exonic": 0.03,
+}
+GENE_FILE_HEADER = [
+    "Chromosome",
+    "Transcript_start",
+    "Transcript_end",
+    "Transcript_id",
+    "Strand",
+    "Gene_id",
+    "Gene_name",
+    "CDS_start",
+    "CDS_end",
+    "UTR5_start",
+    "UTR5_end",
+    "UTR3_start",
+    "UTR3_end",
+    "Gene_type",
+    "Gene_start",
+    "Gene_end",
+]
+EDITING_FILE_HEADER = [
+    "Chromosome",
+    "Position",
+    "Ref",
+    "Ed",
+    "Location",
+    "Repeat",
+    "Gene",
+    "GeneName",
+    "GenicRegion",
+    "ExFun",
+    "AminoAcidChanges",
+    "N_Samples",
+    "N_Tissues",
+    "Tissues",
+]
+## the file names DataLoader is pointed at, in its argument order
+DATA_FILES = [
+    "Gene_data_Macaque.txt",
+    "repeats.tsv",
+    "tissues.tsv",
+    "AA_changes.tsv",
+    "RNA_editing_data.txt",
+    "RE_levels.tsv",
+]
+
+
+def _weighted(rng, weights: dict):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _spread(total, weights: dict) -> dict:
+    scale = sum(weights.values())
+    return {key: max(1, round(total * value / scale)) for key, value in weights.items()}
+
+
+def generate_genes(rng, n_genes):
+    """Return genes as dicts with their transcripts and exon coordinates."""
+    genes = []
+    gene_number = 0
+    for chromosome, count in _spread(n_genes, CHROMOSOME_SIZES).items():
+        length = CHROMOSOME_SIZES[chromosome] * 1000000
+        for start in sorted(rng.sample(range(1, length - 200000), count)):
+            gene_number += 1
+            gene_end = start + rng.randint(5000, 150000)
+            transcripts = []
+            for transcript_number in range(rng.choice([1, 1, 2, 3, 5])):
+                exons = sorted(rng.sample(range(start, gene_end - 300), rng.randint(2, 12)))
+                transcripts.append(
+                    {
+                        "id": f"ENSMFAT{gene_number:08d}{transcript_number}",
+                        "exons": [(exon, exon + rng.randint(50, 300)) for exon in exons],
+                    }
+                )
+            genes.append(
+                {
+                    "chromosome": chromosome,
+                    "id": f"ENSMFAG{gene_number:011d}",
+                    "name": "NA" if rng.random() < 0.2 else f"GENE{gene_number}",
+                    "strand": rng.choice(["+", "-"]),
+                    "start": start,
+                    "end": gene_end,
+                    "transcripts": transcripts,
+                }
+            )
+    return genes
+
+
+def write_gene_file(path, genes):
+    with open(path, "w") as f:
+        f.write("\t".join(GENE_FILE_HEADER) + "\n")
+        for gene in genes:
+            for transcript in gene["transcripts"]:
+                exons = transcript["exons"]
+                for number, (exon_start, exon_end) in enumerate(exons):
+                    utr5 = ("NA", "NA")
+                    utr3 = ("NA", "NA")
+                    cds = (exon_start, exon_end)
+                    if number == 0:
+                        utr5, cds = (exon_start, exon_start + 20), ("NA", "NA")
+                    elif number == len(exons) - 1:
+                        utr3, cds = (exon_start, exon_end), ("NA", "NA")
+                    f.write(
+                        "\t".join(
+                            str(value)
+                            for value in (
+                                gene["chromosome"].removeprefix("chr"),
+                                exons[0][0],
+                                exons[-1][1],
+                                transcript["id"],
+                                gene["strand"],
+                                gene["id"],
+                                gene["name"],
+                                *cds,
+                                *utr5,
+                                *utr3,
+                                "protein_coding",
+                                gene["start"],
+                                gene["end"],
+                            )
+                        )
+                        + "\n"
+                    )
+
+
+def generate(output, n_sites, seed=0):
+    """Write all six DataLoader inputs for about `n_sites` editing sites.
+
+    Returns the paths in DataLoader argument order.
+    """
+    rng = random.Random(seed)
+    os.makedirs(output, exist_ok=True)
+    paths = [os.path.join(output, name) for name in DATA_FILES]
+    genefile, repeatfile, tissuefile, aachangefile, editingfile, levelfile = paths
+
+    genes = generate_genes(rng, max(n_sites // 200, 25))
+    write_gene_file(genefile, genes)
+    with open(repeatfile, "w") as f:
+        for repeat in REPEAT_CLASSES:
+            if repeat != "-":
+                f.write(repeat + "\n")
+    with open(tissuefile, "w") as f:
+        for tissue in TISSUE_ORDER:
+            f.write(tissue + "\n")
+
+    genes_by_chromosome = {}
+    for gene in genes:
+        genes_by_chromosome.setdefault(gene["chromosome"], []).append(gene)
+    ## every tissue is edited at its own rate, like the real atlas
+    tissue_rates = {tissue: rng.uniform(0.2, 0.9) for tissue in TISSUE_ORDER}
+    aa_changes = []
+    with open(editingfile, "w") as f, open(levelfile, "w") as levels:
+        f.write("\t".join(EDITING_FILE_HEADER) + "\n")
+        levels.write("Chromosome\tPosition\tTissue\tLevel\n")
+        for chromosome, count in _spread(n_sites, CHROMOSOME_SIZES).items():
+            length = CHROMOSOME_SIZES[chromosome] * 1000000
+            chromosome_genes = genes_by_chromosome.get(chromosome, [])
+            for position in sorted(rng.sample(range(1, length), count)):
+                repeat = _weighted(rng, REPEAT_CLASSES)
+                if repeat == "SINE/Alu":
+                    location = "ALU"
+                elif repeat == "-":
+                    location = "NONREP"
+                else:
+                    location = "REPOTH"
+                region = _weighted(rng, REGIONS)
+                gene = rng.choice(chromosome_genes) if chromosome_genes else None
+                if gene is None or region == "intergenic":
+                    gene_field, gene_name = "-", "-"
+                else:
+                    gene_field = f"{gene['id']}:{gene['transcripts'][0]['id']}"
+                    gene_name = gene["name"]
+                exfun, changes = "-", "-"
+                if region == "exonic" and gene is not None:
+                    if rng.random() < 0.5:
+                        exfun = "Synonymous"
+                    else:
+                        exfun = "Nonsynonymous"
+                        change = f"p.K{rng.randint(1, 2000)}R"
+                        changes = f"{gene['transcripts'][0]['id']}:{change}"
+                        aa_changes.append(changes)
+                tissues = [
+                    tissue
+                    for tissue in TISSUE_ORDER
+                    if rng.random() < tissue_rates[tissue] * 0.3
+                ] or [rng.choice(TISSUE_ORDER)]
+                f.write(
+                    "\t".join(
+                        str(value)
+                        for value in (
+                            chromosome,
+                            position,
+                            "A",
+                            "G",
+                            location,
+                            repeat,
+                            gene_field,
+                            gene_name,
+                            region,
+                            exfun,
+                            changes,
+                            len(tissues) * rng.randint(1, 4),
+                            len(tissues),
+                            "".join(tissue + ";" for tissue in tissues),
+                        )
+                    )
+                    + "\n"
+                )
+                for tissue in tissues:
+                    level = min(1.0, rng.betavariate(1.2, 8))
+                    levels.write(f"{chromosome}\t{position}\t{tissue}\t{level:.4f}\n")
+    with open(aachangefile, "w") as f:
+        for change in aa_changes:
+            f.write(change + "\n")
+    return paths
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Write synthetic DataLoader inputs at a configurable scale"
+    )
+    parser.add_argument("-o", "--output", type=str, required=True)
+    parser.add_argument("-n", "--sites", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for path in generate(args.output, args.sites, args.seed):
+        print(f"wrote {path}")
@@ -0,0 +1,432 @@
+import contextlib
+import hashlib
+import io
+import json
+import os
+import shutil
+import time
+import sqlalchemy
+from typing import Callable, NamedTuple, Optional, Tuple
+
+
+CHUNK_SIZE = 50000
+## upper bound of data lines per shard for the parallel loaders
+SHARD_ROWS = 1000000
+
+
+def is_postgres(session) -> bool:
+    return session.get_bind().dialect.name == "postgresql"
+
+
+def read_chunks(path, start=0, end=None, chunk_size=CHUNK_SIZE):
+    """Yield chunks of tab separated records from `path`.
+
+    Only lines between byte offsets `start` and `end` are read and header
+    lines (starting with "Chromosome") are skipped. Every chunk comes as
+    (records, offset, lines) where `offset` is the byte offset just after the
+    chunk and `lines` the number of file lines it consumed, which is what a
+    checkpoint needs to seek straight back to it.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset = start
+        chunk = []
+        lines = 0
+        for line in f:
+            if end is not None and offset >= end:
+                break
+            offset += len(line)
+            lines += 1
+            if line.startswith(b"Chromosome"):
+                continue
+            chunk.append(line.decode().strip("\n").split("\t"))
+            if len(chunk) >= chunk_size:
+                yield chunk, offset, lines
+                chunk = []
+                lines = 0
+        if chunk or lines:
+            yield chunk, offset, lines
+
+
+class Journal:
+    """Checkpoint journal of a resumable load.
+
+    The journal is a directory next to the input file (`<input>.journal`)
+    with one small JSON document per name: "run" for the ids and shards a
+    load started with and "shard-<offset>" for the progress of every shard.
+    Documents are replaced atomically after each committed chunk.
+    """
+
+    def __init__(self, input_path):
+        self.directory = input_path + ".journal"
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"{name}.json")
+
+    def read(self, name) -> Optional[dict]:
+        try:
+            with open(self._path(name), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def write(self, name, state: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._path(name) + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._path(name))
+
+    def remove(self, name):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self._path(name))
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class Shard(NamedTuple):
+    """A byte range of an input file holding lines of a single chromosome.
+
+    `before` holds the per-counter row totals of all lines ahead of the shard,
+    which gives every worker a deterministic first id; `sizes` holds the
+    totals inside the shard for the final validation.
+    """
+
+    start: int
+    end: int
+    chromosome: str
+    before: Tuple[int, ...]
+    sizes: Tuple[int, ...]
+
+
+def scan_shards(
+    path,
+    counter: Callable[[list], Tuple[int, ...]],
+    max_rows: int = SHARD_ROWS,
+) -> list:
+    """Pre-scan `path` and split it into shards at line boundaries.
+
+    A new shard starts whenever the chromosome (first column) changes or the
+    current shard holds `max_rows` data lines. `counter` returns, for one
+    record, how many rows it produces in each target table.
+    """
+    shards = []
+    totals: Optional[list] = None
+    sizes: Optional[list] = None
+    start = 0
+    offset = 0
+    rows = 0
+    chromosome = None
+    with open(path, "rb") as f:
+        for line in f:
+            if line.startswith(b"Chromosome"):
+                offset += len(line)
+                if chromosome is None:
+                    start = offset
+                continue
+            fields = line.decode().strip("\n").split("\t")
+            counts = counter(fields)
+            if totals is None:
+                totals = [0] * len(counts)
+                sizes = [0] * len(counts)
+            if chromosome is not None and (
+                fields[0] != chromosome or rows >= max_rows
+            ):
+                shards.append(
+                    Shard(start, offset, chromosome, tuple(totals), tuple(sizes))
+                )
+                totals = [total + size for total, size in zip(totals, sizes)]
+                sizes = [0] * len(counts)
+                start = offset
+                rows = 0
+            chromosome = fields[0]
+            sizes = [size + count for size, count in zip(sizes, counts)]
+            rows += 1
+            offset += len(line)
+    if chromosome is not None:
+        shards.append(Shard(start, offset, chromosome, tuple(totals), tuple(sizes)))
+    return shards
+
+
+def chromosome_ranges(path) -> dict:
+    """Byte ranges of `path` grouped by chromosome."""
+    ranges = {}
+    for shard in scan_shards(path, lambda fields: (1,)):
+        ranges.setdefault(shard.chromosome, []).append((shard.start, shard.end))
+    return ranges
+
+
+def read_chromosome(path, ranges):
+    for start, end in ranges:
+        for chunk, _, _ in read_chunks(path, start, end):
+            yield from chunk
+
+
+def run_shards(worker, tasks, workers):
+    """Run `worker(*task)` for every task in a pool of `workers` processes.
+
+    Results are returned in task order. Workers are spawned rather than
+    forked so that none of them inherits the parent's database connections.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [pool.submit(worker, *task) for task in tasks]
+        return [future.result() for future in futures]
+
+
+def lookup_map(session, model, *key_fields, where=None) -> dict:
+    """Map the natural key of every row in `model` to its primary key.
+
+    With a single key field the dict keys are plain values, otherwise tuples.
+    Rows are read in id order and the first id wins, the same row the old
+    `.first()` lookups returned. `where` optionally restricts the rows.
+    """
+    columns = [getattr(model, field) for field in key_fields]
+    statement = (
+        sqlalchemy.select(model.id, *columns)
+        .order_by(model.id)
+        .execution_options(yield_per=CHUNK_SIZE)
+    )
+    if where is not None:
+        statement = statement.where(where)
+    mapping = {}
+    for row in session.execute(statement):
+        key = row[1] if len(key_fields) == 1 else tuple(row[1:])
+        mapping.setdefault(key, row[0])
+    return mapping
+
+
+def _copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+    )
+
+
+def _copy_rows(session, table_name, columns, rows):
+    column_list = ", ".join(columns)
+    sql = f"COPY {table_name} ({column_list}) FROM STDIN"
+    dbapi_connection = session.connection().connection.dbapi_connection
+    with dbapi_connection.cursor() as cursor:
+        if hasattr(cursor, "copy_expert"):
+            ## psycopg2
+            buffer = io.StringIO()
+            for row in rows:
+                buffer.write("\t".join(_copy_value(value) for value in row))
+                buffer.write("\n")
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+        else:
+            ## psycopg (3)
+            with cursor.copy(sql) as copy:
+                for row in rows:
+                    copy.write_row(row)
+
+
+def copy_stream(session, table_name, columns, stream, format="text"):
+    """COPY the bytes of the file object `stream` into `table_name` (Postgres only).
+
+    `format` is the COPY format of the data, "text" (tab separated) or "csv".
+    """
+    column_list = ", ".join(columns)
+    sql = f"COPY {table_name} ({column_list}) FROM STDIN WITH (FORMAT {format})"
+    dbapi_connection = session.connection().connection.dbapi_connection
+    with dbapi_connection.cursor() as cursor:
+        if hasattr(cursor, "copy_expert"):
+            ## psycopg2
+            cursor.copy_expert(sql, stream)
+        else:
+            ## psycopg (3)
+            with cursor.copy(sql) as copy:
+                while data := stream.read(1 << 20):
+                    copy.write(data)
+
+
+def copy_file(session, table_name, columns, path):
+    """COPY a tab separated file straight into `table_name` (Postgres only).
+
+    A leading header line (starting with "Chromosome") is skipped; the rest
+    of the file is streamed to the server without being parsed in Python.
+    """
+    with open(path, "rb") as f:
+        if not f.readline().startswith(b"Chromosome"):
+            f.seek(0)
+        copy_stream(session, table_name, columns, f)
+
+
+def insert_rows(session, model, columns, rows):
+    """Bulk write `rows` (tuples in `columns` order) into the table of `model`.
+
+    Uses COPY on Postgres and falls back to an executemany INSERT elsewhere
+    (SQLite). The rows become part of the session transaction.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    if is_postgres(session):
+        _copy_rows(session, table.name, columns, rows)
+    else:
+        session.execute(
+            table.insert(), [dict(zip(columns, row)) for row in rows]
+        )
+
+
+class Progress:
+    """Print row counts and throughput while a loader runs."""
+
+    def __init__(self, label):
+        self.label = label
+        self.rows = 0
+        self.started = time.perf_counter()
+
+    @property
+    def rate(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def update(self, rows):
+        self.rows += rows
+        print(f"{self.label}: loaded {self.rows} rows ({self.rate:.0f} rows/s)")
+
+    def done(self):
+        elapsed = time.perf_counter() - self.started
+        print(
+            f"{self.label}: finished {self.rows} rows in {elapsed:.1f}s "
+            f"({self.rate:.0f} rows/s)"
+        )
+
+
+def next_id(session, model) -> int:
+    """First free primary key of `model`, for loaders that assign ids themselves."""
+    current = session.execute(
+        sqlalchemy.select(sqlalchemy.func.max(model.id))
+    ).scalar()
+    return (current or 0) + 1
+
+
+def sync_id_sequence(session, model):
+    """Move the Postgres id sequence past ids that were inserted explicitly."""
+    if not is_postgres(session):
+        return
+    table_name = model.__table__.name
+    session.execute(
+        sqlalchemy.text(
+            f"SELECT setval(pg_get_serial_sequence('{table_name}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {table_name}), 0) + 1, false)"
+        )
+    )
+
+
+def validate_load(session, expected) -> bool:
+    """Check that each table holds the rows the shards reported.
+
+    `expected` is a list of (model, first_id, loaded_rows) tuples; every row
+    with an id from `first_id` on must have come from this load.
+    """
+    valid = True
+    for model, first_id, loaded in expected:
+        found = session.execute(
+            sqlalchemy.select(sqlalchemy.func.count())
+            .select_from(model)
+            .where(model.id >= first_id)
+        ).scalar()
+        table_name = model.__table__.name
+        if found != loaded:
+            valid = False
+            print(f"{table_name}: expected {loaded} new rows, found {found}")
+        else:
+            print(f"{table_name}: {found} new rows validated")
+    return valid
+
+
+def discard_uncommitted(session, model, first_id, end_id=None) -> int:
+    """Delete the rows of `model` with ids from `first_id` up to `end_id` (exclusive).
+
+    A chunk is committed before its checkpoint is journaled, so a crash in
+    between leaves rows the journal does not know about. A shard calls this
+    with its checkpointed next id before it continues; the replayed chunk
+    then gets the same ids without conflicting. `end_id` None means every
+    later id belongs to the shard. Returns the number of rows deleted.
+    """
+    table = model.__table__
+    where = table.c.id >= first_id
+    if end_id is not None:
+        where = where & (table.c.id < end_id)
+    return session.execute(table.delete().where(where)).rowcount
+
+
+def start_run(journal, resume, fresh) -> dict:
+    """Return the state a load runs with.
+
+    When resuming, the state is taken from the journal so the load continues
+    with the ids and shards it started with. Otherwise the journal is cleared
+    and `fresh()` computes a new state, which is journaled before any row is
+    written.
+    """
+    if resume:
+        state = journal.read("run")
+        if state is not None:
+            print(f"resuming load from {journal.directory}")
+            return state
+        print(f"no journal in {journal.directory}, starting a new load")
+    journal.clear()
+    state = fresh()
+    journal.write("run", state)
+    return state
+
+
+def upsert_rows(session, model, columns, rows, conflict_columns):
+    """Insert `rows`, updating rows whose `conflict_columns` already exist.
+
+    Emits INSERT ... ON CONFLICT DO UPDATE, on Postgres and SQLite alike. The
+    conflict columns need a unique index; the id of an existing row is kept.
+    Postgres refuses a statement that touches the same row twice, so of rows
+    sharing their conflict columns only the last one is written.
+    """
+    if not rows:
+        return
+    key_indexes = [columns.index(column) for column in conflict_columns]
+    latest = {}
+    for row in rows:
+        latest[tuple(row[index] for index in key_indexes)] = row
+    rows = list(latest.values())
+    if is_postgres(session):
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    statement = insert(model.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(conflict_columns),
+        set_={
+            column: statement.excluded[column]
+            for column in columns
+            if column not in conflict_columns and column != "id"
+        },
+    )
+    session.execute(statement, [dict(zip(columns, row)) for row in rows])
+
+
+def delete_ids(session, model, ids, column="id"):
+    """Delete the rows of `model` whose `column` is in `ids`, in batches."""
+    ids = list(ids)
+    table = model.__table__
+    for start in range(0, len(ids), CHUNK_SIZE):
+        session.execute(
+            table.delete().where(table.c[column].in_(ids[start : start + CHUNK_SIZE]))
+        )
+
+
+def row_digest(*values) -> bytes:
+    """Short hash of a row's values, to tell changed rows from unchanged ones."""
+    text = "\t".join("" if value is None else str(value) for value in values)
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
@@ -0,0 +1,73 @@
+import reflex as rx
+import sqlalchemy
+from rxconfig import config
+from MAIRE.models import Statistic
+
+## kind -> query yielding (name, count); sitesummary already has the repeat
+## class of every site joined in
+STATISTICS = {
+    "tissue": """
+        SELECT t.name, count(*) FROM rnaeditingtissuelink l
+        JOIN tissue t ON t.id = l.tissue_id GROUP BY t.name
+    """,
+    "chromosome": "SELECT chromosome, count(*) FROM sitesummary GROUP BY chromosome",
+    "repeatclass": """
+        SELECT COALESCE(repeatclass, '-'), count(*) FROM sitesummary
+        GROUP BY COALESCE(repeatclass, '-')
+    """,
+    "region": "SELECT region, count(*) FROM sitesummary GROUP BY region",
+}
+
+
+def refresh_statistics(session) -> int:
+    """Recount the index page statistics and stamp a dataset version; the caller commits."""
+    table_name = Statistic.__table__.name
+    session.execute(sqlalchemy.text(f"DELETE FROM {table_name} WHERE kind <> 'dataset'"))
+    rows = 0
+    for kind, query in STATISTICS.items():
+        rows += session.execute(
+            sqlalchemy.text(
+                f"INSERT INTO {table_name} (kind, name, count) "
+                f"SELECT CAST(:kind AS VARCHAR), counts.* FROM ({query}) AS counts"
+            ),
+            {"kind": kind},
+        ).rowcount
+    stamp_dataset_version(session)
+    return rows + 1
+
+
+def _version_clause():
+    table = Statistic.__table__
+    return sqlalchemy.and_(table.c.kind == "dataset", table.c.name == "version")
+
+
+def dataset_version(session) -> int:
+    """The stored dataset version, 0 when there is none."""
+    return session.execute(
+        sqlalchemy.select(Statistic.__table__.c.count).where(_version_clause())
+    ).scalar() or 0
+
+
+def stamp_dataset_version(session, previous: int = 0) -> int:
+    """Count the dataset version up by one and return it; the caller commits.
+
+    A new version on every load or clear moves the search cache and the site
+    store onto fresh keys, so nothing keeps serving the previous data. The
+    increment is a single UPDATE, so concurrent loads never share a version.
+    Without a stored version it starts after `previous`, the version a caller
+    read before emptying the table.
+    """
+    table = Statistic.__table__
+    updated = session.execute(
+        sqlalchemy.update(table).where(_version_clause()).values(count=table.c.count + 1)
+    ).rowcount
+    if not updated:
+        session.add(Statistic(kind="dataset", name="version", count=previous + 1))
+        session.flush()
+    return dataset_version(session)
+
+
+if __name__ == "__main__":
+    with rx.session(url=config.db_url) as session:
+        print(f"statistics: {refresh_statistics(session)} rows")
+        session.commit()
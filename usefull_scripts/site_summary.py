@@ -0,0 +1,64 @@
+import reflex as rx
+import sqlalchemy
+from rxconfig import config
+from MAIRE.models import SiteSummary
+from loader_utils import Progress, is_postgres
+
+SUMMARY_COLUMNS = (
+    "id",
+    "chromosome",
+    "position",
+    "ref",
+    "alt",
+    "location",
+    "repeatclass",
+    "symbol",
+    "region",
+    "exfun",
+    "samplenumbers",
+    "tissuenumbers",
+)
+_SUMMARY_SELECT = """
+SELECT r.id, r.chromosome, r.position, r.ref, r.alt, r.location,
+       p.repeatclass, g.symbol, r.region, r.exfun, r.samplenumbers, r.tissuenumbers
+FROM rnaediting r
+LEFT JOIN repeat p ON p.id = r.repeat_id
+LEFT JOIN gene g ON g.id = r.gene_id
+"""
+
+
+def refresh_site_summary(session, chromosome=None) -> int:
+    """Rebuild the search grid rows of all sites, or of one chromosome.
+
+    The summary is written with one INSERT ... SELECT in (chromosome,
+    position) order, so region searches read contiguous pages. The caller
+    commits. Returns the number of rows written.
+    """
+    table_name = SiteSummary.__table__.name
+    if chromosome is None:
+        if is_postgres(session):
+            session.execute(sqlalchemy.text(f"TRUNCATE {table_name}"))
+        else:
+            session.execute(sqlalchemy.text(f"DELETE FROM {table_name}"))
+        where = ""
+    else:
+        session.execute(
+            sqlalchemy.text(f"DELETE FROM {table_name} WHERE chromosome = :chromosome"),
+            {"chromosome": chromosome},
+        )
+        where = "WHERE r.chromosome = :chromosome"
+    return session.execute(
+        sqlalchemy.text(
+            f"INSERT INTO {table_name} ({', '.join(SUMMARY_COLUMNS)}) "
+            f"{_SUMMARY_SELECT} {where} ORDER BY r.chromosome, r.position"
+        ),
+        {"chromosome": chromosome},
+    ).rowcount
+
+
+if __name__ == "__main__":
+    progress = Progress("site summary")
+    with rx.session(url=config.db_url) as session:
+        progress.update(refresh_site_summary(session))
+        session.commit()
+    progress.done()
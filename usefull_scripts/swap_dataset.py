@@ -0,0 +1,263 @@
+import reflex as rx
+import os
+import sys
+import sqlalchemy
+from rxconfig import config
+from deferred_indexes import deferred_indexes, load_tables
+from generate_synthetic_data import DATA_FILES
+from loader_utils import Journal
+from upload_data_to_database import DataLoader
+
+## the live dataset is whatever sits in the schema the app resolves tables in
+LIVE_SCHEMA = "public"
+SHADOW_SCHEMA = "maire_shadow"
+PREVIOUS_SCHEMA = "maire_previous"
+## how long the swap waits for queries holding locks on the live tables
+LOCK_TIMEOUT = "10s"
+## tables a usable dataset can not be without
+REQUIRED_TABLES = (
+    "gene",
+    "tissue",
+    "rnaediting",
+    "rnaeditingtissuelink",
+    "editinglevel",
+    "sitesummary",
+)
+
+
+def schema_url(url, schema) -> str:
+    """`url` with every connection resolving table names in `schema`."""
+    url = sqlalchemy.engine.make_url(url)
+    return url.update_query_dict(
+        {"options": f"-csearch_path={schema}"}
+    ).render_as_string(hide_password=False)
+
+
+def _engine(url):
+    engine = sqlalchemy.create_engine(url)
+    if engine.dialect.name != "postgresql":
+        sys.exit("dataset swaps need Postgres schemas, use clear_all_tables on SQLite")
+    return engine
+
+
+def _schema_exists(connection, schema) -> bool:
+    return connection.execute(
+        sqlalchemy.text("SELECT 1 FROM pg_namespace WHERE nspname = :schema"),
+        {"schema": schema},
+    ).first() is not None
+
+
+def table_counts(connection, schema) -> dict:
+    return {
+        table: connection.execute(
+            sqlalchemy.text(f'SELECT count(*) FROM "{schema}"."{table}"')
+        ).scalar()
+        for table in load_tables()
+    }
+
+
+def index_names(connection, schema) -> set:
+    return set(
+        connection.execute(
+            sqlalchemy.text("SELECT indexname FROM pg_indexes WHERE schemaname = :schema"),
+            {"schema": schema},
+        ).scalars()
+    )
+
+
+def _version(connection, schema) -> int:
+    if not connection.execute(
+        sqlalchemy.text("SELECT to_regclass(:table)"), {"table": f"{schema}.statistic"}
+    ).scalar():
+        return 0
+    return connection.execute(
+        sqlalchemy.text(
+            f'SELECT count FROM "{schema}".statistic '
+            "WHERE kind = 'dataset' AND name = 'version'"
+        )
+    ).scalar() or 0
+
+
+def count_on_version(connection, source, target):
+    """Give the dataset in `target` a version above the ones of both schemas.
+
+    Versions key the search cache and the site store, so they must never
+    repeat, whichever dataset is live; loads count up from there.
+    """
+    version = max(_version(connection, source), _version(connection, target)) + 1
+    connection.execute(
+        sqlalchemy.text(
+            f'DELETE FROM "{target}".statistic '
+            "WHERE kind = 'dataset' AND name = 'version'"
+        )
+    )
+    connection.execute(
+        sqlalchemy.text(
+            f'INSERT INTO "{target}".statistic (kind, name, count) '
+            "VALUES ('dataset', 'version', :version)"
+        ),
+        {"version": version},
+    )
+
+
+def prepare(url):
+    """Create an empty shadow schema with the current app tables."""
+    engine = _engine(url)
+    with engine.begin() as connection:
+        connection.execute(sqlalchemy.text(f'DROP SCHEMA IF EXISTS "{SHADOW_SCHEMA}" CASCADE'))
+        connection.execute(sqlalchemy.text(f'CREATE SCHEMA "{SHADOW_SCHEMA}"'))
+        connection.execute(sqlalchemy.text(f'SET LOCAL search_path TO "{SHADOW_SCHEMA}"'))
+        rx.Model.metadata.create_all(connection)
+        ## keep the migration head so `reflex db migrate` sees an up to date schema
+        if connection.execute(
+            sqlalchemy.text("SELECT to_regclass(:table)"),
+            {"table": f"{LIVE_SCHEMA}.alembic_version"},
+        ).scalar():
+            connection.execute(
+                sqlalchemy.text(
+                    f'CREATE TABLE "{SHADOW_SCHEMA}".alembic_version AS '
+                    f'SELECT * FROM "{LIVE_SCHEMA}".alembic_version'
+                )
+            )
+        count_on_version(connection, LIVE_SCHEMA, SHADOW_SCHEMA)
+    engine.dispose()
+    print(f"created schema {SHADOW_SCHEMA}")
+
+
+def load(url, data_path, workers=1):
+    """Run every loader stage against the shadow schema."""
+    shadow_url = schema_url(url, SHADOW_SCHEMA)
+    paths = [os.path.join(data_path, name) for name in DATA_FILES]
+    loader = DataLoader(shadow_url, *paths)
+    ## nothing reads the shadow tables yet, so indexes are built once at the end
+    with deferred_indexes(
+        shadow_url, Journal(loader.editingfile + ".indexes"), workers=max(workers, 1)
+    ):
+        print("load gene annotations")
+        loader._upload_gene()
+        print("load repeat annotations")
+        loader._upload_repeat()
+        print("load tissues")
+        loader._upload_tissue()
+        print("load aminoacid changes")
+        loader._upload_AA_change()
+        print("load RNA editing")
+        loader._upload_edit(workers=workers)
+        print("load editing levels")
+        loader._upload_levels_bulk(workers=workers)
+    loader._cluster_sites()
+    print(f"dataset loaded into {SHADOW_SCHEMA}")
+
+
+def validate(url, max_shrink=0.5) -> bool:
+    """Compare the shadow dataset with the live one before it is swapped in.
+
+    Every required table must have rows, no table may lose more than
+    `max_shrink` of its live rows and every live index must exist in the
+    shadow schema as well.
+    """
+    engine = _engine(url)
+    valid = True
+    with engine.connect() as connection:
+        if not _schema_exists(connection, SHADOW_SCHEMA):
+            print(f"schema {SHADOW_SCHEMA} does not exist, run prepare and load first")
+            return False
+        shadow = table_counts(connection, SHADOW_SCHEMA)
+        live = table_counts(connection, LIVE_SCHEMA)
+        for table, rows in shadow.items():
+            print(f"{table}: {live[table]} live rows, {rows} shadow rows")
+            if table in REQUIRED_TABLES and rows == 0:
+                print(f"  {table} is empty")
+                valid = False
+            elif rows < live[table] * (1 - max_shrink):
+                print(f"  {table} shrinks by more than {max_shrink:.0%}")
+                valid = False
+        missing = index_names(connection, LIVE_SCHEMA) - index_names(
+            connection, SHADOW_SCHEMA
+        )
+        for name in sorted(missing):
+            print(f"index {name} is missing from {SHADOW_SCHEMA}")
+            valid = False
+    engine.dispose()
+    print("shadow dataset is valid" if valid else "shadow dataset is NOT valid")
+    return valid
+
+
+def _rename_schemas(url, renames, drop=None):
+    """Apply schema renames in one transaction, so readers see old or new data only."""
+    engine = _engine(url)
+    with engine.begin() as connection:
+        if drop is not None:
+            connection.execute(sqlalchemy.text(f'DROP SCHEMA IF EXISTS "{drop}" CASCADE'))
+    with engine.begin() as connection:
+        ## give up rather than queue every app query behind the renames
+        connection.execute(sqlalchemy.text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+        for old, new in renames:
+            if not _schema_exists(connection, old):
+                sys.exit(f"schema {old} does not exist, nothing was changed")
+            connection.execute(sqlalchemy.text(f'ALTER SCHEMA "{old}" RENAME TO "{new}"'))
+    engine.dispose()
+
+
+def swap(url):
+    """Make the shadow dataset live and keep the old one for a rollback."""
+    _rename_schemas(
+        url,
+        [(LIVE_SCHEMA, PREVIOUS_SCHEMA), (SHADOW_SCHEMA, LIVE_SCHEMA)],
+        drop=PREVIOUS_SCHEMA,
+    )
+    print(f"the new dataset is live, the old one is kept in {PREVIOUS_SCHEMA}")
+
+
+def rollback(url):
+    """Bring the previous dataset back; the replaced one moves to the shadow schema."""
+    _rename_schemas(
+        url,
+        [(LIVE_SCHEMA, SHADOW_SCHEMA), (PREVIOUS_SCHEMA, LIVE_SCHEMA)],
+        drop=SHADOW_SCHEMA,
+    )
+    ## the next load must not reuse the replaced dataset's version
+    engine = _engine(url)
+    with engine.begin() as connection:
+        count_on_version(connection, SHADOW_SCHEMA, LIVE_SCHEMA)
+    engine.dispose()
+    print(f"the previous dataset is live again, the replaced one is in {SHADOW_SCHEMA}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description=(
+            "Reload the database without downtime: load a shadow schema while "
+            "the app keeps serving, then swap it in with one transaction"
+        )
+    )
+    parser.add_argument("--url", type=str, default=config.db_url)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("prepare", help=f"create an empty {SHADOW_SCHEMA} schema")
+    load_parser = commands.add_parser("load", help=f"load the data files into {SHADOW_SCHEMA}")
+    load_parser.add_argument("-d", "--data", type=str, required=True)
+    load_parser.add_argument("--workers", type=int, default=1)
+    validate_parser = commands.add_parser("validate", help="compare shadow and live data")
+    validate_parser.add_argument("--max-shrink", type=float, default=0.5)
+    swap_parser = commands.add_parser("swap", help="validate and make the shadow data live")
+    swap_parser.add_argument("--max-shrink", type=float, default=0.5)
+    swap_parser.add_argument(
+        "--force", action="store_true", help="swap even if validation fails"
+    )
+    commands.add_parser("rollback", help="make the previous data live again")
+    args = parser.parse_args()
+
+    if args.command == "prepare":
+        prepare(args.url)
+    elif args.command == "load":
+        load(args.url, args.data, workers=args.workers)
+    elif args.command == "validate":
+        sys.exit(0 if validate(args.url, args.max_shrink) else 1)
+    elif args.command == "swap":
+        if not validate(args.url, args.max_shrink) and not args.force:
+            sys.exit("not swapping an invalid dataset, use --force to override")
+        swap(args.url)
+    elif args.command == "rollback":
+        rollback(args.url)
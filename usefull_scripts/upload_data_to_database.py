@@ -13,10 +13,262 @@ from MAIRE.models import (
     Organ,
     EditingLevel,
 )
+from MAIRE.genomic_bins import bin_from_range
 from rxconfig import config
+from upload_levels import bulk_upload_RNAediting_levels
+from deferred_indexes import deferred_indexes
+from site_summary import refresh_site_summary
+from site_statistics import dataset_version, refresh_statistics, stamp_dataset_version
+from upload_level_vectors import vectors_from_editinglevel
+from loader_utils import (
+    CHUNK_SIZE,
+    Journal,
+    Progress,
+    Shard,
+    discard_uncommitted,
+    insert_rows,
+    is_postgres,
+    lookup_map,
+    next_id,
+    read_chunks,
+    run_shards,
+    scan_shards,
+    start_run,
+    sync_id_sequence,
+    validate_load,
+)
 import sqlalchemy
+import contextlib
 import os
 
+RNAEDITING_COLUMNS = (
+    "id",
+    "chromosome",
+    "position",
+    "ref",
+    "alt",
+    "location",
+    "repeat_id",
+    "gene_id",
+    "region",
+    "exfun",
+    "samplenumbers",
+    "tissuenumbers",
+)
+GENE_COLUMNS = (
+    "id",
+    "chromosome",
+    "start",
+    "end",
+    "bin",
+    "strand",
+    "symbol",
+    "ensembly_id",
+    "species_id",
+)
+TRANSCRIPT_COLUMNS = (
+    "id",
+    "transcript_id",
+    "chromosome",
+    "start",
+    "end",
+    "bin",
+    "transcript_type",
+    "gene_id",
+)
+## Cds and Utr share their columns
+FEATURE_COLUMNS = ("id", "chromosome", "start", "end", "bin", "transcript_id")
+
+
+def editing_counter(fields):
+    """Rows one RNA_editing_data.txt record produces: (sites, tissue links)."""
+    repeat, aminoAcidChanges, tissues = fields[5], fields[10], fields[13]
+    if "," in repeat or ";" in aminoAcidChanges:
+        return (0, 0)
+    if tissues == "-":
+        return (1, 0)
+    return (1, sum(1 for tissue in tissues.split(";") if tissue != ""))
+
+
+def reference_maps(session) -> dict:
+    """Natural key -> id maps of the reference tables an editing record uses.
+
+    These tables are small and fixed during a load.
+    """
+    return {
+        "repeat": lookup_map(session, Repeat, "repeatclass"),
+        "gene": lookup_map(session, Gene, "ensembly_id"),
+        "aminochange": lookup_map(session, Aminochange, "change"),
+        "transcript": lookup_map(session, Transcript, "transcript_id"),
+        "tissue": lookup_map(session, Tissue, "name"),
+    }
+
+
+def parse_editing_record(fields, maps):
+    """Resolve one RNA_editing_data.txt record against `reference_maps`.
+
+    Returns None for records that are not loaded, otherwise a tuple of
+    (site values in RNAEDITING_COLUMNS order without the id, tissue ids with
+    None for unknown tissues, (aminochange id, transcript id) pairs).
+    """
+    (
+        chromosome,
+        position,
+        ref,
+        ed,
+        location,
+        repeat,
+        gene,
+        geneName,
+        genicRegion,
+        exFun,
+        aminoAcidChanges,
+        n_Samples,
+        n_Tissues,
+        tissues,
+    ) = fields
+    if "," in repeat or ";" in aminoAcidChanges:
+        return None
+    location = "REP" if location != "NONREP" else location
+    repeat_id = None if repeat == "-" else maps["repeat"].get(repeat)
+    if gene == "-":
+        gene_id = None
+    else:
+        gene_id = maps["gene"].get(gene.split(":")[0])
+    changes = []
+    if aminoAcidChanges != "-":
+        for aminoAcidChange in aminoAcidChanges.split(";"):
+            if ":" in aminoAcidChange:
+                trans, acidchange = aminoAcidChange.split(":")
+                aminochange_id = maps["aminochange"].get(acidchange)
+                if aminochange_id is not None:
+                    changes.append((aminochange_id, maps["transcript"].get(trans)))
+            else:
+                print("aminoAcidChange is", aminoAcidChange)
+    tissue_ids = []
+    if tissues != "-":
+        tissue_ids = [
+            maps["tissue"].get(tissue) for tissue in tissues.split(";") if tissue != ""
+        ]
+    site = (
+        chromosome,
+        int(position),
+        ref,
+        ed,
+        location,
+        repeat_id,
+        gene_id,
+        genicRegion,
+        exFun,
+        int(n_Samples),
+        int(n_Tissues),
+    )
+    return site, tissue_ids, changes
+
+
+def load_editing_shard(
+    url,
+    editingfile,
+    start,
+    end,
+    site_id,
+    link_id,
+    chunk_size=CHUNK_SIZE,
+    journal=None,
+    site_end=None,
+    link_end=None,
+):
+    """Load the lines of `editingfile` between byte offsets `start` and `end`.
+
+    Site and tissue link ids are handed out from `site_id` and `link_id` in
+    file order, so a shard gets the same ids whichever process loads it;
+    `site_end` and `link_end` are the first ids of the next shard (None for
+    the last one). Progress is checkpointed to `journal` after every commit,
+    and a shard with a checkpoint continues from its last committed chunk
+    after deleting rows committed past the checkpoint.
+    Returns the number of rows written per table and the aminochange updates,
+    which the caller applies once all shards are in.
+    """
+    name = f"shard-{start}"
+    state = journal.read(name) if journal is not None else None
+    if state is None:
+        state = {
+            "offset": start,
+            "line": 0,
+            "site_id": site_id,
+            "link_id": link_id,
+            "counts": {"rnaediting": 0, "rnaeditingtissuelink": 0},
+            "aminochanges": [],
+            "done": False,
+        }
+    elif state["done"]:
+        return state["counts"], state["aminochanges"]
+    else:
+        print(f"shard {start}: resuming at byte {state['offset']}, line {state['line']}")
+    site_id = state["site_id"]
+    link_id = state["link_id"]
+    counts = state["counts"]
+    aminochanges = state["aminochanges"]
+    with rx.session(url=url) as session:
+        if journal is not None:
+            ## links first, they reference the sites
+            discarded = discard_uncommitted(
+                session, RNAeditingtissuelink, link_id, link_end
+            ) + discard_uncommitted(session, RNAediting, site_id, site_end)
+            session.commit()
+            if discarded:
+                print(f"shard {start}: removed {discarded} rows committed past the checkpoint")
+        maps = reference_maps(session)
+        progress = Progress(f"RNA editing [{start}:{end}]")
+        for chunk, offset, lines in read_chunks(
+            editingfile, state["offset"], end, chunk_size
+        ):
+            sites = []
+            links = []
+            for fields in chunk:
+                record = parse_editing_record(fields, maps)
+                if record is None:
+                    continue
+                site, tissue_ids, changes = record
+                sites.append((site_id, *site))
+                ## the id is consumed even for unknown tissues so that it
+                ## matches editing_counter
+                for tissue_id in tissue_ids:
+                    if tissue_id is not None:
+                        links.append((link_id, site_id, tissue_id))
+                    link_id += 1
+                for aminochange_id, trans_id in changes:
+                    aminochanges.append(
+                        {
+                            "aminochange_id": aminochange_id,
+                            "site_id": site_id,
+                            "trans_id": trans_id,
+                        }
+                    )
+                site_id += 1
+            insert_rows(session, RNAediting, RNAEDITING_COLUMNS, sites)
+            insert_rows(
+                session,
+                RNAeditingtissuelink,
+                ("id", "rnaediting_id", "tissue_id"),
+                links,
+            )
+            session.commit()
+            counts["rnaediting"] += len(sites)
+            counts["rnaeditingtissuelink"] += len(links)
+            state["offset"] = offset
+            state["line"] += lines
+            state["site_id"] = site_id
+            state["link_id"] = link_id
+            if journal is not None:
+                journal.write(name, state)
+            progress.update(len(sites))
+        progress.done()
+    state["done"] = True
+    if journal is not None:
+        journal.write(name, state)
+    return counts, aminochanges
+
 
 class DataLoader:
     def __init__(
@@ -37,14 +289,37 @@ class DataLoader:
         self.editingfile = editingfile
         self.editinglevelfile = editinglevelfile
 
-    def _upload_gene(self):
+    def _upload_gene(self, chunk_size=CHUNK_SIZE):
+        """Stream the gene annotation into flat rows with loader-assigned ids.
+
+        Rows are buffered per table and written in batches (parents first),
+        so memory stays flat however large the annotation is.
+        """
         with rx.session(url=self.url) as session:
-            # 清空数据库
-            with open(self.genefile, "r") as f:
-                current_gene = None
-                current_transcript = None
-                human = Species(name="Macaca_fascicularis")
+            species_id = next_id(session, Species)
+            gene_id = next_id(session, Gene) - 1
+            transcript_id_db = next_id(session, Transcript) - 1
+            cds_id = next_id(session, Cds)
+            utr_id = next_id(session, Utr)
+            insert_rows(
+                session, Species, ("id", "name"), [(species_id, "Macaca_fascicularis")]
+            )
+            buffers = {Gene: [], Transcript: [], Cds: [], Utr: []}
 
+            def flush():
+                insert_rows(session, Gene, GENE_COLUMNS, buffers[Gene])
+                insert_rows(session, Transcript, TRANSCRIPT_COLUMNS, buffers[Transcript])
+                insert_rows(session, Cds, FEATURE_COLUMNS, buffers[Cds])
+                insert_rows(session, Utr, FEATURE_COLUMNS, buffers[Utr])
+                session.commit()
+                progress.update(sum(len(rows) for rows in buffers.values()))
+                for rows in buffers.values():
+                    rows.clear()
+
+            progress = Progress("gene annotations")
+            current_gene = None
+            current_transcript = None
+            with open(self.genefile, "r") as f:
                 for line in f:
                     if line.startswith("Chromosome"):
                         continue
@@ -55,7 +330,7 @@ class DataLoader:
                         transcript_end,
                         transcript_id,
                         strand,
-                        gene_id,
+                        ensembly_id,
                         gene_name,
                         cds_start,
                         cds_end,
@@ -70,87 +345,80 @@ class DataLoader:
 
                     Chromosome = "chr" + Chromosome
                     # 处理新基因的情况
-                    if current_gene is None or gene_id != current_gene.ensembly_id:
-                        # 如果当前基因存在，先保存到数据库
-                        if current_gene is not None:
-                            session.add(current_gene)
-                        if gene_name == "NA":
-                            # 创建新基因对象
-                            current_gene = Gene(
-                                chromosome=Chromosome,
-                                start=int(gene_start),
-                                end=int(gene_end),
-                                strand=strand,
-                                symbol=" ",
-                                ensembly_id=gene_id,
-                                species=human,
-                            )
-                        else:
-                            current_gene = Gene(
-                                chromosome=Chromosome,
-                                start=int(gene_start),
-                                end=int(gene_end),
-                                strand=strand,
-                                symbol=gene_name,
-                                ensembly_id=gene_id,
-                                species=human,
-                            )
+                    if current_gene != ensembly_id:
+                        current_gene = ensembly_id
                         current_transcript = None
+                        gene_id += 1
+                        buffers[Gene].append(
+                            (
+                                gene_id,
+                                Chromosome,
+                                int(gene_start),
+                                int(gene_end),
+                                bin_from_range(int(gene_start), int(gene_end)),
+                                strand,
+                                " " if gene_name == "NA" else gene_name,
+                                ensembly_id,
+                                species_id,
+                            )
+                        )
 
                     # 处理新转录本的情况
-                    if (
-                        current_transcript is None
-                        or transcript_id != current_transcript.transcript_id
-                    ):
-                        # 如果已有转录本，先添加到基因中
-                        if current_transcript is not None:
-                            current_gene.transcripts.append(current_transcript)
-
-                        # 创建新转录本对象
-                        current_transcript = Transcript(
-                            chromosome=Chromosome,
-                            start=int(transcript_start),
-                            end=int(transcript_end),
-                            transcript_id=transcript_id,
-                            transcript_type=gene_type,
-                            gene=current_gene,
+                    if current_transcript != transcript_id:
+                        current_transcript = transcript_id
+                        transcript_id_db += 1
+                        buffers[Transcript].append(
+                            (
+                                transcript_id_db,
+                                transcript_id,
+                                Chromosome,
+                                int(transcript_start),
+                                int(transcript_end),
+                                bin_from_range(
+                                    int(transcript_start), int(transcript_end)
+                                ),
+                                gene_type,
+                                gene_id,
+                            )
                         )
 
                     # 添加CDS和UTR
                     if cds_start != "NA":
-                        cds = Cds(
-                            chromosome=Chromosome,
-                            start=int(cds_start),
-                            end=int(cds_end),
-                            transcript=current_transcript,
-                        )
-                        current_transcript.cdses.append(cds)
-
-                    if utr5_start != "NA":
-                        utr5 = Utr(
-                            chromosome=Chromosome,
-                            start=int(utr5_start),
-                            end=int(utr5_end),
-                            transcript=current_transcript,
-                        )
-                        current_transcript.utres.append(utr5)
-
-                    if utr3_start != "NA":
-                        utr3 = Utr(
-                            chromosome=Chromosome,
-                            start=int(utr3_start),
-                            end=int(utr3_end),
-                            transcript=current_transcript,
+                        buffers[Cds].append(
+                            (
+                                cds_id,
+                                Chromosome,
+                                int(cds_start),
+                                int(cds_end),
+                                bin_from_range(int(cds_start), int(cds_end)),
+                                transcript_id_db,
+                            )
                         )
-                        current_transcript.utres.append(utr3)
-
-                # 循环结束后，添加最后一个转录本和基因
-                if current_transcript is not None:
-                    current_gene.transcripts.append(current_transcript)
-                if current_gene is not None:
-                    session.add(current_gene)
+                        cds_id += 1
+                    for utr_start, utr_end in (
+                        (utr5_start, utr5_end),
+                        (utr3_start, utr3_end),
+                    ):
+                        if utr_start != "NA":
+                            buffers[Utr].append(
+                                (
+                                    utr_id,
+                                    Chromosome,
+                                    int(utr_start),
+                                    int(utr_end),
+                                    bin_from_range(int(utr_start), int(utr_end)),
+                                    transcript_id_db,
+                                )
+                            )
+                            utr_id += 1
 
+                    if sum(len(rows) for rows in buffers.values()) >= chunk_size:
+                        flush()
+            flush()
+            for model in (Species, Gene, Transcript, Cds, Utr):
+                sync_id_sequence(session, model)
             session.commit()
+            progress.done()
 
     def _upload_repeat(self):
         with rx.session(url=self.url) as session:
@@ -176,115 +444,112 @@ class DataLoader:
 
     def _upload_AA_change(self):
         with rx.session(url=self.url) as session:
+            transcript_ids = lookup_map(session, Transcript, "transcript_id")
+            rows = []
             with open(self.aachangefile, "r") as f:
                 for line in f:
                     trans, changes = line.strip("\n").split(":")
-                    transcript = session.exec(
-                        Transcript.select().where(Transcript.transcript_id == trans)
-                    ).first()
-                    if transcript:
-                        aa_change = Aminochange(change=changes, transcript=transcript)
-                        session.add(aa_change)
-                    else:
+                    transcript_id = transcript_ids.get(trans)
+                    if transcript_id is None:
                         continue
-                session.commit()
+                    rows.append((changes, transcript_id))
+            insert_rows(session, Aminochange, ("change", "transcript_id"), rows)
+            session.commit()
+
+    def _upload_edit(self, workers=1, resume=False):
+        journal = Journal(self.editingfile)
 
-    def _upload_edit(self):
+        def fresh_run():
+            with rx.session(url=self.url) as session:
+                site_id = next_id(session, RNAediting)
+                link_id = next_id(session, RNAeditingtissuelink)
+                parallel = workers > 1 and is_postgres(session)
+            if workers > 1 and not parallel:
+                print("parallel loading needs Postgres, loading with one process")
+            shards = scan_shards(self.editingfile, editing_counter) if parallel else None
+            return {"site_id": site_id, "link_id": link_id, "shards": shards}
+
+        run = start_run(journal, resume, fresh_run)
+        site_id = run["site_id"]
+        link_id = run["link_id"]
+        if run["shards"] is not None:
+            shards = [Shard(*shard) for shard in run["shards"]]
+            print(f"loading {len(shards)} shards with {workers} workers")
+            tasks = [
+                (
+                    self.url,
+                    self.editingfile,
+                    shard.start,
+                    shard.end,
+                    site_id + shard.before[0],
+                    link_id + shard.before[1],
+                    CHUNK_SIZE,
+                    journal,
+                    site_id + shard.before[0] + shard.sizes[0],
+                    link_id + shard.before[1] + shard.sizes[1],
+                )
+                for shard in shards
+            ]
+            results = run_shards(load_editing_shard, tasks, max(workers, 1))
+        else:
+            results = [
+                load_editing_shard(
+                    self.url,
+                    self.editingfile,
+                    0,
+                    None,
+                    site_id,
+                    link_id,
+                    journal=journal,
+                )
+            ]
         with rx.session(url=self.url) as session:
-            with open(self.editingfile, "r") as f:
-                for lineid, line in enumerate(f):
-                    if line.startswith("Chromosome"):
-                        continue
+            ## apply aminochange updates in file order, the last site wins
+            aminochanges = [row for _, updates in results for row in updates]
+            if aminochanges:
+                table = Aminochange.__table__
+                session.execute(
+                    sqlalchemy.update(table)
+                    .where(table.c.id == sqlalchemy.bindparam("aminochange_id"))
+                    .values(
+                        rnaediting_id=sqlalchemy.bindparam("site_id"),
+                        transcript_id=sqlalchemy.bindparam("trans_id"),
+                    ),
+                    aminochanges,
+                )
+            sync_id_sequence(session, RNAediting)
+            sync_id_sequence(session, RNAeditingtissuelink)
+            session.commit()
+            valid = validate_load(
+                session,
+                [
                     (
-                        chromosome,
-                        position,
-                        ref,
-                        ed,
-                        location,
-                        repeat,
-                        gene,
-                        geneName,
-                        genicRegion,
-                        exFun,
-                        aminoAcidChanges,
-                        n_Samples,
-                        n_Tissues,
-                        tissues,
-                    ) = line.strip("\n").split("\t")
-                    if "," in repeat or ";" in aminoAcidChanges:
-                        continue
-                    location = "REP" if location != "NONREP" else location
-                    if repeat == "-":
-                        repeat_db = None
-                    else:
-                        repeat_db = session.exec(
-                            Repeat.select().where(Repeat.repeatclass == repeat)
-                        ).first()
-                    if gene == "-":
-                        gene_db = None
-                    else:
-                        gene_id = gene.split(":")[0]
-                        gene_db = session.exec(
-                            Gene.select().where(Gene.ensembly_id == gene_id)
-                        ).first()
-                    if aminoAcidChanges == "-":
-                        aminoAcidChange_dbs = []
-                    else:
-                        aminoAcidChange_dbs = []
-                        for aminoAcidChange in aminoAcidChanges.split(";"):
-                            if ":" in aminoAcidChange:
-                                trans, acidchange = aminoAcidChange.split(":")
-                                aminoAcidChange_db = session.exec(
-                                    Aminochange.select().where(
-                                        Aminochange.change == acidchange
-                                    )
-                                ).first()
-
-                                if aminoAcidChange_db is not None:
-                                    trans_db = session.exec(
-                                        Transcript.select().where(
-                                            Transcript.transcript_id == trans
-                                        )
-                                    ).first()
-                                    aminoAcidChange_db.transcript = trans_db
-                                    aminoAcidChange_dbs.append(aminoAcidChange_db)
-                            else:
-                                print("aminoAcidChange is", aminoAcidChange)
-                    final_data = RNAediting(
-                        chromosome=chromosome,
-                        position=int(position),
-                        ref=ref,
-                        alt=ed,
-                        location=location,
-                        repeat=repeat_db,
-                        gene=gene_db,
-                        region=genicRegion,
-                        exfun=exFun,
-                        aminochanges=aminoAcidChange_dbs,
-                        samplenumbers=int(n_Samples),
-                        tissuenumbers=int(n_Tissues),
-                    )
-                    if tissues == "-":
-                        tissues_dbs = []
-                    else:
-                        tissues_dbs = []
-                        for tissue in tissues.split(";"):
-                            if tissue != "":
-                                tissue_db = session.exec(
-                                    Tissue.select().where(Tissue.name == tissue)
-                                ).first()
-                                if tissue_db is not None:
-                                    haha = RNAeditingtissuelink(
-                                        rnaediting=final_data, tissue=tissue_db
-                                    )
-                                    tissues_dbs.append(haha)
-
-                    final_data.tissues = tissues_dbs
-                    session.add(final_data)
-                    if lineid % 100 == 0:
-                        session.commit()
-                        session.refresh(final_data)
-                session.commit()
+                        RNAediting,
+                        site_id,
+                        sum(counts["rnaediting"] for counts, _ in results),
+                    ),
+                    (
+                        RNAeditingtissuelink,
+                        link_id,
+                        sum(counts["rnaeditingtissuelink"] for counts, _ in results),
+                    ),
+                ],
+            )
+            duplicates = session.execute(
+                sqlalchemy.select(RNAediting.chromosome, RNAediting.position)
+                .where(RNAediting.id >= site_id)
+                .group_by(RNAediting.chromosome, RNAediting.position)
+                .having(sqlalchemy.func.count() > 1)
+                .limit(10)
+            ).all()
+            if duplicates:
+                valid = False
+                print(f"duplicated sites after merge, e.g. {duplicates}")
+            print(f"site summary: {refresh_site_summary(session)} rows")
+            print(f"statistics: {refresh_statistics(session)} rows")
+            session.commit()
+        if valid:
+            journal.clear()
 
     def _upload_levels(self):
         with rx.session(url=self.url) as session:
@@ -317,9 +582,64 @@ class DataLoader:
                         session.refresh(final_db)
                         print(f"loaded {lineid} lines")
                 session.commit()
+        self._upload_level_vectors()
+
+    def _upload_levels_bulk(self, workers=1, resume=False):
+        if self.editinglevelfile.endswith(".parquet"):
+            ## converted with columnar_inputs.py, which needs pyarrow
+            from columnar_inputs import columnar_upload_RNAediting_levels
+
+            columnar_upload_RNAediting_levels(self.editinglevelfile, url=self.url)
+        else:
+            bulk_upload_RNAediting_levels(
+                self.editinglevelfile, url=self.url, workers=workers, resume=resume
+            )
+        self._upload_level_vectors()
+
+    def _upload_level_vectors(self):
+        ## the gene view and the level plot read the per-site vectors
+        vectors_from_editinglevel(url=self.url)
+
+    def _cluster_sites(self):
+        """Rewrite sitesummary in (chromosome, position) order (Postgres only).
+
+        Region and BED searches read sitesummary, so they then read
+        contiguous pages, and the VACUUM sets the visibility map so the
+        covering region index answers them without the table. CLUSTER locks
+        the table until it is done, so run it before the data is live.
+        """
+        engine = sqlalchemy.create_engine(self.url)
+        if engine.dialect.name == "postgresql":
+            with engine.connect().execution_options(
+                isolation_level="AUTOCOMMIT"
+            ) as connection:
+                connection.execute(
+                    sqlalchemy.text(
+                        "CLUSTER sitesummary USING uq_sitesummary_chromosome_position"
+                    )
+                )
+                connection.execute(sqlalchemy.text("VACUUM ANALYZE sitesummary"))
+            print("sitesummary sorted by chromosome and position")
+        engine.dispose()
 
-    def load_data(self):
+    def load_data(
+        self, bulk=False, workers=1, resume=False, defer_indexes=False, cluster=False
+    ):
         print("loading data begin...")
+        if defer_indexes:
+            ## indexes and foreign keys are rebuilt once all stages are in
+            deferred = deferred_indexes(
+                self.url, Journal(self.editingfile + ".indexes"), workers=max(workers, 1)
+            )
+        else:
+            deferred = contextlib.nullcontext()
+        with deferred:
+            self._load_stages(bulk, workers, resume)
+        if cluster:
+            self._cluster_sites()
+        print("All data loaded!")
+
+    def _load_stages(self, bulk, workers, resume):
         #print("load gene annotations")
         #self._upload_gene()
         #print("load repeat annotations")
@@ -329,13 +649,21 @@ class DataLoader:
         #print("load aminoacid changes")
         #self._upload_AA_change()
         #print("load RNA editing")
-        #self._upload_edit()
+        #self._upload_edit(workers=workers, resume=resume)
         print("load editing levels")
-        self._upload_levels()
-        print("All data loaded!")
+        if bulk:
+            self._upload_levels_bulk(workers=workers, resume=resume)
+        else:
+            self._upload_levels()
+
     def clear_all_tables(self):
+        """Empty every data table in place.
+
+        This takes the site down while the tables are reloaded; use
+        swap_dataset.py to reload a serving database. alembic_version is
+        left alone so that the schema does not look unmigrated afterwards.
+        """
         all_tables = [
-            "alembic_version",
             "aminochange",
             "cds",
             "editinglevel",
@@ -344,20 +672,63 @@ class DataLoader:
             "repeat",
             "rnaediting",
             "rnaeditingtissuelink",
+            "sitesummary",
             "species",
+            "statistic",
             "tissue",
             "transcript",
             "utr"]
 
         with rx.session(url=self.url) as session:
-            session.execute(sqlalchemy.text("SET FOREIGN_KEY_CHECKS = 0;"))
-            for table in all_tables:
-                session.execute(sqlalchemy.text("TRUNCATE TABLE :table"),{"table": table})
-            session.execute(sqlalchemy.text("SET FOREIGN_KEY_CHECKS = 1;"))
+            ## the version counts on from the emptied data's
+            version = dataset_version(session)
+            if is_postgres(session):
+                table_list = ", ".join(f'"{table}"' for table in all_tables)
+                session.execute(
+                    sqlalchemy.text(
+                        f"TRUNCATE TABLE {table_list} RESTART IDENTITY CASCADE"
+                    )
+                )
+            else:
+                ## SQLite has no TRUNCATE and only enforces foreign keys
+                ## when asked to
+                for table in all_tables:
+                    session.execute(sqlalchemy.text(f'DELETE FROM "{table}"'))
+            ## cached pages and site store exports of the old data go stale
+            stamp_dataset_version(session, previous=version)
             session.commit()
-            
+
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="use the chunked COPY/executemany loaders",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of worker processes for the bulk loaders (Postgres only)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue a failed bulk load from its checkpoint journal",
+    )
+    parser.add_argument(
+        "--defer-indexes",
+        action="store_true",
+        help="drop secondary indexes and foreign keys during the load and rebuild them after",
+    )
+    parser.add_argument(
+        "--cluster",
+        action="store_true",
+        help="sort the site summary physically by position after the load (Postgres only)",
+    )
+    args = parser.parse_args()
     data_path = "/home/panxiaoguang/Projects/maire_data"
     data_files = [
         "Gene_data_Macaque.txt",
@@ -369,4 +740,10 @@ if __name__ == "__main__":
     ]
     data_files = [os.path.join(data_path, file) for file in data_files]
     dataloader = DataLoader(config.db_url, *data_files)
-    dataloader.load_data()
+    dataloader.load_data(
+        bulk=args.bulk or args.resume,
+        workers=args.workers,
+        resume=args.resume,
+        defer_indexes=args.defer_indexes,
+        cluster=args.cluster,
+    )
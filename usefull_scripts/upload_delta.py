@@ -0,0 +1,291 @@
+import reflex as rx
+from rxconfig import config
+from MAIRE.models import (
+    RNAediting,
+    Tissue,
+    RNAeditingtissuelink,
+    Aminochange,
+    EditingLevel,
+)
+from upload_data_to_database import (
+    RNAEDITING_COLUMNS,
+    parse_editing_record,
+    reference_maps,
+)
+from loader_utils import (
+    CHUNK_SIZE,
+    chromosome_ranges,
+    delete_ids,
+    insert_rows,
+    lookup_map,
+    next_id,
+    read_chromosome,
+    row_digest,
+    sync_id_sequence,
+    upsert_rows,
+)
+from upload_level_vectors import refresh_vectors
+from site_summary import refresh_site_summary
+from site_statistics import refresh_statistics
+import sqlalchemy
+
+
+def database_chromosomes(session) -> set:
+    return set(
+        session.execute(sqlalchemy.select(RNAediting.chromosome).distinct()).scalars()
+    )
+
+
+def print_stats(label, stats):
+    print(", ".join([label] + [f"{count} {name}" for name, count in stats.items()]))
+
+
+def delta_upload_RNAediting(editingfile, url=config.db_url):
+    """Bring `rnaediting` and its tissue links in line with a new release.
+
+    Works one chromosome at a time. Every input record is hashed together
+    with its resolved tissue ids and compared with the hash of the stored
+    site under the same (chromosome, position); only new and changed sites
+    are upserted (INSERT ... ON CONFLICT) and sites that left the release are
+    deleted together with their links and levels. Aminochange links are
+    re-applied for the upserted sites only.
+    """
+    stats = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+    link_table = RNAeditingtissuelink
+    with rx.session(url=url) as session:
+        maps = reference_maps(session)
+        ranges = chromosome_ranges(editingfile)
+        site_id = next_id(session, RNAediting)
+        for chromosome in sorted(set(ranges) | database_chromosomes(session)):
+            changed_before = stats["inserted"] + stats["updated"] + stats["deleted"]
+            stored_links = {}
+            for rnaediting_id, tissue_id in session.execute(
+                sqlalchemy.select(link_table.rnaediting_id, link_table.tissue_id)
+                .join(RNAediting, RNAediting.id == link_table.rnaediting_id)
+                .where(RNAediting.chromosome == chromosome)
+                .order_by(link_table.rnaediting_id, link_table.tissue_id)
+            ):
+                stored_links.setdefault(rnaediting_id, []).append(tissue_id)
+            current = {}
+            columns = [getattr(RNAediting, column) for column in RNAEDITING_COLUMNS]
+            for row in session.execute(
+                sqlalchemy.select(*columns).where(RNAediting.chromosome == chromosome)
+            ):
+                current[row.position] = (
+                    row.id,
+                    row_digest(*row[1:], *stored_links.get(row.id, [])),
+                )
+            stored_links = None
+
+            seen = set()
+            pending = set()
+            upserts = []
+            changed_ids = []
+            links = []
+            aminochanges = []
+
+            def apply():
+                delete_ids(session, link_table, changed_ids, column="rnaediting_id")
+                upsert_rows(
+                    session,
+                    RNAediting,
+                    RNAEDITING_COLUMNS,
+                    upserts,
+                    ("chromosome", "position"),
+                )
+                insert_rows(session, link_table, ("rnaediting_id", "tissue_id"), links)
+                if aminochanges:
+                    table = Aminochange.__table__
+                    session.execute(
+                        sqlalchemy.update(table)
+                        .where(table.c.id == sqlalchemy.bindparam("aminochange_id"))
+                        .values(
+                            rnaediting_id=sqlalchemy.bindparam("site_id"),
+                            transcript_id=sqlalchemy.bindparam("trans_id"),
+                        ),
+                        aminochanges,
+                    )
+                session.commit()
+                for rows in (upserts, changed_ids, links, aminochanges, pending):
+                    rows.clear()
+
+            for fields in read_chromosome(editingfile, ranges.get(chromosome, [])):
+                record = parse_editing_record(fields, maps)
+                if record is None:
+                    continue
+                site, tissue_ids, changes = record
+                tissue_ids = sorted(
+                    tissue_id for tissue_id in tissue_ids if tissue_id is not None
+                )
+                position = site[1]
+                if position in pending:
+                    ## a duplicated line replaces the earlier one as an
+                    ## update, its links must not land in the same batch
+                    apply()
+                seen.add(position)
+                existing = current.get(position)
+                if existing is not None and existing[1] == row_digest(
+                    *site, *tissue_ids
+                ):
+                    stats["unchanged"] += 1
+                    continue
+                if existing is None:
+                    rnaediting_id = site_id
+                    site_id += 1
+                    stats["inserted"] += 1
+                else:
+                    rnaediting_id = existing[0]
+                    changed_ids.append(rnaediting_id)
+                    stats["updated"] += 1
+                current[position] = (rnaediting_id, row_digest(*site, *tissue_ids))
+                pending.add(position)
+                upserts.append((rnaediting_id, *site))
+                links.extend((rnaediting_id, tissue_id) for tissue_id in tissue_ids)
+                aminochanges.extend(
+                    {
+                        "aminochange_id": aminochange_id,
+                        "site_id": rnaediting_id,
+                        "trans_id": trans_id,
+                    }
+                    for aminochange_id, trans_id in changes
+                )
+                if len(upserts) >= CHUNK_SIZE:
+                    apply()
+            apply()
+
+            deleted = [
+                rnaediting_id
+                for position, (rnaediting_id, _) in current.items()
+                if position not in seen
+            ]
+            if deleted:
+                table = Aminochange.__table__
+                for start in range(0, len(deleted), CHUNK_SIZE):
+                    session.execute(
+                        sqlalchemy.update(table)
+                        .where(
+                            table.c.rnaediting_id.in_(deleted[start : start + CHUNK_SIZE])
+                        )
+                        .values(rnaediting_id=None)
+                    )
+                delete_ids(session, EditingLevel, deleted, column="rnaediting_id")
+                delete_ids(session, link_table, deleted, column="rnaediting_id")
+                delete_ids(session, RNAediting, deleted)
+                session.commit()
+                stats["deleted"] += len(deleted)
+            if stats["inserted"] + stats["updated"] + stats["deleted"] > changed_before:
+                ## the search grid reads the summary, keep it in step
+                refresh_site_summary(session, chromosome)
+                session.commit()
+            print_stats(f"after {chromosome}", stats)
+        sync_id_sequence(session, RNAediting)
+        sync_id_sequence(session, link_table)
+        refresh_statistics(session)
+        session.commit()
+    print_stats("RNA editing delta", stats)
+    return stats
+
+
+def delta_upload_levels(editinglevelfile, url=config.db_url):
+    """Bring `editinglevel` in line with a new release of RE_levels.tsv.
+
+    Rows are keyed on (site, tissue); levels that differ from the stored
+    value are upserted (INSERT ... ON CONFLICT) and stored levels missing
+    from the release are deleted, one chromosome at a time. The level vectors
+    of the sites whose levels changed are rebuilt.
+    """
+    stats = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+    skipped = 0
+    with rx.session(url=url) as session:
+        tissue_ids = lookup_map(session, Tissue, "name")
+        ranges = chromosome_ranges(editinglevelfile)
+        for chromosome in sorted(set(ranges) | database_chromosomes(session)):
+            site_ids = lookup_map(
+                session,
+                RNAediting,
+                "position",
+                where=RNAediting.chromosome == chromosome,
+            )
+            current = {}
+            for level_id, rnaediting_id, tissue_id, level in session.execute(
+                sqlalchemy.select(
+                    EditingLevel.id,
+                    EditingLevel.rnaediting_id,
+                    EditingLevel.tissue_id,
+                    EditingLevel.level,
+                )
+                .join(RNAediting, RNAediting.id == EditingLevel.rnaediting_id)
+                .where(RNAediting.chromosome == chromosome)
+            ):
+                current[(rnaediting_id, tissue_id)] = (level_id, level)
+
+            seen = set()
+            upserts = []
+            touched = set()
+            for chrom, pos, tissue_name, level in read_chromosome(
+                editinglevelfile, ranges.get(chromosome, [])
+            ):
+                key = (site_ids.get(int(pos)), tissue_ids.get(tissue_name))
+                if None in key:
+                    skipped += 1
+                    continue
+                seen.add(key)
+                level = float(level)
+                existing = current.get(key)
+                if existing is not None and existing[1] == level:
+                    stats["unchanged"] += 1
+                    continue
+                stats["inserted" if existing is None else "updated"] += 1
+                ## a duplicated line then counts as an update of this one
+                current[key] = (None if existing is None else existing[0], level)
+                upserts.append((*key, level))
+                touched.add(key[0])
+                if len(upserts) >= CHUNK_SIZE:
+                    upsert_rows(
+                        session,
+                        EditingLevel,
+                        ("rnaediting_id", "tissue_id", "level"),
+                        upserts,
+                        ("rnaediting_id", "tissue_id"),
+                    )
+                    session.commit()
+                    upserts = []
+            upsert_rows(
+                session,
+                EditingLevel,
+                ("rnaediting_id", "tissue_id", "level"),
+                upserts,
+                ("rnaediting_id", "tissue_id"),
+            )
+            deleted = []
+            for key, (level_id, _) in current.items():
+                if key not in seen:
+                    deleted.append(level_id)
+                    touched.add(key[0])
+            delete_ids(session, EditingLevel, deleted)
+            ## the pages read the per-site vectors, keep them in step
+            refresh_vectors(session, touched)
+            session.commit()
+            stats["deleted"] += len(deleted)
+            print_stats(f"after {chromosome}", stats)
+        sync_id_sequence(session, EditingLevel)
+        session.commit()
+    if skipped:
+        print(f"skipped {skipped} lines without a matching site or tissue")
+    print_stats("editing level delta", stats)
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Apply a new data release by upserting only changed rows"
+    )
+    parser.add_argument("-e", "--editingfile", type=str)
+    parser.add_argument("-l", "--editinglevelfile", type=str)
+    args = parser.parse_args()
+    if args.editingfile:
+        delta_upload_RNAediting(args.editingfile)
+    if args.editinglevelfile:
+        delta_upload_levels(args.editinglevelfile)
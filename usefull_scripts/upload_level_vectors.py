@@ -0,0 +1,170 @@
+import reflex as rx
+import sqlalchemy
+from rxconfig import config
+from MAIRE.level_vector import TISSUE_ORDER, encode_levels
+from MAIRE.models import RNAediting, Tissue, EditingLevel
+from loader_utils import (
+    CHUNK_SIZE,
+    Progress,
+    chromosome_ranges,
+    lookup_map,
+    read_chromosome,
+)
+
+
+def tissue_indexes(session) -> dict:
+    """Map tissue ids to their slot in the level vector."""
+    slots = {name: index for index, name in enumerate(TISSUE_ORDER)}
+    indexes = {}
+    for name, tissue_id in lookup_map(session, Tissue, "name").items():
+        if name in slots:
+            indexes[tissue_id] = slots[name]
+        else:
+            print(f"tissue {name} is not in TISSUE_ORDER, its levels are skipped")
+    return indexes
+
+
+def write_vectors(session, vectors: dict):
+    """Store {site id: {tissue index: level}} as encoded level vectors."""
+    table = RNAediting.__table__
+    statement = (
+        sqlalchemy.update(table)
+        .where(table.c.id == sqlalchemy.bindparam("site_id"))
+        .values(levels=sqlalchemy.bindparam("vector"))
+    )
+    rows = [
+        {"site_id": site_id, "vector": encode_levels(levels)}
+        for site_id, levels in vectors.items()
+    ]
+    for start in range(0, len(rows), CHUNK_SIZE):
+        session.execute(statement, rows[start : start + CHUNK_SIZE])
+
+
+def refresh_vectors(session, site_ids) -> int:
+    """Rebuild the level vectors of `site_ids` from their EditingLevel rows.
+
+    Sites left without levels get no vector. Loaders that change editinglevel
+    in place call this for the sites they touched; the session is not
+    committed. Returns the number of sites rewritten.
+    """
+    indexes = tissue_indexes(session)
+    site_ids = sorted(set(site_ids))
+    table = RNAediting.__table__
+    for start in range(0, len(site_ids), CHUNK_SIZE):
+        batch = site_ids[start : start + CHUNK_SIZE]
+        vectors = {}
+        for rnaediting_id, tissue_id, level in session.execute(
+            sqlalchemy.select(
+                EditingLevel.rnaediting_id, EditingLevel.tissue_id, EditingLevel.level
+            )
+            .where(EditingLevel.rnaediting_id.in_(batch))
+            .order_by(EditingLevel.rnaediting_id, EditingLevel.id)
+        ):
+            index = indexes.get(tissue_id)
+            if index is not None:
+                vectors.setdefault(rnaediting_id, {})[index] = level
+        empty = [site_id for site_id in batch if site_id not in vectors]
+        if empty:
+            session.execute(
+                sqlalchemy.update(table).where(table.c.id.in_(empty)).values(levels=None)
+            )
+        write_vectors(session, vectors)
+    return len(site_ids)
+
+
+def vector_upload_RNAediting_levels(editinglevelfile, url=config.db_url) -> int:
+    """Load RE_levels.tsv into RNAediting.levels instead of EditingLevel rows.
+
+    The file is read one chromosome at a time, so the levels of a site may be
+    spread over the file and memory holds a single chromosome. Every site of
+    a loaded chromosome gets its whole vector rewritten, so reloading is safe.
+    Returns the number of sites written.
+    """
+    progress = Progress("level vectors")
+    with rx.session(url=url) as session:
+        tissue_ids = lookup_map(session, Tissue, "name")
+        indexes = tissue_indexes(session)
+        skipped = 0
+        for chromosome, ranges in chromosome_ranges(editinglevelfile).items():
+            site_ids = lookup_map(
+                session,
+                RNAediting,
+                "chromosome",
+                "position",
+                where=RNAediting.chromosome == chromosome,
+            )
+            vectors = {}
+            for chrom, pos, tissue_name, level in read_chromosome(
+                editinglevelfile, ranges
+            ):
+                rnaediting_id = site_ids.get((chrom, int(pos)))
+                index = indexes.get(tissue_ids.get(tissue_name))
+                if rnaediting_id is None or index is None:
+                    skipped += 1
+                    continue
+                vectors.setdefault(rnaediting_id, {})[index] = float(level)
+            write_vectors(session, vectors)
+            session.commit()
+            progress.update(len(vectors))
+        progress.done()
+        if skipped:
+            print(f"skipped {skipped} lines without a matching site or tissue")
+    return progress.rows
+
+
+def vectors_from_editinglevel(url=config.db_url) -> int:
+    """Rebuild RNAediting.levels from the EditingLevel rows already loaded.
+
+    Every vector is reset first, so sites that lost all their levels are left
+    without one; the rebuild is committed in one transaction.
+    """
+    progress = Progress("level vectors")
+    with rx.session(url=url) as session:
+        indexes = tissue_indexes(session)
+        session.execute(
+            sqlalchemy.update(RNAediting.__table__)
+            .where(RNAediting.__table__.c.levels.is_not(None))
+            .values(levels=None)
+        )
+        vectors = {}
+        current = None
+        for rnaediting_id, tissue_id, level in session.execute(
+            sqlalchemy.select(
+                EditingLevel.rnaediting_id, EditingLevel.tissue_id, EditingLevel.level
+            )
+            .order_by(EditingLevel.rnaediting_id, EditingLevel.id)
+            .execution_options(yield_per=CHUNK_SIZE)
+        ):
+            if rnaediting_id != current and len(vectors) >= CHUNK_SIZE:
+                write_vectors(session, vectors)
+                progress.update(len(vectors))
+                vectors = {}
+            current = rnaediting_id
+            index = indexes.get(tissue_id)
+            if index is not None:
+                vectors.setdefault(rnaediting_id, {})[index] = level
+        write_vectors(session, vectors)
+        progress.update(len(vectors))
+        session.commit()
+        progress.done()
+    return progress.rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Store editing levels as one vector per site"
+    )
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("-i", "--editinglevelfile", type=str)
+    group.add_argument(
+        "--from-table",
+        action="store_true",
+        help="build the vectors from the existing editinglevel rows",
+    )
+    args = parser.parse_args()
+    if args.from_table:
+        vectors_from_editinglevel()
+    else:
+        vector_upload_RNAediting_levels(args.editinglevelfile)
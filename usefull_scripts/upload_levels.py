@@ -5,7 +5,28 @@ from MAIRE.models import (
     Tissue,
     EditingLevel,
 )
+from loader_utils import (
+    CHUNK_SIZE,
+    Journal,
+    Progress,
+    Shard,
+    copy_file,
+    discard_uncommitted,
+    insert_rows,
+    is_postgres,
+    lookup_map,
+    next_id,
+    read_chunks,
+    run_shards,
+    scan_shards,
+    start_run,
+    sync_id_sequence,
+    validate_load,
+)
+from upload_level_vectors import vectors_from_editinglevel
+import sqlalchemy
 import sys
+import time
 
 def upload_RNAediting_levels(editinglevelfile):
     with rx.session(url=config.db_url) as session:
@@ -49,10 +70,303 @@ def upload_RNAediting_levels(editinglevelfile):
             session.commit()
             session.refresh(final_db)
             print("congradulations! all data loaded!")
-    
+
+
+def levels_counter(fields):
+    return (1,)
+
+
+def load_levels_shard(
+    url,
+    editinglevelfile,
+    start,
+    end,
+    level_id,
+    chromosome=None,
+    chunk_size=CHUNK_SIZE,
+    journal=None,
+    level_end=None,
+):
+    """Load the lines of `editinglevelfile` between byte offsets `start` and `end`.
+
+    Every data line consumes one id from `level_id`, matched or not, so the
+    ids are the same however the file is sharded; `level_end` is the first id
+    of the next shard (None for the last one). With `chromosome` given only
+    the sites of that chromosome are read into the site map. Progress is
+    checkpointed to `journal` after every commit, and a shard with a
+    checkpoint continues from its last committed chunk after deleting rows
+    committed past the checkpoint.
+    Returns the number of rows written.
+    """
+    name = f"shard-{start}"
+    state = journal.read(name) if journal is not None else None
+    if state is None:
+        state = {
+            "offset": start,
+            "line": 0,
+            "level_id": level_id,
+            "counts": {"editinglevel": 0},
+            "done": False,
+        }
+    elif state["done"]:
+        return state["counts"]["editinglevel"]
+    else:
+        print(f"shard {start}: resuming at byte {state['offset']}, line {state['line']}")
+    level_id = state["level_id"]
+    with rx.session(url=url) as session:
+        if journal is not None:
+            discarded = discard_uncommitted(session, EditingLevel, level_id, level_end)
+            session.commit()
+            if discarded:
+                print(f"shard {start}: removed {discarded} rows committed past the checkpoint")
+        where = None if chromosome is None else RNAediting.chromosome == chromosome
+        site_ids = lookup_map(
+            session, RNAediting, "chromosome", "position", where=where
+        )
+        tissue_ids = lookup_map(session, Tissue, "name")
+        progress = Progress(f"editing levels [{start}:{end}]")
+        skipped = 0
+        for chunk, offset, lines in read_chunks(
+            editinglevelfile, state["offset"], end, chunk_size
+        ):
+            rows = []
+            for chrom, pos, tissue_name, level in chunk:
+                rnaediting_id = site_ids.get((chrom, int(pos)))
+                tissue_id = tissue_ids.get(tissue_name)
+                if rnaediting_id is not None and tissue_id is not None:
+                    rows.append((level_id, rnaediting_id, tissue_id, float(level)))
+                else:
+                    skipped += 1
+                level_id += 1
+            insert_rows(
+                session,
+                EditingLevel,
+                ("id", "rnaediting_id", "tissue_id", "level"),
+                rows,
+            )
+            session.commit()
+            state["offset"] = offset
+            state["line"] += lines
+            state["level_id"] = level_id
+            state["counts"]["editinglevel"] += len(rows)
+            if journal is not None:
+                journal.write(name, state)
+            progress.update(len(rows))
+        progress.done()
+        if skipped:
+            print(f"skipped {skipped} lines without a matching site or tissue")
+    state["done"] = True
+    if journal is not None:
+        journal.write(name, state)
+    return state["counts"]["editinglevel"]
+
+
+def bulk_upload_RNAediting_levels(
+    editinglevelfile,
+    url=config.db_url,
+    chunk_size=CHUNK_SIZE,
+    workers=1,
+    resume=False,
+):
+    """Load RE_levels.tsv in chunks, resolving ids from in-memory maps.
+
+    Sites and tissues are read once into dicts, so no SELECT is issued per
+    line. Each chunk is written with COPY (Postgres) or executemany (SQLite)
+    and committed on its own. With `workers` > 1 on Postgres the file is split
+    into per-chromosome shards that are loaded by a process pool. Every
+    commit is checkpointed in `<editinglevelfile>.journal`; with `resume` a
+    failed load continues from the last committed chunk of every shard.
+    """
+    journal = Journal(editinglevelfile)
+
+    def fresh_run():
+        with rx.session(url=url) as session:
+            level_id = next_id(session, EditingLevel)
+            parallel = workers > 1 and is_postgres(session)
+        if workers > 1 and not parallel:
+            print("parallel loading needs Postgres, loading with one process")
+        shards = scan_shards(editinglevelfile, levels_counter) if parallel else None
+        return {"level_id": level_id, "shards": shards}
+
+    run = start_run(journal, resume, fresh_run)
+    level_id = run["level_id"]
+    if run["shards"] is not None:
+        shards = [Shard(*shard) for shard in run["shards"]]
+        print(f"loading {len(shards)} shards with {workers} workers")
+        tasks = [
+            (
+                url,
+                editinglevelfile,
+                shard.start,
+                shard.end,
+                level_id + shard.before[0],
+                shard.chromosome,
+                chunk_size,
+                journal,
+                level_id + shard.before[0] + shard.sizes[0],
+            )
+            for shard in shards
+        ]
+        loaded = sum(run_shards(load_levels_shard, tasks, max(workers, 1)))
+    else:
+        loaded = load_levels_shard(
+            url,
+            editinglevelfile,
+            0,
+            None,
+            level_id,
+            chunk_size=chunk_size,
+            journal=journal,
+        )
+    with rx.session(url=url) as session:
+        sync_id_sequence(session, EditingLevel)
+        session.commit()
+        valid = validate_load(session, [(EditingLevel, level_id, loaded)])
+    if valid:
+        journal.clear()
+
+
+STAGING_TABLE = "editinglevel_staging"
+STAGING_COLUMNS = ("chromosome", "position", "tissue", "level")
+
+
+def staged_upload_RNAediting_levels(
+    editinglevelfile, url=config.db_url, chunk_size=CHUNK_SIZE, sample_size=10
+):
+    """Load RE_levels.tsv through a staging table and one set-based join.
+
+    The raw (chromosome, position, tissue, level) tuples are copied into an
+    unlogged staging table (a temporary one on SQLite). A single
+    INSERT ... SELECT joined against rnaediting and tissue then fills
+    editinglevel, so the lookups run as a hash join in the database instead
+    of one index probe per line. Lines without a matching site or tissue are
+    reported as a count and a sample.
+    Returns the number of rows inserted.
+    """
+    site = RNAediting.__table__.name
+    tissue = Tissue.__table__.name
+    matches = f"""
+        FROM {STAGING_TABLE} s
+        LEFT JOIN {site} r ON r.chromosome = s.chromosome AND r.position = s.position
+        LEFT JOIN {tissue} t ON t.name = s.tissue
+    """
+    with rx.session(url=url) as session:
+        progress = Progress("staging editing levels")
+        if is_postgres(session):
+            session.execute(
+                sqlalchemy.text(
+                    f"CREATE UNLOGGED TABLE IF NOT EXISTS {STAGING_TABLE} "
+                    "(chromosome text, position integer, tissue text, level double precision)"
+                )
+            )
+            session.execute(sqlalchemy.text(f"TRUNCATE {STAGING_TABLE}"))
+            copy_file(session, STAGING_TABLE, STAGING_COLUMNS, editinglevelfile)
+            ## fresh statistics so the planner picks a hash join
+            session.execute(sqlalchemy.text(f"ANALYZE {STAGING_TABLE}"))
+            progress.update(
+                session.execute(
+                    sqlalchemy.text(f"SELECT count(*) FROM {STAGING_TABLE}")
+                ).scalar()
+            )
+        else:
+            session.execute(
+                sqlalchemy.text(
+                    f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} "
+                    "(chromosome text, position integer, tissue text, level real)"
+                )
+            )
+            session.execute(sqlalchemy.text(f"DELETE FROM {STAGING_TABLE}"))
+            insert = sqlalchemy.text(
+                f"INSERT INTO {STAGING_TABLE} VALUES "
+                "(:chromosome, :position, :tissue, :level)"
+            )
+            for chunk, _, _ in read_chunks(editinglevelfile, chunk_size=chunk_size):
+                session.execute(
+                    insert, [dict(zip(STAGING_COLUMNS, row)) for row in chunk]
+                )
+                progress.update(len(chunk))
+        progress.done()
+
+        started = time.perf_counter()
+        inserted = session.execute(
+            sqlalchemy.text(
+                f"INSERT INTO {EditingLevel.__table__.name} (rnaediting_id, tissue_id, level) "
+                f"SELECT r.id, t.id, s.level {matches} "
+                "WHERE r.id IS NOT NULL AND t.id IS NOT NULL"
+            )
+        ).rowcount
+        print(
+            f"inserted {inserted} editing levels in "
+            f"{time.perf_counter() - started:.1f}s with one join"
+        )
+        unmatched = session.execute(
+            sqlalchemy.text(
+                f"SELECT count(*) {matches} WHERE r.id IS NULL OR t.id IS NULL"
+            )
+        ).scalar()
+        if unmatched:
+            print(f"{unmatched} lines have no matching site or tissue, e.g.:")
+            for row in session.execute(
+                sqlalchemy.text(
+                    "SELECT s.chromosome, s.position, s.tissue, "
+                    "r.id IS NULL AS no_site, t.id IS NULL AS no_tissue "
+                    f"{matches} WHERE r.id IS NULL OR t.id IS NULL LIMIT :limit"
+                ),
+                {"limit": sample_size},
+            ):
+                reasons = [
+                    reason
+                    for reason, missing in (("site", row.no_site), ("tissue", row.no_tissue))
+                    if missing
+                ]
+                print(
+                    f"  {row.chromosome}:{row.position} {row.tissue} "
+                    f"(unknown {' and '.join(reasons)})"
+                )
+        session.execute(sqlalchemy.text(f"DROP TABLE {STAGING_TABLE}"))
+        session.commit()
+    return inserted
+
+
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument("-i", "--editinglevelfile", type=str, required=True)
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="load in chunks with COPY (Postgres) or executemany (SQLite)",
+    )
+    parser.add_argument(
+        "--staged",
+        action="store_true",
+        help="copy the raw file into a staging table and resolve ids with one join",
+    )
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of worker processes for --bulk (Postgres only)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue a failed --bulk load from its checkpoint journal",
+    )
     args = parser.parse_args()
-    upload_RNAediting_levels(args.editinglevelfile)
\ No newline at end of file
+    if args.staged:
+        staged_upload_RNAediting_levels(
+            args.editinglevelfile, chunk_size=args.chunk_size
+        )
+    elif args.bulk or args.resume:
+        bulk_upload_RNAediting_levels(
+            args.editinglevelfile,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            resume=args.resume,
+        )
+    else:
+        upload_RNAediting_levels(args.editinglevelfile)
+    ## the gene view and the level plot read the per-site vectors
+    vectors_from_editinglevel()
\ No newline at end of file